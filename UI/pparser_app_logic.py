@@ -1,48 +1,47 @@
-from sonatabene.parser import PParser	
+from sonatabene.parser import PParser, DEFAULT_PARSE_PARAMS
+from sonatabene.cache import ParseCache, PredictionCache
+from sonatabene.utils import StageTimer
+from contextlib import contextmanager
 import numpy as np
 import streamlit as st
 
+# Progress reached once each stage of PParser.parse is done
+STAGE_PROGRESS = {'load': 10, 'cache': 20, 'staff': 50, 'notes': 90}
+
+class ProgressTimer(StageTimer):
+    """StageTimer that advances a Streamlit progress bar as the parsing stages finish."""
+
+    def __init__(self, progress_bar):
+        super().__init__()
+        self.progress_bar = progress_bar
+        self.progress = 0
+
+    @contextmanager
+    def stage(self, name: str):
+        with super().stage(name):
+            yield
+        self.progress = max(self.progress, STAGE_PROGRESS.get(name, self.progress))
+        self.progress_bar.progress(self.progress)
+
+@st.cache_resource
+def get_parse_cache():
+    return ParseCache()
+
+@st.cache_resource
+def get_prediction_cache():
+    return PredictionCache()
+
 def parse_music_sheet(image, progress_bar, params=None):
     parser = PParser()
-    total_progress = 0
     progress_bar.progress(0)
     
     if params is None:
-        params = {
-            # 'resize_max_dim': 1600,
-            'staff_dilate_iterations': 3,
-            'staff_min_contour_area': 10000,
-            'staff_pad_size': 0,
-            'note_dilate_iterations': 3,
-            'note_min_contour_area': 75,
-            'note_pad_size': 0,
-            'max_horizontal_distance': 10,
-            'overlap_threshold': 0.2
-        }
+        params = dict(DEFAULT_PARSE_PARAMS)
     
-    image = parser.load_image(image)
+    staff_lines = parser.parse(image, params=params, cache=get_parse_cache(), timer=ProgressTimer(progress_bar))
+    image = parser.image
     # image = parser.resize(image, max_dim=params['resize_max_dim'])
     
-    staff_lines = parser.find_staff_lines(
-        dilate_iterations=params['staff_dilate_iterations'],
-        min_contour_area=params['staff_min_contour_area'],
-        pad_size=params['staff_pad_size']
-    )
-    
-    total_steps = len(staff_lines) + 1
-    progress_increment = 100 / total_steps
-    total_progress += progress_increment
-    progress_bar.progress(int(total_progress))
-    
-    staff_lines = parser.find_notes(
-        staff_lines,
-        dilate_iterations=params['note_dilate_iterations'],
-        min_contour_area=params['note_min_contour_area'],
-        pad_size=params['note_pad_size'],
-        max_horizontal_distance=params['max_horizontal_distance'],
-        overlap_threshold=params['overlap_threshold']
-    )
-    
     staff_visualization = parser.draw_staff_lines(
         image.copy(), 
         staff_lines,
@@ -1,40 +1,163 @@
-from fastapi import FastAPI, UploadFile, File
+from contextlib import asynccontextmanager
+from typing import List
+from fastapi import FastAPI, UploadFile, File, Query
 from fastapi.responses import JSONResponse
-from ultralytics import YOLO
-import numpy as np
-import cv2
-from fastapi.responses import Response
-import pickle
+from fastapi.responses import Response, StreamingResponse
+from sonatabene.cache import ParseCache
+from sonatabene.ingest import iter_upload_pages
+from sonatabene.protocol import encode_detections, detections_to_json, MEDIA_TYPE, NDJSON_MEDIA_TYPE
+from sonatabene.serving import InferenceService, ServiceOverloaded, decode_image
+from sonatabene.transcribe import staff_crops, render_score, server_timing, OUTPUT_FORMATS
+from sonatabene.utils import StageTimer
+import asyncio
+import json
+import os
 
-app = FastAPI()
-model = YOLO("models/chopin.pt")
+# Inference runs on SNB_WORKERS threads with at most SNB_MAX_QUEUE requests waiting;
+# beyond that /predict/ answers 503 so clients back off instead of queueing forever.
+# Requests arriving within SNB_BATCH_WINDOW_MS are run together, up to SNB_MAX_BATCH_SIZE.
+# SNB_BACKEND runs an exported model instead of PyTorch (onnx, openvino or opencv).
+service = InferenceService(
+    os.environ.get("SNB_MODEL_PATH", "models/chopin.pt"),
+    backend=os.environ.get("SNB_BACKEND", "torch"),
+    workers=int(os.environ.get("SNB_WORKERS", 1)),
+    max_queue=int(os.environ.get("SNB_MAX_QUEUE", 8)),
+    max_batch_size=int(os.environ.get("SNB_MAX_BATCH_SIZE", 8)),
+    batch_window_ms=float(os.environ.get("SNB_BATCH_WINDOW_MS", 5)),
+)
+
+parse_cache = ParseCache()
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    service.warmup()
+    yield
+    service.shutdown()
+
+app = FastAPI(lifespan=lifespan)
 
 @app.get("/")
 def root():
     return {"message": "API YOLO prête à prédire !"}
 
+@app.get("/health")
+def health():
+    status = service.health()
+    return JSONResponse(status_code=200 if status['ready'] else 503, content=status)
+
+@app.get("/metrics")
+def metrics():
+    return {**service.health(), 'batching': service.metrics.as_dict()}
+
 @app.post("/predict/")
 async def predict_endpoint(file: UploadFile = File(...)):
     try:
         # Read the image content
         contents = await file.read()
 
-        # Convert bytes to numpy array
-        nparr = np.frombuffer(contents, np.uint8)
+        # Decode and run YOLO model prediction on the worker pool
+        results = await service.predict(contents)
+
+        result_bytes = encode_detections(results)
+
+        return Response(content=result_bytes, media_type=MEDIA_TYPE)
+
+    except ServiceOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
+    except Exception as e:
+        return JSONResponse(status_code=500, content={"error": str(e)})
+
+@app.post("/predict/batch")
+async def predict_batch_endpoint(files: List[UploadFile] = File(...), dpi: int = 200):
+    """
+    Predict on many images, or on the pages of PDF/TIFF documents, in one request.
 
-        # Decode image (BGR format)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    Results are streamed as NDJSON in completion order, one line per page:
+    {"index", "file", "page", "status": "ok", "detections": {...}} or
+    {"index", "file", "page", "status": "error", "error"}; "page" is null when a whole
+    file cannot be read. Pages are decoded one at a time as inference slots free up, so
+    memory does not grow with the page count.
+    """
+    if service.health()['status'] == 'overloaded':
+        return JSONResponse(status_code=503, content={"error": "Inference queue is full"}, headers={"Retry-After": "1"})
 
-        # Sanity check
-        if image is None:
-            raise ValueError("Could not decode the image.")
+    # (file, page name) of each index, filled as the pages are decoded
+    items = []
 
-        # Run YOLO model prediction
-        results = model(image)
+    async def pages():
+        for file in files:
+            contents = await file.read()
+            iterator = iter_upload_pages(contents, file.filename, dpi=dpi, page_errors=True)
+            while True:
+                try:
+                    page = await asyncio.to_thread(next, iterator, None)
+                except Exception as e:
+                    items.append((file.filename, None))
+                    yield e
+                    break
+                if page is None:
+                    break
+                items.append((file.filename, page[0]))
+                yield page[1]
+            del contents, iterator
 
-        result_bytes = pickle.dumps(results)
+    async def stream():
+        async for index, result in service.predict_many(pages()):
+            filename, page_name = items[index]
+            line = {"index": index, "file": filename, "page": page_name}
+            if isinstance(result, Exception):
+                line.update(status="error", error=str(result))
+            else:
+                line.update(status="ok", detections=detections_to_json(result[0]))
+            yield json.dumps(line) + "\n"
 
-        return Response(content=result_bytes, media_type="application/octet-stream")
+    return StreamingResponse(stream(), media_type=NDJSON_MEDIA_TYPE)
 
+@app.post("/transcribe")
+async def transcribe_endpoint(file: UploadFile = File(...), output_format: str = Query('midi', alias='format'),
+                              instrument: str = 'piano', tempo: int = 120):
+    """
+    Run the whole pipeline on a page and return ABC, MIDI or MusicXML.
+
+    Stage durations (parse, inference, abc, music21, render) are reported in the
+    Server-Timing header, the number of staff lines in X-Staff-Lines.
+    """
+    from sonatabene.converter.converter_yolo import yolo_to_abc
+
+    if output_format not in OUTPUT_FORMATS:
+        return JSONResponse(status_code=400, content={"error": f"Unknown format '{output_format}', expected one of {list(OUTPUT_FORMATS)}"})
+
+    timer = StageTimer()
+    try:
+        contents = await file.read()
+        with timer.stage('parse'):
+            crops = await asyncio.to_thread(lambda: staff_crops(decode_image(contents), cache=parse_cache))
+        if not crops:
+            return JSONResponse(status_code=422, content={"error": "No staff lines detected in the image."},
+                                headers={"Server-Timing": server_timing(timer)})
+
+        with timer.stage('inference'):
+            predictions = []
+            async for index, result in service.predict_many(crops):
+                if isinstance(result, Exception):
+                    raise result
+                predictions.append((index, result[0]))
+        predictions = [result for _, result in sorted(predictions, key=lambda item: item[0])]
+
+        def convert():
+            with timer.stage('abc'):
+                abc = yolo_to_abc(predictions)
+            return render_score(abc, output_format, instrument=instrument, tempo_bpm=tempo, timer=timer)
+        content, media_type = await asyncio.to_thread(convert)
+
+    except ServiceOverloaded as e:
+        return JSONResponse(status_code=503, content={"error": str(e)}, headers={"Retry-After": "1"})
+    except ValueError as e:
+        return JSONResponse(status_code=400, content={"error": str(e)})
     except Exception as e:
-        return JSONResponse(status_code=500, content={"error": str(e)})
\ No newline at end of file
+        return JSONResponse(status_code=500, content={"error": str(e)}, headers={"Server-Timing": server_timing(timer)})
+
+    return Response(content=content, media_type=media_type,
+                    headers={"Server-Timing": server_timing(timer), "X-Staff-Lines": str(len(crops))})
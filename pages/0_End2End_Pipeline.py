@@ -6,9 +6,9 @@ import tempfile
 import os
 from UI.statics import apply_custom_css, create_file_uploader, create_camera_input
 from sonatabene.parser import PParser
-from ultralytics import YOLO
 from sonatabene.converter import yolo_to_abc, abc_to_midi, abc_to_musescore, abc_to_audio, abc_to_musescore
-from sonatabene.model import predict_with_api
+from sonatabene.model import predict_with_api, predict
+from UI.pparser_app_logic import get_prediction_cache
 from sonatabene.converter.converter_abc import INSTRUMENT_MAP
 from sonatabene.utils import get_musescore_path
 from midi2audio import FluidSynth
@@ -77,8 +77,6 @@ if st.session_state.step >= 1:
 if st.session_state.step >= 2 and st.session_state.image is not None:
     st.title("Step 2: Note Classification")
 
-    model = YOLO(model="models/chopin.pt")
-
     col1, col2 = st.columns(2)
     with col1:
         confidence_threshold = st.slider(
@@ -104,13 +102,15 @@ if st.session_state.step >= 2 and st.session_state.image is not None:
         with st.spinner("Classifying notes..."):
             st.session_state.predictions = []
 
-            result = model.predict(source=st.session_state.image_color, 
-                            conf=confidence_threshold,
-                            iou=nms_threshold,
-                            save=False)[0]
+            result = predict(st.session_state.image_color,
+                             model_path="models/chopin.pt",
+                             cache=get_prediction_cache(),
+                             conf=confidence_threshold,
+                             iou=nms_threshold,
+                             save=False)[0]
             st.session_state.predictions.append(result)
             
-            st.image(result.plot(), 
+            st.image(result.plot(st.session_state.image_color), 
                     caption=f"Note Classification",
                     use_container_width=True)
                 
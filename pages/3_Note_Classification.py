@@ -3,7 +3,8 @@ import numpy as np
 import cv2
 from UI.statics import apply_custom_css, create_file_uploader, create_camera_input, info_box
 import pickle
-from ultralytics import YOLO
+from sonatabene.model import predict
+from UI.pparser_app_logic import get_prediction_cache
 from sonatabene.converter import yolo_to_abc, abc_to_midi, abc_to_audio, abc_to_musescore
 from music21 import instrument
 from io import BytesIO
@@ -96,17 +97,17 @@ if camera_input is not None or uploaded_file is not None:
         st.title("Music Generation Results...")
         with st.spinner("🎼 Generating your music..."):
             try:
-                model = YOLO('models/chopin.pt')
-                
-                results = model.predict(
-                    source=image,
+                results = predict(
+                    image,
+                    model_path='models/chopin.pt',
+                    cache=get_prediction_cache(),
                     conf=confidence_threshold,
                     iou=nms_threshold,
                     save=False,
                 )
                 
                 st.subheader("Classified Notes")
-                st.image(results[0].plot(), caption="Classified Note Detection")
+                st.image(results[0].plot(image), caption="Classified Note Detection")
 
                 st.markdown("---")   
                 _, col_metrics1, col_metrics2, col_metrics3, _ = st.columns(5)
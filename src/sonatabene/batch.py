@@ -0,0 +1,126 @@
+import json
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import cv2
+import loguru
+from tqdm import tqdm
+from sonatabene.cache import ParseCache
+from sonatabene.ingest import iter_pages, IMAGE_EXTENSIONS, TIFF_EXTENSIONS, PDF_EXTENSIONS
+from sonatabene.parser import PParser
+from sonatabene.utils import StageTimer
+
+# Per-process state, set up once by _init_worker
+_parser: Optional[PParser] = None
+_params: Optional[dict] = None
+_dpi: int = 200
+_cache: Optional[ParseCache] = None
+
+def _init_worker(params: Optional[dict], dpi: int, cache_dir: Optional[str] = None) -> None:
+    """Create the parser of a worker process and pin OpenCV to a single thread."""
+    global _parser, _params, _dpi, _cache
+    cv2.setNumThreads(1)
+    _parser = PParser()
+    _params = params
+    _dpi = dpi
+    _cache = ParseCache(cache_dir) if cache_dir else None
+
+def _parse_file(path: str) -> List[dict]:
+    """Parse every page of a file and return one geometry record per page."""
+    records = []
+    pages = iter_pages(path, dpi=_dpi)
+    while True:
+        timer = StageTimer()
+        with timer.stage('decode'):
+            page = next(pages, None)
+        if page is None:
+            break
+
+        name, image = page
+        staff_lines = _parser.parse(image, params=_params, filename=name, timer=timer, keep_pixels=False,
+                                   cache=_cache)
+        with timer.stage('serialize'):
+            record = {
+                'source': path,
+                'page': name,
+                'staff_lines': [staff_line.to_dict() for staff_line in staff_lines]
+            }
+        record['timings'] = timer.as_dict()
+        records.append(record)
+        _parser.release()
+        del page, image, staff_lines
+    return records
+
+def list_score_files(input_dir: str) -> List[str]:
+    """List the image, TIFF and PDF files of a directory tree, sorted by path."""
+    extensions = IMAGE_EXTENSIONS + TIFF_EXTENSIONS + PDF_EXTENSIONS
+    files = []
+    for root, _, names in os.walk(input_dir):
+        files.extend(os.path.join(root, name) for name in names if name.lower().endswith(extensions))
+    return sorted(files)
+
+def parse_directory(input_dir: str, output_path: str, max_workers: Optional[int] = None,
+                    params: Optional[dict] = None, dpi: int = 200,
+                    cache_dir: Optional[str] = None) -> Dict[str, float]:
+    """
+    Parse every score of a directory in parallel, one PParser per worker process.
+
+    Results are appended to `output_path` as JSON lines (one line per page) as soon
+    as each file is done, so a partial run still leaves usable output.
+
+    Args:
+        input_dir: Directory containing images, multi-page TIFFs or PDFs
+        output_path: Path of the JSON lines file to write
+        max_workers: Number of worker processes (defaults to the number of cores)
+        params: Detection parameters, see DEFAULT_PARSE_PARAMS
+        dpi: Rendering resolution for PDF pages
+        cache_dir: Optional ParseCache directory shared by the workers, pages parsed
+                   before with the same parameters are not detected again
+
+    Returns:
+        Dict[str, float]: Summary with page count, elapsed time, pages/s and the
+        mean duration of each stage per page
+    """
+    files = list_score_files(input_dir)
+    if not files:
+        raise ValueError(f"No score files found in {input_dir}")
+
+    max_workers = max_workers or os.cpu_count()
+    loguru.logger.info(f"Parsing {len(files)} files with {max_workers} workers")
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    stage_totals = defaultdict(float)
+    pages = 0
+    start = time.perf_counter()
+
+    with open(output_path, 'w') as output, \
+         ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker, initargs=(params, dpi, cache_dir)) as executor:
+        futures = {executor.submit(_parse_file, path): path for path in files}
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Parsing", unit="file"):
+            try:
+                records = future.result()
+            except Exception as e:
+                loguru.logger.error(f"Failed to parse {futures[future]}: {str(e)}")
+                continue
+
+            for record in records:
+                output.write(json.dumps(record) + "\n")
+                for stage, duration in record['timings'].items():
+                    stage_totals[stage] += duration
+            output.flush()
+            pages += len(records)
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'files': len(files),
+        'pages': pages,
+        'elapsed': elapsed,
+        'pages_per_second': pages / elapsed if elapsed > 0 else 0.0,
+    }
+    summary.update({f'{stage}_mean': total / pages for stage, total in stage_totals.items()} if pages else {})
+    return summary
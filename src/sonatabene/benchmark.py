@@ -0,0 +1,616 @@
+import glob
+import os
+import re
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+import cv2
+import numpy as np
+from sonatabene.parser import PParser, DEFAULT_PARSE_PARAMS
+from sonatabene.scoretyping import NoteTable, Detections
+
+# resources/ of the repository, independent of the working directory
+RESOURCES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "resources")
+
+def default_images(samples: bool = True) -> List[str]:
+    """Return the demo pages, and the sample images unless `samples` is False, in path order."""
+    paths = glob.glob(os.path.join(RESOURCES_DIR, "demo", "*.png"))
+    if samples:
+        paths += glob.glob(os.path.join(RESOURCES_DIR, "samples", "*"))
+    return sorted(paths)
+
+def best_of(fn: Callable, repeat: int = 5) -> float:
+    """Return the best wall-clock time (in seconds) of `repeat` calls of fn."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def pairwise_group_note_components(contours: List[np.ndarray], max_horizontal_distance: int = 10,
+                                   overlap_threshold: float = 0.8) -> List[np.ndarray]:
+    """
+    Reference implementation of PParser.group_note_components before the sweep-line
+    rewrite: bounding rects recomputed in the sort key and the loop, and every rect
+    compared against every member of the current group.
+    """
+    if not contours:
+        return []
+
+    sorted_contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
+    groups = []
+    current_group = []
+
+    def merge(group):
+        if len(group) == 1:
+            return group[0][0]
+        x_min = min(rect[0] for _, rect in group)
+        y_min = min(rect[1] for _, rect in group)
+        x_max = max(rect[0] + rect[2] for _, rect in group)
+        y_max = max(rect[1] + rect[3] for _, rect in group)
+        return np.array([[[x_min, y_min]], [[x_max, y_min]], [[x_max, y_max]], [[x_min, y_max]]], dtype=np.int32)
+
+    for contour in sorted_contours:
+        rect = cv2.boundingRect(contour)
+        x, y, w, h = rect
+
+        if not current_group:
+            current_group = [(contour, rect)]
+            continue
+
+        last_x = current_group[-1][1][0] + current_group[-1][1][2]
+        horizontal_dist = x - last_x
+
+        if horizontal_dist > max_horizontal_distance:
+            groups.append(merge(current_group))
+            current_group = [(contour, rect)]
+            continue
+
+        should_merge = False
+        for group_contour, group_rect in current_group:
+            gx, gy, gw, gh = group_rect
+            vertical_overlap = (y <= gy + gh) and (gy <= y + h)
+            if vertical_overlap:
+                x_left = max(x, gx)
+                y_top = max(y, gy)
+                x_right = min(x + w, gx + gw)
+                y_bottom = min(y + h, gy + gh)
+                if x_right >= x_left and y_bottom >= y_top:
+                    intersection_area = (x_right - x_left) * (y_bottom - y_top)
+                    ratio1 = intersection_area / (w * h) if w * h > 0 else 0
+                    ratio2 = intersection_area / (gw * gh) if gw * gh > 0 else 0
+                    if max(ratio1, ratio2) > overlap_threshold or horizontal_dist <= max_horizontal_distance:
+                        should_merge = True
+                        break
+
+        if should_merge:
+            current_group.append((contour, rect))
+        else:
+            groups.append(merge(current_group))
+            current_group = [(contour, rect)]
+
+    if current_group:
+        groups.append(merge(current_group))
+
+    return groups
+
+def page_components(image_path: str, tile: int = 1, dilate_iterations: int = 1) -> List[np.ndarray]:
+    """
+    Return the connected contours of a page with staff lines removed.
+
+    Tiling the page `tile` x `tile` times gives a denser page with the same kind of content.
+    """
+    parser = PParser()
+    image = cv2.imread(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from path: {image_path}")
+    if tile > 1:
+        image = np.tile(image, (tile, tile, 1))
+    parser.load_image(image)
+    cleaned = parser.remove_staff_lines(parser.processed_image)
+    return parser.find_contours(cleaned, dilate_iterations=dilate_iterations)
+
+def chained_components(runs: int = 50, run_length: int = 100, spacing: int = 8) -> List[np.ndarray]:
+    """
+    Return a synthetic page of slur-like chains of overlapping glyph fragments.
+
+    Each fragment only touches its neighbour, which is the worst case of the pairwise
+    grouping: every new fragment is compared with the whole chain built so far.
+    """
+    def rect(x, y, w, h):
+        return np.array([[[x, y]], [[x + w - 1, y]], [[x + w - 1, y + h - 1]], [[x, y + h - 1]]], dtype=np.int32)
+
+    components = []
+    for run in range(runs):
+        x0 = run * (run_length * spacing + 100)
+        components.extend(rect(x0 + k * spacing, (k % 2) * 5, spacing + 2, 6) for k in range(run_length))
+    return components
+
+def bench_grouping(image_paths: Optional[List[str]] = None, tile: int = 2, repeat: int = 5,
+                   max_horizontal_distance: int = 10, overlap_threshold: float = 0.2) -> List[dict]:
+    """
+    Compare the sweep-line grouping with the pairwise reference on dense pages.
+
+    Returns:
+        List[dict]: One row per page with component count, timings, speedup and
+        whether both implementations produced identical groups
+    """
+    parser = PParser()
+    pages = [(os.path.basename(path), page_components(path, tile=tile)) for path in image_paths or default_images()]
+    pages.append(('synthetic-chains', chained_components()))
+    rows = []
+    for name, components in pages:
+        kwargs = dict(max_horizontal_distance=max_horizontal_distance, overlap_threshold=overlap_threshold)
+
+        reference = pairwise_group_note_components(components, **kwargs)
+        grouped = parser.group_note_components(components, **kwargs)
+        identical = len(reference) == len(grouped) and all(np.array_equal(a, b) for a, b in zip(reference, grouped))
+
+        pairwise_time = best_of(lambda: pairwise_group_note_components(components, **kwargs), repeat)
+        sweep_time = best_of(lambda: parser.group_note_components(components, **kwargs), repeat)
+        rows.append({
+            'image': name,
+            'components': len(components),
+            'groups': len(grouped),
+            'pairwise_ms': pairwise_time * 1000,
+            'sweep_ms': sweep_time * 1000,
+            'speedup': pairwise_time / sweep_time if sweep_time > 0 else float('inf'),
+            'identical': identical
+        })
+    return rows
+
+def _rect_iou(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Pairwise IoU of two (N, 4) and (M, 4) arrays of (x, y, w, h) rects."""
+    a = a[:, None, :].astype(np.float64)
+    b = b[None, :, :].astype(np.float64)
+    w = np.clip(np.minimum(a[..., 0] + a[..., 2], b[..., 0] + b[..., 2]) - np.maximum(a[..., 0], b[..., 0]), 0, None)
+    h = np.clip(np.minimum(a[..., 1] + a[..., 3], b[..., 1] + b[..., 3]) - np.maximum(a[..., 1], b[..., 1]), 0, None)
+    intersection = w * h
+    union = a[..., 2] * a[..., 3] + b[..., 2] * b[..., 3] - intersection
+    return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+def note_agreement(reference: NoteTable, candidate: NoteTable, iou_threshold: float = 0.5) -> float:
+    """
+    Fraction of the reference notes that have a candidate note on the same staff line
+    with a bounding box IoU of at least `iou_threshold`.
+    """
+    if len(reference) == 0:
+        return 1.0
+    matched = 0
+    for line_index in np.unique(reference['line_index']):
+        expected = reference['bounds'][reference['line_index'] == line_index]
+        found = candidate['bounds'][candidate['line_index'] == line_index]
+        if len(found):
+            matched += int((_rect_iou(expected, found).max(axis=1) >= iou_threshold).sum())
+    return matched / len(reference)
+
+def bench_engines(image_paths: Optional[List[str]] = None, tile: int = 1, repeat: int = 5,
+                  params: Optional[dict] = None) -> List[dict]:
+    """
+    Compare the 'contours' and 'components' note extraction engines of PParser.
+
+    Staff lines are detected once per page; only note extraction (staff line removal
+    included) is timed.
+
+    Returns:
+        List[dict]: One row per page with the note count of each engine, timings,
+        speedup and the fraction of contour-engine notes matched by the components engine
+    """
+    params = {**DEFAULT_PARSE_PARAMS, **(params or {})}
+    note_kwargs = dict(
+        dilate_iterations=params['note_dilate_iterations'],
+        min_contour_area=params['note_min_contour_area'],
+        pad_size=params['note_pad_size'],
+        max_horizontal_distance=params['max_horizontal_distance'],
+        overlap_threshold=params['overlap_threshold']
+    )
+    parser = PParser()
+    rows = []
+    for image_path in image_paths or default_images():
+        image = cv2.imread(image_path)
+        if image is None:
+            raise FileNotFoundError(f"Could not load image from path: {image_path}")
+        if tile > 1:
+            image = np.tile(image, (tile, tile, 1))
+        parser.load_image(image, filename=os.path.basename(image_path))
+        staff_lines = parser.find_staff_lines(
+            dilate_iterations=params['staff_dilate_iterations'],
+            min_contour_area=params['staff_min_contour_area'],
+            pad_size=params['staff_pad_size']
+        )
+
+        tables = {engine: parser.find_note_table(staff_lines, engine=engine, **note_kwargs)
+                  for engine in ('contours', 'components')}
+        timings = {engine: best_of(lambda: parser.find_note_table(staff_lines, engine=engine, **note_kwargs), repeat)
+                   for engine in ('contours', 'components')}
+        rows.append({
+            'image': os.path.basename(image_path),
+            'staff_lines': len(staff_lines),
+            'contour_notes': len(tables['contours']),
+            'component_notes': len(tables['components']),
+            'contours_ms': timings['contours'] * 1000,
+            'components_ms': timings['components'] * 1000,
+            'speedup': timings['contours'] / timings['components'] if timings['components'] > 0 else float('inf'),
+            'agreement': note_agreement(tables['contours'], tables['components'])
+        })
+    return rows
+
+def bench_protocol(image_path: str = "resources/samples/mary.jpg", boxes: int = 60, repeat: int = 20) -> dict:
+    """
+    Compare pickled ultralytics Results with the binary detection protocol for one image
+    with `boxes` random detections: payload size and encode/decode time.
+    """
+    import pickle
+    import torch
+    from ultralytics.engine.results import Results
+    from sonatabene.protocol import encode_detections, decode_detections
+
+    image = cv2.imread(image_path)
+    if image is None:
+        raise FileNotFoundError(f"Could not load image from path: {image_path}")
+    rng = np.random.default_rng(0)
+    h, w = image.shape[:2]
+    xy = rng.uniform(0, (w - 20, h - 20), size=(boxes, 2))
+    data = np.hstack([xy, xy + 20, rng.uniform(0.25, 1, (boxes, 1)), rng.integers(0, 40, (boxes, 1))])
+    names = {i: f"class_{i}" for i in range(40)}
+    results = [Results(image, path=image_path, names=names, boxes=torch.as_tensor(data, dtype=torch.float32))]
+    detections = [Detections.from_result(result) for result in results]
+
+    pickled = pickle.dumps(results)
+    encoded = encode_detections(detections)
+    return {
+        'pickle_bytes': len(pickled),
+        'protocol_bytes': len(encoded),
+        'pickle_encode_ms': best_of(lambda: pickle.dumps(results), repeat) * 1000,
+        'protocol_encode_ms': best_of(lambda: encode_detections(detections), repeat) * 1000,
+        'pickle_decode_ms': best_of(lambda: pickle.loads(pickled), repeat) * 1000,
+        'protocol_decode_ms': best_of(lambda: decode_detections(encoded), repeat) * 1000,
+    }
+
+def detection_agreement(reference: List[Detections], candidate: List[Detections],
+                        iou_threshold: float = 0.5) -> float:
+    """
+    Fraction of the reference boxes that have a candidate box of the same class in the
+    same image with an IoU of at least `iou_threshold`.
+    """
+    def rects(d):
+        xyxy = np.asarray(d.xyxy, dtype=np.float64).reshape(-1, 4)
+        return np.hstack([xyxy[:, :2], xyxy[:, 2:] - xyxy[:, :2]])
+
+    total = matched = 0
+    for expected, found in zip(reference, candidate):
+        total += len(expected)
+        if not len(expected) or not len(found):
+            continue
+        same_class = np.asarray(expected.cls)[:, None] == np.asarray(found.cls)[None, :]
+        iou = np.where(same_class, _rect_iou(rects(expected), rects(found)), 0)
+        matched += int((iou.max(axis=1) >= iou_threshold).sum())
+    return matched / total if total else 1.0
+
+def bench_backends(image_paths: Optional[List[str]] = None, model_path: str = "models/chopin.pt",
+                   backends: Tuple[str, ...] = ("torch", "onnx", "opencv"), batch_size: int = 8,
+                   repeat: int = 3, imgsz: int = 640) -> List[dict]:
+    """
+    Compare the inference backends on the staff crops of the demo pages.
+
+    For each backend: export and load time, single-crop latency (median over the crops of
+    the best of `repeat` runs), throughput of batched prediction over every crop and the
+    agreement of its detections with the PyTorch ones.
+    """
+    from sonatabene.model import export_model, get_model, predict_batch
+    from sonatabene.transcribe import staff_crops
+
+    image_paths = image_paths or default_images(samples=False)
+    crops = [crop for path in image_paths for crop in staff_crops(path)]
+    if not crops:
+        raise ValueError("No staff lines detected in the benchmark images.")
+
+    rows, reference = [], None
+    for backend in backends:
+        start = time.perf_counter()
+        export_model(model_path, backend, imgsz=imgsz)
+        export_time = time.perf_counter() - start
+        start = time.perf_counter()
+        get_model(model_path, backend=backend, imgsz=imgsz)
+        load_time = time.perf_counter() - start
+
+        run = lambda images: predict_batch(images, model_path=model_path, batch_size=batch_size,
+                                           backend=backend, imgsz=imgsz)
+        detections = [Detections.from_result(result) for result in run(crops)]  # Also warms the backend up
+        latencies = [best_of(lambda: run([crop]), repeat) for crop in crops]
+        batched = best_of(lambda: run(crops), repeat)
+        if reference is None:
+            reference = detections
+
+        rows.append({
+            'backend': backend,
+            'crops': len(crops),
+            'export_s': export_time,
+            'load_s': load_time,
+            'latency_ms': float(np.median(latencies)) * 1000,
+            'throughput_per_s': len(crops) / batched,
+            'agreement': detection_agreement(reference, detections),
+        })
+    return rows
+
+def synthetic_mei(measures: int = 20, seed: int = 0) -> str:
+    """
+    Return a random single-staff MEI document shaped like the dataset labels: a score
+    definition, then measures of beamed and plain notes and rests.
+    """
+    rng = np.random.default_rng(seed)
+    pnames, durations, accids = list("cdefgab"), ['4', '8', '16', '2'], ['s', 'f', 'n']
+
+    def note(index):
+        attributes = [f'xml:id="n{seed}-{index}"', f'pname="{rng.choice(pnames)}"', f'oct="{rng.integers(3, 6)}"',
+                      f'dur="{rng.choice(durations)}"']
+        if rng.random() < 0.1:
+            attributes.append('dots="1"')
+        if rng.random() < 0.15:
+            attributes.append(f'accid="{rng.choice(accids)}"')
+        return f"<note {' '.join(attributes)}/>"
+
+    lines = ['<mei meiversion="3.0.0">', '<music><body><mdiv><score>',
+             '<scoreDef key.sig="1f" meter.count="3" meter.unit="4">',
+             '<staffGrp><staffDef n="1" lines="5" clef.shape="F" clef.line="4"/></staffGrp>',
+             '<keySig sig="1f"/><meterSig count="3" unit="4"/>', '</scoreDef>', '<section><staff n="1"><layer n="1">']
+    index = 0
+    for m in range(measures):
+        lines.append(f'<measure n="{m + 1}">')
+        for _ in range(int(rng.integers(2, 5))):
+            kind = rng.random()
+            if kind < 0.3:
+                beam = [note(index + i) for i in range(int(rng.integers(2, 5)))]
+                index += len(beam)
+                lines.append(f"<beam>{''.join(beam)}</beam>")
+            elif kind < 0.9:
+                lines.append(note(index))
+                index += 1
+            else:
+                lines.append(f'<rest dur="{rng.choice(durations)}"/>')
+        lines.append('</measure>')
+    lines.extend(['</layer></staff></section>', '</score></mdiv></body></music>', '</mei>'])
+    return "\n".join(lines)
+
+def synthetic_mei_zip(zip_path: str, files: int = 2000, measures: int = 20) -> str:
+    """Write a dataset-like zip of `files` synthetic MEI documents under labels/."""
+    from zipfile import ZipFile, ZIP_DEFLATED
+
+    with ZipFile(zip_path, "w", ZIP_DEFLATED) as archive:
+        for i in range(files):
+            archive.writestr(f"labels/{i:06d}.mei", synthetic_mei(measures, seed=i))
+    return zip_path
+
+def bench_mei_memory(zip_path: str, converter_class=None, max_workers: int = 4) -> dict:
+    """
+    Convert every MEI file of a zip to ABC, then drop the converters.
+
+    Reports the time taken, the Python heap peak during the run (tracemalloc, which does
+    not see the lxml trees), the resident memory still held once the converters are
+    dropped and how many converter instances are still alive at that point.
+    """
+    import gc
+    import tracemalloc
+    import weakref
+    from sonatabene.converter.convert_xml import convert_zip, XMLMEIConverter
+    from sonatabene.utils import current_rss
+
+    gc.collect()
+    rss_before = current_rss()
+    tracemalloc.start()
+    start = time.perf_counter()
+    converters = convert_zip(zip_path, max_workers=max_workers, converter_class=converter_class or XMLMEIConverter)
+    for converter in converters:
+        converter.mei_to_abc()
+        converter.treble_clef_transposition()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    references = [weakref.ref(converter) for converter in converters]
+    del converters, converter
+    gc.collect()
+    return {
+        'files': len(references),
+        'seconds': elapsed,
+        'heap_peak_mb': peak / 1024 ** 2,
+        'rss_retained_mb': (current_rss() - rss_before) / 1024 ** 2,
+        'alive_converters': sum(reference() is not None for reference in references),
+    }
+
+def regex_transpose(mapping: Dict[str, str], note: str) -> str:
+    """Reference transposition: builds and applies the alternation regex of the mapping on each call."""
+    sorted_keys = sorted(mapping.keys(), key=len, reverse=True)
+    pattern = '|'.join(re.escape(key) for key in sorted_keys)
+    return re.sub(pattern, lambda m: mapping.get(m.group(0), m.group(0)), note)
+
+def random_note_labels(count: int = 200000, seed: int = 0) -> List[str]:
+    """Return ABC note labels with the attribute distribution of synthetic_mei."""
+    from sonatabene.converter.convert_xml import note_label
+
+    rng = np.random.default_rng(seed)
+    pnames = rng.choice(list("cdefgab"), count)
+    octaves = rng.integers(2, 7, count)
+    durations = rng.choice(['4', '8', '16', '2', '32'], count)
+    dots = rng.random(count) < 0.1
+    accids = rng.choice(['', 's', 'f', 'n'], count, p=[0.85, 0.05, 0.05, 0.05])
+    return [note_label(p, str(o), d, '1' if dot else None, a or None)
+            for p, o, d, dot, a in zip(pnames, octaves, durations, dots, accids)]
+
+def bench_transposition(count: int = 200000, repeat: int = 3, seed: int = 0) -> List[dict]:
+    """
+    Compare the per-note cost of the precompiled transposition tables with the per-call
+    regex construction, for every clef and in both directions, on `count` labels.
+    """
+    from sonatabene.converter.mapping import CLEF_TO_TREBLE
+    from sonatabene.converter.transposition import TO_TREBLE, FROM_TREBLE
+
+    labels = random_note_labels(count, seed)
+    rows = []
+    for clef, mapping in CLEF_TO_TREBLE.items():
+        inverse = {treble: original for original, treble in mapping.items()}
+        for direction, table, reference_mapping in (('to_treble', TO_TREBLE[clef], mapping),
+                                                    ('from_treble', FROM_TREBLE[clef], inverse)):
+            reference = [regex_transpose(reference_mapping, label) for label in labels]
+            transposed = [table.transpose(label) for label in labels]
+            regex_time = best_of(lambda: [regex_transpose(reference_mapping, label) for label in labels], repeat)
+            table_time = best_of(lambda: [table.transpose(label) for label in labels], repeat)
+            cached_time = best_of(lambda: [table.transpose_label(label) for label in labels], repeat)
+            rows.append({
+                'clef': clef,
+                'direction': direction,
+                'notes': count,
+                'regex_us_per_note': regex_time / count * 1e6,
+                'table_us_per_note': table_time / count * 1e6,
+                'cached_us_per_note': cached_time / count * 1e6,
+                'speedup': regex_time / table_time if table_time > 0 else float('inf'),
+                'identical': reference == transposed == [table.transpose_label(label) for label in labels],
+            })
+    return rows
+
+# Stages of bench_pipeline, in pipeline order
+PIPELINE_STAGES = ('load_image', 'find_staff_lines', 'find_notes', 'predict', 'yolo_to_abc', 'abc_conversion',
+                   'abc_to_midi')
+
+# Metrics of a pipeline report where a lower value is a regression (the others must not grow)
+HIGHER_IS_BETTER = ('pages_per_s',)
+
+def run_pipeline(image_path: str, model_path: str = "models/chopin.pt", params: Optional[dict] = None,
+                 timer=None, **predict_kwargs) -> bytes:
+    """
+    Take a page from image to MIDI, recording each of PIPELINE_STAGES in `timer`.
+
+    The 'abc_to_midi' stage covers the MIDI serialization of the score built by the
+    'abc_conversion' stage, which is what abc_to_midi does after calling abc_conversion.
+    """
+    from music21 import midi
+    from sonatabene.converter.converter_abc import abc_conversion
+    from sonatabene.converter.converter_yolo import yolo_to_abc
+    from sonatabene.model import predict_batch
+    from sonatabene.utils import StageTimer
+
+    params = {**DEFAULT_PARSE_PARAMS, **(params or {})}
+    timer = timer or StageTimer()
+    parser = PParser()
+    with timer.stage('load_image'):
+        parser.load_image(image_path)
+    with timer.stage('find_staff_lines'):
+        staff_lines = parser.find_staff_lines(dilate_iterations=params['staff_dilate_iterations'],
+                                              min_contour_area=params['staff_min_contour_area'],
+                                              pad_size=params['staff_pad_size'])
+    if not staff_lines:
+        raise ValueError(f"No staff lines detected in {image_path}")
+    with timer.stage('find_notes'):
+        parser.find_notes(staff_lines, dilate_iterations=params['note_dilate_iterations'],
+                          min_contour_area=params['note_min_contour_area'], pad_size=params['note_pad_size'],
+                          max_horizontal_distance=params['max_horizontal_distance'],
+                          overlap_threshold=params['overlap_threshold'], engine=params['note_engine'])
+    with timer.stage('predict'):
+        crops = [cv2.cvtColor(staff_line.image, cv2.COLOR_GRAY2BGR) for staff_line in staff_lines]
+        predictions = predict_batch(crops, model_path=model_path, **predict_kwargs)
+    with timer.stage('yolo_to_abc'):
+        abc = yolo_to_abc(predictions)
+    with timer.stage('abc_conversion'):
+        score = abc_conversion(abc)
+    with timer.stage('abc_to_midi'):
+        return midi.translate.streamToMidiFile(score).writestr()
+
+def pipeline_report(samples: List[Dict[str, float]], elapsed: float, peak_rss: int) -> dict:
+    """
+    Summarise the stage durations (in seconds) of successful pipeline runs, `elapsed`
+    being the total wall-clock time of those runs.
+
+    Returns:
+        Dict with the p50/p95 of every stage and of the whole pipeline in milliseconds,
+        the pages per second over `elapsed` and the peak RSS in MB (stage metrics are
+        None without samples)
+    """
+    report = {}
+    for stage in PIPELINE_STAGES + ('end_to_end',):
+        values = [sample[stage] if stage != 'end_to_end' else sum(sample.values()) for sample in samples]
+        values = [value * 1000 for value in values]
+        report[f'{stage}_p50_ms'] = float(np.percentile(values, 50)) if values else None
+        report[f'{stage}_p95_ms'] = float(np.percentile(values, 95)) if values else None
+    report['pages_per_s'] = len(samples) / elapsed if elapsed > 0 else 0.0
+    report['peak_rss_mb'] = peak_rss / 1024 ** 2
+    return report
+
+def bench_pipeline(image_paths: Optional[List[str]] = None, model_path: str = "models/chopin.pt",
+                   repeat: int = 3, warmup: int = 1, params: Optional[dict] = None, **predict_kwargs) -> dict:
+    """
+    Run the image to MIDI pipeline over the demo and sample pages and time every stage.
+
+    Each page goes through `warmup` untimed runs (model loading, music21 import and
+    caches), then `repeat` timed ones. Pages the pipeline fails on are reported with
+    their error and left out of the statistics.
+
+    Returns:
+        JSON-serialisable dict with the settings, the metrics of pipeline_report and
+        the failed pages
+    """
+    import platform
+    import resource
+    from sonatabene.utils import StageTimer
+
+    image_paths = image_paths or default_images()
+    if not image_paths:
+        raise ValueError("No images to benchmark.")
+
+    failures = {}
+    for path in image_paths:
+        for _ in range(warmup):
+            try:
+                run_pipeline(path, model_path, params, **predict_kwargs)
+            except Exception as e:
+                failures[path] = f"{type(e).__name__}: {str(e)}"
+                break
+
+    # Stage durations and wall-clock time of the timed runs of each page
+    runs: Dict[str, List[Tuple[Dict[str, float], float]]] = {path: [] for path in image_paths}
+    for _ in range(max(repeat, 1)):
+        for path in image_paths:
+            if path in failures:
+                continue
+            timer = StageTimer()
+            start = time.perf_counter()
+            try:
+                run_pipeline(path, model_path, params, timer=timer, **predict_kwargs)
+            except Exception as e:
+                failures[path] = f"{type(e).__name__}: {str(e)}"
+                continue
+            runs[path].append((timer.as_dict(), time.perf_counter() - start))
+
+    # A page that failed in any round is dropped altogether, earlier successful runs included
+    kept = [run for path, page_runs in runs.items() if path not in failures for run in page_runs]
+    samples = [durations for durations, _ in kept]
+    elapsed = sum(seconds for _, seconds in kept)
+
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if platform.system() == 'Darwin' else 1024)
+    return {
+        'settings': {'images': list(image_paths), 'model_path': model_path, 'repeat': repeat, 'warmup': warmup,
+                     'runs': len(samples)},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count()},
+        'metrics': pipeline_report(samples, elapsed, peak_rss),
+        'failures': failures,
+    }
+
+def compare_to_baseline(metrics: Dict[str, float], baseline: Dict[str, float], threshold: float = 0.1) -> List[dict]:
+    """
+    Compare pipeline metrics with a baseline report's metrics.
+
+    A metric regresses when it is worse than the baseline by more than `threshold`
+    (relative): slower stages, fewer pages per second or a higher peak RSS. Metrics
+    missing from either side are skipped.
+    """
+    rows = []
+    for name, reference in baseline.items():
+        current = metrics.get(name)
+        if current is None or not reference:
+            continue
+        change = (current - reference) / reference
+        worse = -change if name in HIGHER_IS_BETTER else change
+        rows.append({'metric': name, 'baseline': reference, 'current': current, 'change': change,
+                     'regression': bool(worse > threshold)})
+    return rows
@@ -0,0 +1,301 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional
+import loguru
+import numpy as np
+from sonatabene.scoretyping import StaffLine, NoteTable, Detections
+
+DEFAULT_CACHE_DIR = os.environ.get("SNB_CACHE_DIR", os.path.join("data", "cache"))
+
+def hash_pixels(image: np.ndarray) -> str:
+    """Return a digest of the decoded pixels of an image, including its shape and dtype."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{image.shape}|{image.dtype}".encode())
+    digest.update(np.ascontiguousarray(image).data)
+    return digest.hexdigest()
+
+def hash_params(params: dict) -> str:
+    """Return a digest of a parameter dict, independent of key order."""
+    return hashlib.blake2b(json.dumps(params, sort_keys=True, default=str).encode(), digest_size=8).hexdigest()
+
+@lru_cache(maxsize=32)
+def _hash_file(path: str, mtime: float, size: int) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def hash_file(path: str) -> str:
+    """Return a digest of a file's content, recomputed only when its mtime or size changes."""
+    stat = os.stat(path)
+    return _hash_file(os.path.abspath(path), stat.st_mtime, stat.st_size)
+
+class DiskCache:
+    """
+    Directory of .npz entries bounded in total size, evicted in least recently used order.
+
+    Each entry is one file named after its key. Reads refresh the file's mtime, which is
+    what the eviction order is based on, so the cache survives restarts and can be shared
+    by several processes.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 256 * 1024 ** 2):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.npz")
+
+    def load(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return the arrays stored under key, or None on a miss."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as entry:
+                arrays = {name: entry[name] for name in entry.files}
+            os.utime(path)
+        except (OSError, ValueError) as e:
+            if os.path.exists(path):
+                loguru.logger.warning(f"Dropping unreadable cache entry {path}: {str(e)}")
+                self._remove(path)
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return arrays
+
+    def store(self, key: str, **arrays: np.ndarray) -> None:
+        """Write arrays under key, then evict the oldest entries above max_bytes."""
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove the least recently used entries until the cache fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def size(self) -> int:
+        """Total size in bytes of the entries on disk."""
+        return sum(entry.stat().st_size for entry in os.scandir(self.cache_dir) if entry.name.endswith('.npz'))
+
+    def clear(self) -> None:
+        """Remove every entry and reset the counters."""
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith('.npz'):
+                self._remove(entry.path)
+        self.hits = self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {'hits': self.hits, 'misses': self.misses, 'bytes': self.size()}
+
+class ParseCache(DiskCache):
+    """
+    On-disk cache of PParser results keyed by the decoded pixels and the detection parameters.
+
+    Staff and note geometry is stored as flat int32 arrays: a NoteTable for the notes and
+    concatenated contour points with per-contour lengths. Pixels are never stored; cached
+    staff lines and notes are attached to the page buffer of the parser on load.
+    """
+
+    # Bump when the parser or the stored format changes, so that older entries are no longer hit
+    VERSION = 1
+
+    def __init__(self, cache_dir: str = os.path.join(DEFAULT_CACHE_DIR, "parse"), max_bytes: int = 256 * 1024 ** 2):
+        super().__init__(cache_dir, max_bytes=max_bytes)
+
+    @classmethod
+    def key(cls, image: np.ndarray, params: dict) -> str:
+        """Cache key of a page: digest of its pixels, of the parse parameters and of the cache version."""
+        return f"{hash_pixels(image)}-{hash_params({**params, '__version__': cls.VERSION})}"
+
+    def get(self, key: str, filename: Optional[str] = None, page: Optional[np.ndarray] = None) -> Optional[List[StaffLine]]:
+        """
+        Return the cached staff lines of a page, or None on a miss.
+
+        Args:
+            key: Key returned by ParseCache.key
+            filename: Filename set on the restored staff lines
+            page: Page buffer the restored staff lines and notes point to
+        """
+        arrays = self.load(key)
+        if arrays is None:
+            return None
+
+        staff_contours = np.split(arrays['staff_points'], np.cumsum(arrays['staff_lengths'])[:-1])
+        note_contours = np.split(arrays['note_points'], np.cumsum(arrays['note_lengths'])[:-1])
+        table = NoteTable(data=arrays['notes'], labels=[str(label) for label in arrays['labels']], page=page)
+
+        staff_lines = [
+            StaffLine(index=index, filename=filename, contour=contour.reshape(-1, 1, 2),
+                      bounds=tuple(int(v) for v in bounds), notes=[], page=page)
+            for index, (contour, bounds) in enumerate(zip(staff_contours, arrays['staff_bounds']))
+        ] if len(arrays['staff_bounds']) else []
+
+        for note, contour in zip(table.to_notes(), note_contours):
+            note.contour = contour.reshape(-1, 1, 2)
+            staff_lines[note.line_index].notes.append(note)
+        return staff_lines
+
+    def put(self, key: str, staff_lines: List[StaffLine]) -> None:
+        """Store the geometry of the staff lines of a page under key."""
+        notes = [note for staff_line in staff_lines for note in staff_line.notes]
+        table = NoteTable.from_notes(notes)
+
+        def flatten(contours):
+            lengths = np.array([len(c) for c in contours], dtype=np.int32)
+            points = np.concatenate([c.reshape(-1, 2) for c in contours]).astype(np.int32) if contours \
+                else np.zeros((0, 2), dtype=np.int32)
+            return points, lengths
+
+        staff_points, staff_lengths = flatten([staff_line.contour for staff_line in staff_lines])
+        note_points, note_lengths = flatten([note.contour for note in notes])
+        self.store(
+            key,
+            staff_bounds=np.array([staff_line.bounds for staff_line in staff_lines], dtype=np.int32).reshape(-1, 4),
+            staff_points=staff_points,
+            staff_lengths=staff_lengths,
+            notes=table.data,
+            labels=np.array(table.labels, dtype=str),
+            note_points=note_points,
+            note_lengths=note_lengths
+        )
+
+# Prediction arguments that change how a prediction runs but not its result
+# (half is not one of them: FP16 inference gives slightly different boxes and scores)
+NON_RESULT_KWARGS = {'verbose', 'save', 'show', 'stream', 'device', 'batch', 'project', 'name', 'exist_ok'}
+
+class PredictionCache:
+    """
+    Two-tier cache of YOLO detections per image crop.
+
+    Entries are keyed by the crop pixels, the model weights and the prediction arguments
+    (conf, iou, imgsz and any other argument that changes the result). The memory tier
+    is an LRU of at most `max_entries` Detections; the optional disk tier is a DiskCache
+    storing the (N, 6) box arrays, bounded by `max_bytes`.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = os.path.join(DEFAULT_CACHE_DIR, "predictions"),
+                 max_entries: int = 1024, max_bytes: int = 64 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.disk = DiskCache(cache_dir, max_bytes=max_bytes) if cache_dir else None
+        self.memory_hits = 0
+        self._misses = 0
+        self._memory: "OrderedDict[str, Detections]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(image: np.ndarray, model_path: str, conf: Optional[float] = None, iou: Optional[float] = None,
+            imgsz: Optional[int] = None, **kwargs) -> str:
+        """Cache key of a prediction: digest of the crop, of the weights and of the arguments."""
+        params = {'conf': conf, 'iou': iou, 'imgsz': imgsz,
+                  **{k: v for k, v in kwargs.items() if k not in NON_RESULT_KWARGS}}
+        if not params.get('half'):
+            # half=False is the default, it shares the entries of calls that do not pass it
+            params.pop('half', None)
+        weights = hash_file(model_path) if os.path.isfile(model_path) else str(model_path)
+        return f"{hash_pixels(image)}-{hash_params({'weights': weights, **params})}"
+
+    def get(self, key: str) -> Optional[Detections]:
+        """Return the cached detections for key from memory, then disk, or None on a miss."""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return self._memory[key]
+
+        if self.disk is None:
+            self._count_miss()
+            return None
+        arrays = self.disk.load(key)
+        if arrays is None:
+            return None
+
+        detections = Detections(
+            data=arrays['data'],
+            names=dict(zip((int(i) for i in arrays['name_ids']), (str(n) for n in arrays['names']))),
+            orig_shape=tuple(int(v) for v in arrays['orig_shape'])
+        )
+        self._remember(key, detections)
+        return detections
+
+    def put(self, key: str, detections: Detections) -> None:
+        """Store detections in both tiers."""
+        self._remember(key, detections)
+        if self.disk is not None:
+            self.disk.store(
+                key,
+                data=np.asarray(detections.data, dtype=np.float32),
+                name_ids=np.array(list(detections.names.keys()), dtype=np.int32),
+                names=np.array(list(detections.names.values()), dtype=str),
+                orig_shape=np.array(detections.orig_shape, dtype=np.int32)
+            )
+
+    def _remember(self, key: str, detections: Detections) -> None:
+        with self._lock:
+            self._memory[key] = detections
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _count_miss(self) -> None:
+        with self._lock:
+            self._misses += 1
+
+    @property
+    def disk_hits(self) -> int:
+        return self.disk.hits if self.disk is not None else 0
+
+    @property
+    def misses(self) -> int:
+        return self.disk.misses if self.disk is not None else self._misses
+
+    def clear(self) -> None:
+        """Drop both tiers and reset the counters."""
+        with self._lock:
+            self._memory.clear()
+            self.memory_hits = 0
+            self._misses = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'memory_hits': self.memory_hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'memory_entries': len(self._memory),
+            'disk_bytes': self.disk.size() if self.disk is not None else 0
+        }
@@ -40,11 +40,99 @@ def predict(image_path: str, model_path: str, config_path: str):
         training_config = yaml.safe_load(f)
     
     predict(
-        image_path=image_path,
+        image=image_path,
         model_path=model_path,
         **training_config
     )
 
+@model.command(name='export', help='Export model weights for an inference backend')
+@click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the model weights')
+@click.option('--backend', '-b', type=click.Choice(['onnx', 'openvino', 'opencv']), default='onnx', help='Inference backend')
+@click.option('--imgsz', default=640, type=int, help='Input size of the static OpenCV DNN export')
+@click.option('--half', is_flag=True, help='Export FP16 weights')
+def export(model_path: str, backend: str, imgsz: int, half: bool):
+    """Export the weights once; predictions with the same backend reuse the export."""
+    from sonatabene.model import export_model
+
+    click.echo(export_model(model_path, backend, imgsz=imgsz, half=half, force=True))
+
+@model.command(name='quantize', help='Produce an INT8 variant of a trained model')
+@click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the trained model weights')
+@click.option('--zip-path', '-z', default='data/dataset.zip', help='Dataset zip the calibration images are drawn from')
+@click.option('--calibration-size', '-n', default=300, type=int, help='Number of calibration images')
+@click.option('--imgsz', default=640, type=int, help='Input image size')
+def quantize(model_path: str, zip_path: str, calibration_size: int, imgsz: int):
+    """Quantize the weights to INT8 with OpenVINO post-training quantization."""
+    from sonatabene.model import quantize
+
+    click.echo(quantize(model_path, zip_path=zip_path, calibration_size=calibration_size, imgsz=imgsz))
+
+@model.command(name='evaluate', help='Report mAP and per-image latency of FP32 and INT8 variants')
+@click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the model weights')
+@click.option('--data-path', '-d', default='data/dataset.yaml', help='Path to dataset configuration file')
+@click.option('--backend', '-b', multiple=True, type=click.Choice(['torch', 'onnx', 'openvino', 'opencv', 'int8']),
+              help='Variants to compare (default: torch and int8)')
+@click.option('--imgsz', default=640, type=int, help='Input image size')
+@click.option('--split', default='val', help='Dataset split to evaluate on')
+def evaluate(model_path: str, data_path: str, backend: tuple, imgsz: int, split: str):
+    """Validate each variant on the same split and print the results side by side."""
+    from sonatabene.model import evaluate
+    import pandas as pd
+
+    rows = evaluate(model_path, data_path, backends=backend or ('torch', 'int8'), imgsz=imgsz, split=split)
+    click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.3f'))
+
+@snb.command(name='parse', help='Parse every score of a directory in parallel')
+@click.option('--input-dir', '-i', required=True, help='Directory containing images, multi-page TIFFs or PDFs')
+@click.option('--output-path', '-o', default='data/output/parsed.jsonl', help='Path of the JSON lines file to write')
+@click.option('--workers', '-w', type=int, default=None, help='Number of worker processes (default: number of cores)')
+@click.option('--dpi', default=200, type=int, help='Rendering resolution for PDF pages')
+@click.option('--engine', type=click.Choice(['contours', 'components']), default='contours', help='Note extraction engine')
+@click.option('--cache-dir', default=None, help='Parse cache directory (e.g. data/cache/parse), disabled by default')
+def parse(input_dir: str, output_path: str, workers: int, dpi: int, engine: str, cache_dir: str):
+    """Run staff and note detection over a corpus with a process pool."""
+    from sonatabene.batch import parse_directory
+    import loguru
+
+    summary = parse_directory(input_dir, output_path, max_workers=workers, dpi=dpi, params={'note_engine': engine},
+                              cache_dir=cache_dir)
+    loguru.logger.info(f"Parsed {summary['pages']} pages in {summary['elapsed']:.1f}s "
+                       f"({summary['pages_per_second']:.2f} pages/s)")
+    for key, value in summary.items():
+        if key.endswith('_mean'):
+            loguru.logger.info(f"  {key[:-5]}: {value * 1000:.1f} ms/page")
+
+@snb.command(name='mei', help='Convert the MEI labels of a dataset zip to ABC in parallel')
+@click.option('--zip-path', '-z', default='data/dataset.zip', help='Dataset zip with labels/*.mei files')
+@click.option('--output-path', '-o', default='data/output/labels.jsonl', help='Path of the JSON lines file to write')
+@click.option('--workers', '-w', type=int, default=None, help='Number of worker processes (default: number of cores)')
+@click.option('--number-of-files', '-n', default=-1, type=int, help='Number of files to convert (-1 for all)')
+@click.option('--converter', type=click.Choice(['xml', 'regex', 'iterparse']), default='xml', help='MEI converter implementation')
+def mei(zip_path: str, output_path: str, workers: int, number_of_files: int, converter: str):
+    """Stream the conversion results to a JSON lines file, one line per MEI file."""
+    from sonatabene.converter.convert_xml import iter_convert_zip, XMLMEIConverter, RegexMEIConverter, IterparseMEIConverter
+    from tqdm import tqdm
+    import json
+    import loguru
+    import os
+    import time
+
+    converter_class = {'xml': XMLMEIConverter, 'regex': RegexMEIConverter, 'iterparse': IterparseMEIConverter}[converter]
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    files = failed = 0
+    start = time.perf_counter()
+    with open(output_path, 'w') as output:
+        results = iter_convert_zip(zip_path, number_of_files=number_of_files, max_workers=workers,
+                                   converter_class=converter_class)
+        for result in tqdm(results, desc="Converting", unit="file"):
+            output.write(json.dumps(result.to_dict()) + "\n")
+            files += 1
+            failed += result.error is not None
+    elapsed = time.perf_counter() - start
+    loguru.logger.info(f"Converted {files - failed}/{files} files in {elapsed:.1f}s ({files / elapsed:.0f} files/s)")
+
 @snb.group(name='music', help='Set of commands to convert into music formats')
 def music():
     pass
@@ -52,16 +140,21 @@ def music():
 @music.command(name='play', help='Play a MIDI file from YOLO predictions based on image')
 @click.option('--image-path', '-i', required=True, help='Path to the image file for YOLO predictions')
 @click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the trained YOLO model')
+@click.option('--config-path', '-c', default='configs/predict_config.yaml', help='Path to prediction configuration YAML file')
 @click.option('--instrument', '-inst', default='Piano', help='Instrument to use for the MIDI output (e.g., PanFlute, Piano, Violin)')
 @click.option('--tempo', '-t', default=120, type=int, help='Tempo for the MIDI output in beats per minute (default: 120)')
 @click.option('--dynamics', '-d', type=str, help='Dynamic markings in JSON format (e.g., {"p": 40, "f": 100})')
 @click.option('--articulation', '-a', type=str, help='Articulation settings in JSON format (e.g., {"staccato": 0.5, "tenuto": 1.0})')
 @click.option('--output-format', '-f', type=click.Choice(['midi', 'musicxml', 'pdf', 'wav', 'mp3']), default='midi', help='Output format')
 @click.option('--output-file', '-o', help='Path to save the output file')
-def play_midi_from_yolo(image_path: str, model_path: str, instrument: str, tempo: int, 
-                       dynamics: str, articulation: str, output_format: str, output_file: str):
+@click.option('--cache/--no-cache', default=False,
+              help='Reuse the predictions of staff crops seen before, stored on disk under '
+                   '$SNB_CACHE_DIR/predictions (default: data/cache/predictions in the current directory)')
+def play_midi_from_yolo(image_path: str, model_path: str, config_path: str, instrument: str, tempo: int, 
+                       dynamics: str, articulation: str, output_format: str, output_file: str, cache: bool):
     """Generate MIDI from YOLO predictions and play it."""
-    from sonatabene.model import predict
+    from sonatabene.model import predict_batch, registry
+    from sonatabene.cache import PredictionCache
     from sonatabene.converter.converter_abc import abc_to_midi, abc_to_musicxml, abc_to_pdf, abc_to_audio
     from sonatabene.converter.converter_yolo import yolo_to_abc
     import json
@@ -77,14 +170,23 @@ def play_midi_from_yolo(image_path: str, model_path: str, instrument: str, tempo
     parser.load_image(image_path)
     stafflines = parser.find_staff_lines(min_contour_area=10000)
 
-    staffs = [cv2.cvtColor(staffline.image, cv2.COLOR_RGB2BGR) for staffline in stafflines]
-    
-    predictions = []
-    loguru.logger.info("Predicting Notes...")
-    for i, staff in enumerate(staffs):
-        result = predict(image=staff, model_path=model_path)[0]
-        loguru.logger.info(f"Predicted {i}/{len(staffs)}")
-        predictions.append(result)
+    staffs = [cv2.cvtColor(staffline.image, cv2.COLOR_GRAY2BGR) if staffline.image.ndim == 2 else staffline.image
+              for staffline in stafflines]
+
+    with open(config_path, 'r') as f:
+        predict_config = yaml.safe_load(f)
+    batch_size = predict_config.pop('batch_size', 8)
+
+    loguru.logger.info(f"Predicting Notes on {len(staffs)} staves (batch size {batch_size})...")
+    prediction_cache = PredictionCache() if cache else None
+    predictions = predict_batch(staffs, model_path=model_path, batch_size=batch_size,
+                                cache=prediction_cache, **predict_config)
+    if prediction_cache is not None:
+        loguru.logger.info(f"Prediction cache: {prediction_cache.stats()}")
+
+    for stats in registry.stats().values():
+        loguru.logger.info(f"Model {stats.model_path} loaded in {stats.load_time:.2f}s "
+                           f"({stats.memory_bytes / 1e6:.1f} MB weights, {stats.hits} reuses)")
     
     loguru.logger.info("Converting results to ABC...")
     abc = yolo_to_abc(predictions)
@@ -109,4 +211,142 @@ def play_midi_from_yolo(image_path: str, model_path: str, instrument: str, tempo
         abc_to_pdf(abc, output_file)
     elif output_format in ['wav', 'mp3']:
         loguru.logger.info("Creating Audio...")
-        abc_to_audio(abc, output_file, format=output_format)
\ No newline at end of file
+        abc_to_audio(abc, output_file, format=output_format)
+
+@snb.group(name='bench', help='Set of commands to benchmark the processing stages')
+def bench():
+    pass
+
+@bench.command(name='grouping', help='Benchmark note component grouping on dense pages')
+@click.option('--image-path', '-i', multiple=True, help='Image to benchmark (default: resources/demo and resources/samples)')
+@click.option('--tile', default=2, type=int, help='Tile each page NxN times to make it denser')
+@click.option('--repeat', '-r', default=5, type=int, help='Number of timed runs per page (best is kept)')
+def bench_grouping(image_path: tuple, tile: int, repeat: int):
+    """Compare the sweep-line grouping with the pairwise reference implementation."""
+    from sonatabene.benchmark import bench_grouping
+    import pandas as pd
+
+    rows = bench_grouping(list(image_path) or None, tile=tile, repeat=repeat)
+    click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.2f'))
+
+
+@bench.command(name='engines', help='Benchmark the contour and connected-components note engines')
+@click.option('--image-path', '-i', multiple=True, help='Image to benchmark (default: resources/demo and resources/samples)')
+@click.option('--tile', default=1, type=int, help='Tile each page NxN times to make it denser')
+@click.option('--repeat', '-r', default=5, type=int, help='Number of timed runs per page (best is kept)')
+def bench_engines(image_path: tuple, tile: int, repeat: int):
+    """Compare the speed and the output of the two note extraction engines."""
+    from sonatabene.benchmark import bench_engines
+    import pandas as pd
+
+    rows = bench_engines(list(image_path) or None, tile=tile, repeat=repeat)
+    click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.2f'))
+
+@bench.command(name='backends', help='Compare PyTorch with the exported inference backends')
+@click.option('--image-path', '-i', multiple=True, help='Page to take staff crops from (default: resources/demo)')
+@click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the model weights')
+@click.option('--backend', '-b', multiple=True, type=click.Choice(['torch', 'onnx', 'openvino', 'opencv', 'int8']),
+              help='Backends to compare (default: torch, onnx and opencv)')
+@click.option('--batch-size', default=8, type=int, help='Number of crops per forward pass')
+@click.option('--repeat', '-r', default=3, type=int, help='Number of timed runs (best is kept)')
+def bench_backends(image_path: tuple, model_path: str, backend: tuple, batch_size: int, repeat: int):
+    """Report latency, throughput and agreement with PyTorch of each backend."""
+    from sonatabene.benchmark import bench_backends
+    import pandas as pd
+
+    rows = bench_backends(list(image_path) or None, model_path=model_path, backends=backend or ('torch', 'onnx', 'opencv'),
+                          batch_size=batch_size, repeat=repeat)
+    click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.2f'))
+
+@bench.command(name='transposition', help='Compare the clef transposition tables with per-call regexes')
+@click.option('--count', '-n', default=200000, type=int, help='Number of note labels to transpose')
+@click.option('--repeat', '-r', default=3, type=int, help='Number of timed runs (best is kept)')
+def bench_transposition(count: int, repeat: int):
+    """Report the per-note cost of both implementations for every clef and direction."""
+    from sonatabene.benchmark import bench_transposition
+    import pandas as pd
+
+    rows = bench_transposition(count, repeat=repeat)
+    click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.3f'))
+
+@bench.command(name='mei', help='Benchmark the MEI converters on a dataset zip or a folder of MEI files')
+@click.option('--path', '-p', default='data/dataset.zip', help='Dataset zip with labels/*.mei files, or folder of .mei files')
+@click.option('--output-path', '-o', default='data/output/bench_mei.json', help='Path of the JSON report to write')
+@click.option('--converter', '-c', multiple=True, type=click.Choice(['xml', 'regex', 'iterparse']),
+              help='Converter to benchmark, can be repeated (default: all)')
+@click.option('--mode', multiple=True, type=click.Choice(['serial', 'thread', 'process']),
+              help='Execution mode to measure the throughput of, can be repeated (default: all)')
+@click.option('--number-of-files', '-n', default=-1, type=int, help='Number of files to benchmark (-1 for all)')
+@click.option('--repeat', '-r', default=5, type=int, help='Number of timed conversions per file')
+@click.option('--warmup', default=1, type=int, help='Number of untimed conversions per file before timing')
+@click.option('--rounds', default=3, type=int, help='Number of timed passes per throughput measurement (best is kept)')
+@click.option('--workers', '-w', type=int, default=None, help='Number of threads or processes (default: number of cores)')
+def bench_mei(path: str, output_path: str, converter: tuple, mode: tuple, number_of_files: int, repeat: int,
+              warmup: int, rounds: int, workers: int):
+    """Report per-file latency, peak memory and throughput of each converter, and save them as JSON."""
+    from sonatabene.converter.convert_xml import benchmark_converters, XMLMEIConverter, RegexMEIConverter, IterparseMEIConverter
+    import json
+    import loguru
+    import os
+    import pandas as pd
+
+    classes = {'xml': XMLMEIConverter, 'regex': RegexMEIConverter, 'iterparse': IterparseMEIConverter}
+    report = benchmark_converters(path, [classes[name] for name in converter] or None, number_of_files=number_of_files,
+                                  repeat=repeat, warmup=warmup, modes=mode or ('serial', 'thread', 'process'),
+                                  max_workers=workers, rounds=rounds)
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as output:
+        json.dump(report, output, indent=2)
+    click.echo(pd.DataFrame(report['converters']).to_string(index=False, float_format='%.3f'))
+    loguru.logger.info(f"Report written to {output_path}")
+
+@bench.command(name='pipeline', help='Benchmark the image to MIDI pipeline stage by stage')
+@click.option('--image-path', '-i', multiple=True, help='Image to benchmark (default: resources/demo and resources/samples)')
+@click.option('--model-path', '-m', default='models/chopin.pt', help='Path to the model weights')
+@click.option('--backend', '-b', default='torch', type=click.Choice(['torch', 'onnx', 'openvino', 'opencv', 'int8']),
+              help='Inference backend')
+@click.option('--repeat', '-r', default=3, type=int, help='Number of timed runs per page')
+@click.option('--warmup', default=1, type=int, help='Number of untimed runs per page before timing')
+@click.option('--output-path', '-o', default='data/output/bench_pipeline.json', help='Path of the JSON report to write')
+@click.option('--baseline', default=None, help='Baseline JSON report to compare with')
+@click.option('--threshold', default=0.1, type=float, help='Relative slowdown above which a metric is a regression')
+def bench_pipeline(image_path: tuple, model_path: str, backend: str, repeat: int, warmup: int, output_path: str,
+                   baseline: str, threshold: float):
+    """Report p50/p95 per stage, pages/s and peak RSS, and fail on regressions against a baseline."""
+    from sonatabene.benchmark import bench_pipeline, compare_to_baseline
+    import json
+    import loguru
+    import os
+    import pandas as pd
+
+    report = bench_pipeline(list(image_path) or None, model_path=model_path, repeat=repeat, warmup=warmup,
+                            backend=backend)
+    if os.path.dirname(output_path):
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+    with open(output_path, 'w') as output:
+        json.dump(report, output, indent=2)
+    for path, error in report['failures'].items():
+        loguru.logger.warning(f"{path}: {error}")
+    click.echo(pd.Series(report['metrics']).to_string(float_format='%.3f'))
+    loguru.logger.info(f"Report written to {output_path}")
+
+    if baseline:
+        with open(baseline) as f:
+            rows = compare_to_baseline(report['metrics'], json.load(f)['metrics'], threshold=threshold)
+        click.echo(pd.DataFrame(rows).to_string(index=False, float_format='%.3f'))
+        regressions = [row['metric'] for row in rows if row['regression']]
+        if regressions:
+            raise click.ClickException(f"{len(regressions)} metric(s) regressed by more than "
+                                       f"{threshold:.0%}: {', '.join(regressions)}")
+
+@bench.command(name='protocol', help='Compare pickled Results with the binary detection protocol')
+@click.option('--image-path', '-i', default='resources/samples/mary.jpg', help='Image the detections belong to')
+@click.option('--boxes', '-n', default=60, type=int, help='Number of detections in the response')
+@click.option('--repeat', '-r', default=20, type=int, help='Number of timed runs (best is kept)')
+def bench_protocol(image_path: str, boxes: int, repeat: int):
+    """Report payload sizes and encode/decode times of both response formats."""
+    from sonatabene.benchmark import bench_protocol
+
+    for key, value in bench_protocol(image_path, boxes=boxes, repeat=repeat).items():
+        click.echo(f"{key:>20}: {value:,.3f}" if isinstance(value, float) else f"{key:>20}: {value:,}")
@@ -0,0 +1,228 @@
+import asyncio
+import json
+import os
+import random
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+import cv2
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from sonatabene.protocol import decode_detections, detections_from_json, MEDIA_TYPE
+from sonatabene.scoretyping import Detections
+
+ImageInput = Union[str, Path, bytes, np.ndarray]
+
+# Statuses worth retrying: the server rejected the request before doing any work
+# (503 backpressure). Predictions are POSTs, so read errors and proxy failures, after
+# which the server may have done the work, are not retried.
+RETRY_STATUSES = (503,)
+
+def encode_upload(image: ImageInput, name: Optional[str] = None) -> Tuple[str, bytes, str]:
+    """
+    Return the (filename, content, content type) multipart tuple of an image.
+
+    Files and bytes are sent as they are, only decoded arrays are encoded (to PNG).
+    """
+    if isinstance(image, (str, Path)):
+        with open(image, 'rb') as f:
+            return name or os.path.basename(str(image)), f.read(), 'application/octet-stream'
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        return name or 'image', bytes(image), 'application/octet-stream'
+    ok, buffer = cv2.imencode(".png", image)
+    if not ok:
+        raise ValueError("Could not encode the image.")
+    return name or 'image.png', buffer.tobytes(), 'image/png'
+
+def parse_server_timing(header: str) -> Dict[str, float]:
+    """Parse a Server-Timing header into {stage: duration in milliseconds}."""
+    timings = {}
+    for metric in filter(None, (part.strip() for part in header.split(','))):
+        name, *params = (p.strip() for p in metric.split(';'))
+        for param in params:
+            if param.startswith('dur='):
+                timings[name] = float(param[4:])
+    return timings
+
+def _decode_response(content: bytes, content_type: str, text: str) -> List[Detections]:
+    if not content_type.startswith(MEDIA_TYPE):
+        raise Exception(f"API returned an unexpected response: {text[:200]}")
+    return decode_detections(content)
+
+class PredictionClient:
+    """
+    Synchronous client of the prediction API (fast_app.py) over a pooled HTTP session.
+
+    Connections are kept alive and reused across calls and threads. Connection errors
+    and 503 responses are retried with exponential backoff, honouring Retry-After, so
+    bulk jobs ride out the API's backpressure.
+
+    Args:
+        base_url: Root URL of the API
+        timeout: Connect and read timeouts in seconds
+        retries: Number of retries per request
+        backoff: Base of the exponential backoff between retries, in seconds
+        max_in_flight: Size of the connection pool and maximum number of concurrent
+                       requests of predict_many
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", timeout: Tuple[float, float] = (3.05, 60.0),
+                 retries: int = 3, backoff: float = 0.2, max_in_flight: int = 8):
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.max_in_flight = max_in_flight
+        retry = Retry(total=retries, connect=retries, read=0, other=0, status=retries, backoff_factor=backoff,
+                      status_forcelist=RETRY_STATUSES, allowed_methods=None, respect_retry_after_header=True,
+                      raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def _post(self, path: str, files, **kwargs) -> requests.Response:
+        try:
+            response = self.session.post(f"{self.base_url}{path}", files=files, timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            raise Exception(f"API request failed: {str(e)}")
+
+    def predict(self, image: ImageInput) -> List[Detections]:
+        """Predict on one image (path, encoded bytes or decoded array)."""
+        response = self._post("/predict/", files={'file': encode_upload(image)})
+        return _decode_response(response.content, response.headers.get('content-type', ''), response.text)
+
+    def predict_many(self, images: Sequence[ImageInput]) -> Iterator[List[Detections]]:
+        """Predict on many images with up to max_in_flight concurrent requests, in input order."""
+        with ThreadPoolExecutor(max_workers=self.max_in_flight) as executor:
+            yield from executor.map(self.predict, images)
+
+    def predict_batch(self, images: Sequence[ImageInput], dpi: int = 200) -> Iterator[Tuple[int, str, Detections]]:
+        """
+        Upload images or multi-page documents to /predict/batch in one request and yield
+        (page index, page name, detections) as the server streams them, in completion order.
+        """
+        files = [('files', encode_upload(image, name=f"image{i}.png" if isinstance(image, np.ndarray) else None))
+                 for i, image in enumerate(images)]
+        with self._post("/predict/batch", files=files, params={'dpi': dpi}, stream=True) as response:
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                item = json.loads(line)
+                if item['status'] != 'ok':
+                    raise Exception(f"Prediction failed for {item['file']} {item['page'] or ''}: {item['error']}")
+                yield item['index'], item['page'], detections_from_json(item['detections'])
+
+    def transcribe(self, image: ImageInput, output_format: str = 'midi', instrument: str = 'piano',
+                   tempo_bpm: int = 120) -> Tuple[bytes, Dict[str, float]]:
+        """Run the whole pipeline server-side; return the score and its stage timings (ms)."""
+        response = self._post("/transcribe", files={'file': encode_upload(image)},
+                              params={'format': output_format, 'instrument': instrument, 'tempo': tempo_bpm})
+        return response.content, parse_server_timing(response.headers.get('server-timing', ''))
+
+    def health(self) -> dict:
+        response = self.session.get(f"{self.base_url}/health", timeout=self.timeout)
+        return response.json()
+
+    def close(self) -> None:
+        self.session.close()
+
+    def __enter__(self) -> 'PredictionClient':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+@lru_cache(maxsize=8)
+def get_client(base_url: str = "http://localhost:8000") -> PredictionClient:
+    """Return the shared PredictionClient of an API, so repeated calls reuse its connections."""
+    return PredictionClient(base_url)
+
+class AsyncPredictionClient:
+    """
+    asyncio client of the prediction API, built on a pooled httpx.AsyncClient.
+
+    At most `max_in_flight` requests are sent at once; others wait on a semaphore. Retries
+    follow the same rules as PredictionClient. Requires httpx.
+    """
+
+    def __init__(self, base_url: str = "http://localhost:8000", timeout: Tuple[float, float] = (3.05, 60.0),
+                 retries: int = 3, backoff: float = 0.2, max_in_flight: int = 8):
+        try:
+            import httpx
+        except ImportError:
+            raise ImportError("The async client requires httpx, install it with `pip install httpx`")
+
+        self._httpx = httpx
+        self.retries = retries
+        self.backoff = backoff
+        self.max_in_flight = max_in_flight
+        self._limit = asyncio.Semaphore(max_in_flight)
+        self.client = httpx.AsyncClient(
+            base_url=base_url.rstrip('/'),
+            timeout=httpx.Timeout(timeout[1], connect=timeout[0]),
+            limits=httpx.Limits(max_connections=max_in_flight, max_keepalive_connections=max_in_flight),
+        )
+
+    async def _post(self, path: str, files, **kwargs):
+        async with self._limit:
+            for attempt in range(self.retries + 1):
+                try:
+                    response = await self.client.post(path, files=files, **kwargs)
+                except (self._httpx.ConnectError, self._httpx.ConnectTimeout) as e:
+                    if attempt == self.retries:
+                        raise Exception(f"API request failed: {str(e)}")
+                    delay = self.backoff * 2 ** attempt
+                except self._httpx.HTTPError as e:
+                    # The request may have reached the server, do not send it again
+                    raise Exception(f"API request failed: {type(e).__name__}: {str(e)}")
+                else:
+                    if response.status_code not in RETRY_STATUSES or attempt == self.retries:
+                        break
+                    retry_after = response.headers.get('retry-after', '')
+                    delay = float(retry_after) if retry_after.isdigit() else self.backoff * 2 ** attempt
+                await asyncio.sleep(delay * (0.5 + random.random() / 2))
+
+        if response.is_error:
+            raise Exception(f"API request failed: {response.status_code} {response.text[:200]}")
+        return response
+
+    async def predict(self, image: ImageInput) -> List[Detections]:
+        """Predict on one image (path, encoded bytes or decoded array)."""
+        response = await self._post("/predict/", files={'file': encode_upload(image)})
+        return _decode_response(response.content, response.headers.get('content-type', ''), response.text)
+
+    async def predict_many(self, images: Sequence[ImageInput]) -> AsyncIterator[Tuple[int, List[Detections]]]:
+        """Predict on many images concurrently and yield (index, detections) as each completes."""
+        async def run(index, image):
+            return index, await self.predict(image)
+
+        tasks = [asyncio.ensure_future(run(index, image)) for index, image in enumerate(images)]
+        try:
+            for done in asyncio.as_completed(tasks):
+                yield await done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def transcribe(self, image: ImageInput, output_format: str = 'midi', instrument: str = 'piano',
+                         tempo_bpm: int = 120) -> Tuple[bytes, Dict[str, float]]:
+        """Run the whole pipeline server-side; return the score and its stage timings (ms)."""
+        response = await self._post("/transcribe", files={'file': encode_upload(image)},
+                                    params={'format': output_format, 'instrument': instrument, 'tempo': tempo_bpm})
+        return response.content, parse_server_timing(response.headers.get('server-timing', ''))
+
+    async def health(self) -> dict:
+        return (await self.client.get("/health")).json()
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self) -> 'AsyncPredictionClient':
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
@@ -1,25 +1,57 @@
-from .convert_xml import BaseMEIConverter, XMLMEIConverter, RegexMEIConverter
-from .converter_abc import (
-    abc_to_midi, 
-    abc_to_musicxml, 
-    abc_to_pdf, 
-    abc_to_audio, 
-    abc_to_image, 
-    abc_to_braille,
-    abc_to_musescore
-)
-from .converter_yolo import yolo_to_abc
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Submodules are imported on first attribute access (PEP 562), so that MEI conversion
+# does not pay for music21 (converter_abc) and converter_yolo stays independent
+_LAZY_ATTRIBUTES = {
+    'BaseMEIConverter': 'convert_xml',
+    'XMLMEIConverter': 'convert_xml',
+    'RegexMEIConverter': 'convert_xml',
+    'IterparseMEIConverter': 'convert_xml',
+    'abc_to_midi': 'converter_abc',
+    'abc_to_musicxml': 'converter_abc',
+    'abc_to_pdf': 'converter_abc',
+    'abc_to_audio': 'converter_abc',
+    'abc_to_image': 'converter_abc',
+    'abc_to_braille': 'converter_abc',
+    'abc_to_musescore': 'converter_abc',
+    'yolo_to_abc': 'converter_yolo',
+}
+
+if TYPE_CHECKING:
+    from .convert_xml import BaseMEIConverter, XMLMEIConverter, RegexMEIConverter, IterparseMEIConverter
+    from .converter_abc import (
+        abc_to_midi,
+        abc_to_musicxml,
+        abc_to_pdf,
+        abc_to_audio,
+        abc_to_image,
+        abc_to_braille,
+        abc_to_musescore
+    )
+    from .converter_yolo import yolo_to_abc
+
+def __getattr__(name: str):
+    if name not in _LAZY_ATTRIBUTES:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(import_module(f".{_LAZY_ATTRIBUTES[name]}", __name__), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_ATTRIBUTES))
 
 __all__ = [
-    'BaseMEIConverter', 
-    'XMLMEIConverter', 
-    'RegexMEIConverter', 
-    'abc_to_midi', 
-    'abc_to_musicxml', 
-    'abc_to_pdf', 
-    'abc_to_audio', 
-    'abc_to_image', 
+    'BaseMEIConverter',
+    'XMLMEIConverter',
+    'RegexMEIConverter',
+    'IterparseMEIConverter',
+    'abc_to_midi',
+    'abc_to_musicxml',
+    'abc_to_pdf',
+    'abc_to_audio',
+    'abc_to_image',
     'abc_to_braille',
     'abc_to_musescore',
     'yolo_to_abc'
-]
\ No newline at end of file
+]
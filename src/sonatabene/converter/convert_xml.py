@@ -1,16 +1,24 @@
+import io
 import re
 from zipfile import ZipFile
-from typing import Dict, List, Tuple, Optional
-from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Optional, TYPE_CHECKING
+from dataclasses import asdict, dataclass, field
 from lxml import etree as ET
-from concurrent.futures import ThreadPoolExecutor
-from functools import lru_cache
-from abc import ABC
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from functools import lru_cache, partial
+from abc import ABC, abstractmethod
 import os 
 import time
-import pandas as pd
 from tqdm import tqdm
-from sonatabene.converter.mapping import CLEF_TO_TREBLE, GAMMES
+from sonatabene.converter.mapping import GAMMES
+from sonatabene.converter.transposition import TO_TREBLE
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+# Attributes a note label depends on: (pname, oct, dur, dots, accid)
+NoteKey = Tuple[str, str, str, Optional[str], Optional[str]]
 
 
 @dataclass
@@ -45,13 +53,18 @@ class BaseMEIConverter(ABC):
             content: Raw MEI file content
         """
         self.content = content if content else self._read_file(file_name)
+        self._init_state()
+        self.score_def = self._find_score_def()
+        self._find_measures()
+
+    def _init_state(self) -> None:
+        """Set up the measures and labels of a converter that has not converted anything yet."""
         self.measures: List = []
         self.measures_content: Dict[int, List[str]] = {}
         self.abc_content: str = ""
         self.notes_labels: List[str] = []
         self.pause_labels: List[str] = []
-        self.score_def = self._find_score_def()
-        self._find_measures()
+        self._labels_extracted = False
 
     @staticmethod
     def _read_file(file_name: str) -> str:
@@ -60,7 +73,9 @@ class BaseMEIConverter(ABC):
             return f.read()
 
     def _get_measures_labels(self) -> None:
-        """Extract labels for each measure and store them."""
+        """Extract labels for each measure and store them (once per document)."""
+        if self._labels_extracted:
+            return
         self.measures_content = {}
         self.notes_labels = []
         self.pause_labels = []
@@ -85,6 +100,7 @@ class BaseMEIConverter(ABC):
                     self.pause_labels.append(rest_label)
 
             self.measures_content[i] = measure_notes
+        self._labels_extracted = True
 
     def mei_to_abc(self) -> str:
         """
@@ -110,6 +126,14 @@ class BaseMEIConverter(ABC):
         self.abc_content = "\n".join(abc_content)
         return self.abc_content
 
+    def _parse_note(self, note) -> str:
+        """Return the ABC label of a note (labels are shared by every document, see note_label)."""
+        return note_label(*self._note_key(note))
+
+    @abstractmethod
+    def _note_key(self, note) -> NoteKey:
+        """Return the (pname, oct, dur, dots, accid) attributes of a note."""
+
     def treble_clef_transposition(self) -> List[str]:
         """
         Convert notes from the current clef to treble clef.
@@ -117,20 +141,37 @@ class BaseMEIConverter(ABC):
         Returns:
             List of notes in treble clef
         """
-        return [self._convert_note_to_treble(self.score_def.clef, note) 
-                for note in self.notes_labels]
+        table = TO_TREBLE.get(self.score_def.clef)
+        if table is None:
+            return list(self.notes_labels)
+        return [table.transpose_label(note) for note in self.notes_labels]
+
+
+@lru_cache(maxsize=4096)
+def note_label(pname: str, octave: str, duration: str, dots: Optional[str] = None,
+               accid: Optional[str] = None) -> str:
+    """
+    Return the ABC label of a note from its MEI attributes.
 
-    @classmethod
-    def _convert_note_to_treble(cls, clef: str, note: str) -> str:
-        """Convert a note from a given clef to its equivalent in the treble clef."""
-        if clef not in CLEF_TO_TREBLE:
-            return note
+    Shared by every document: the cache is keyed by attribute values only, which take
+    a few thousand distinct combinations, so it never holds a converter or its tree.
+    """
+    value = pname
+    octave = BaseMEIConverter.OCTAVES[int(octave)]
+    duration = BaseMEIConverter.DURATION_MAPPING[duration]
+
+    if dots is not None:
+        if duration == '/':
+            duration = '3/4'
+        elif duration == '//':
+            duration = '3/8'
+        else:
+            duration = f"{int(float(duration) * 1.5)}"
 
-        clef_mapping = CLEF_TO_TREBLE[clef]
-        sorted_keys = sorted(clef_mapping.keys(), key=len, reverse=True)
-        pattern = '|'.join(re.escape(key) for key in sorted_keys)
+    if accid:
+        value = f"{BaseMEIConverter.ACCID_MAP.get(accid, '')}{value}"
 
-        return re.sub(pattern, lambda m: clef_mapping.get(m.group(0), m.group(0)), note)
+    return f"{value}{octave}{duration}"
 
 
 class RegexMEIConverter(BaseMEIConverter):
@@ -153,32 +194,24 @@ class RegexMEIConverter(BaseMEIConverter):
     def _find_measures(self) -> None:
         self.measures = self.MEASURE_PATTERN.findall(self.content)
 
-    @lru_cache(maxsize=128)
+    DOTS_PATTERN = re.compile(r'dots="([^"]*)"')
+
     def _extract_measure_content(self, measure: str) -> List[str]:
         return re.findall(
             r"<beam[\s\S]*?beam>|<note.*?/>|<note.[\s\S]*?note>|<rest.*?/>|<multiRest.*?/>",
             measure,
         )
 
-    @lru_cache(maxsize=256)
-    def _parse_note(self, note: str) -> str:
-        value = self.NOTE_PATTERN.search(note).group(1)
-        octave = self.OCTAVES[int(self.OCTAVE_PATTERN.search(note).group(1))]
-        duration = self.DURATION_MAPPING[self.DURATION_PATTERN.search(note).group(1)]
-
-        if 'dots="' in note:
-            if duration == '/':
-                duration = '3/4'
-            elif duration == '//':
-                duration = '3/8'
-            else:
-                duration = f"{int(float(duration) * 1.5)}"
-
-        accid_match = self.ACCID_PATTERN.search(note)
-        if accid_match:
-            value = f"{self.ACCID_MAP.get(accid_match.group(1), '')}{value}"
-
-        return f"{value}{octave}{duration}"
+    def _note_key(self, note: str) -> NoteKey:
+        dots = self.DOTS_PATTERN.search(note)
+        accid = self.ACCID_PATTERN.search(note)
+        return (
+            self.NOTE_PATTERN.search(note).group(1),
+            self.OCTAVE_PATTERN.search(note).group(1),
+            self.DURATION_PATTERN.search(note).group(1),
+            dots.group(1) if dots else None,
+            accid.group(1) if accid else None,
+        )
 
     def _find_score_def(self) -> ScoreDefinition:
         score_def = self.SCORE_DEF_PATTERN.findall(self.content)
@@ -246,7 +279,6 @@ class XMLMEIConverter(BaseMEIConverter):
     def _find_measures(self) -> None:
         self.measures = self.root.findall(".//measure")
 
-    @lru_cache(maxsize=128)
     def _extract_measure_content(self, measure: ET.Element) -> List[ET.Element]:
         elements = []
         elements.extend(measure.findall("beam"))
@@ -255,28 +287,14 @@ class XMLMEIConverter(BaseMEIConverter):
         elements.extend(measure.findall("multiRest"))
         return elements
 
-    @lru_cache(maxsize=256)
-    def _parse_note(self, note: ET.Element) -> str:
-        value = note.get("pname", "")
-        octave = self.OCTAVES[int(note.get("oct", "4"))]
-        duration = self.DURATION_MAPPING[note.get("dur", "4")]
-
-        if note.get("dots") is not None:
-            if duration == '/':
-                duration = '3/4'
-            elif duration == '//':
-                duration = '3/8'
-            else:
-                duration = f"{int(float(duration) * 1.5)}"
-
-        accid = note.get("accid")
-        if accid:
-            value = f"{self.ACCID_MAP.get(accid, '')}{value}"
-
-        return f"{value}{octave}{duration}"
+    def _note_key(self, note: ET.Element) -> NoteKey:
+        return note.get("pname", ""), note.get("oct", "4"), note.get("dur", "4"), note.get("dots"), note.get("accid")
 
     def _find_score_def(self) -> ScoreDefinition:
-        score_def = self.root.find(".//scoreDef")
+        return self._score_def_from_element(self.root.find(".//scoreDef"))
+
+    @staticmethod
+    def _score_def_from_element(score_def: Optional[ET.Element]) -> ScoreDefinition:
         if score_def is None:
             return ScoreDefinition()
 
@@ -322,10 +340,96 @@ class XMLMEIConverter(BaseMEIConverter):
             return f"z{duration}"
 
 
+class IterparseMEIConverter(XMLMEIConverter):
+    """
+    MEI to ABC converter streaming the document with lxml iterparse.
+
+    The full tree is never built: the score definition is read from the head of the
+    document, then measures are labelled one at a time as the parser reaches their end
+    tag and cleared right after. Labels match XMLMEIConverter.
+
+    Memory is proportional to one measure only when reading from `file_name`. With
+    `content`, the encoded document is kept (and parsed once for the score definition,
+    then once for the measures), so memory stays proportional to the document size.
+    """
+
+    def __init__(self, file_name: Optional[str] = None, content: Optional[str] = None):
+        if not file_name and not content:
+            raise ValueError("Either file_name or content is required")
+        self.file_name = file_name
+        self._content = content.encode("utf-8") if isinstance(content, str) else content
+        self.content = None
+        self._init_state()
+        self.score_def = self._find_score_def()
+
+    def _iterparse(self, tag: str) -> Iterator[ET.Element]:
+        """Yield the elements with `tag` as soon as they are complete."""
+        source = self.file_name if self._content is None else io.BytesIO(self._content)
+        try:
+            for _, element in ET.iterparse(source, events=("end",), tag=tag):
+                yield element
+        except ET.ParseError as e:
+            raise ValueError(f"Invalid XML content: {str(e)}")
+
+    def _find_score_def(self) -> ScoreDefinition:
+        # The score definition comes before the measures, stop reading once it is found
+        for score_def in self._iterparse("scoreDef"):
+            return self._score_def_from_element(score_def)
+        return ScoreDefinition()
+
+    def _find_measures(self) -> None:
+        pass
+
+    def iter_measures(self) -> Iterator[List[str]]:
+        """
+        Stream the document and yield the ABC tokens of each measure in order.
+
+        Note and pause labels are appended to notes_labels and pause_labels as their
+        measure is read.
+        """
+        self.notes_labels = []
+        self.pause_labels = []
+        for measure in self._iterparse("measure"):
+            measure_notes = []
+            for element in self._extract_measure_content(measure):
+                if self._is_beam(element):
+                    beam_notes_labels = [self._parse_note(n) for n in self._get_beam_notes(element)]
+                    measure_notes.append("".join(beam_notes_labels))
+                    self.notes_labels.extend(beam_notes_labels)
+                elif self._is_note(element):
+                    label = self._parse_note(element)
+                    measure_notes.append(label)
+                    self.notes_labels.append(label)
+                elif self._is_rest(element):
+                    label = self._parse_rest(element)
+                    measure_notes.append(label)
+                    self.pause_labels.append(label)
+
+            # Free the measure and the ones before it, the tree never grows past a measure
+            measure.clear(keep_tail=True)
+            while measure.getprevious() is not None:
+                del measure.getparent()[0]
+            yield measure_notes
+
+    def _get_measures_labels(self) -> None:
+        """Extract labels for each measure and store them (once per document)."""
+        if self._labels_extracted:
+            return
+        self.measures_content = dict(enumerate(self.iter_measures()))
+        self._labels_extracted = True
+
+def _mei_members(archive: ZipFile, number_of_files: int = -1) -> List[str]:
+    """List the MEI labels of a dataset zip (labels/*.mei), the first `number_of_files` if not -1."""
+    mei_files = [f for f in archive.namelist() if f.startswith("labels/") and f.endswith(".mei")]
+    return mei_files if number_of_files < 0 else mei_files[:number_of_files]
+
 def convert_zip(zip_path: str, number_of_files: int = -1, max_workers: int = 4, 
                converter_class=XMLMEIConverter) -> List[BaseMEIConverter]:
     """
     Convert all MEI files in a ZIP archive to ABC notation using parallel processing.
+
+    Every converter (content, tree and labels) is kept in memory; use iter_convert_zip
+    for large datasets.
     
     Args:
         zip_path: Path to the ZIP archive
@@ -338,8 +442,7 @@ def convert_zip(zip_path: str, number_of_files: int = -1, max_workers: int = 4,
     """
     converters = []
     with ZipFile(zip_path, "r") as myzip:
-        mei_files = [f for f in myzip.namelist() 
-                    if f.startswith("labels/") and f.endswith(".mei")][:number_of_files]
+        mei_files = _mei_members(myzip, number_of_files)
         
         def process_file(mei_file: str) -> BaseMEIConverter:
             with myzip.open(mei_file) as f:
@@ -351,6 +454,112 @@ def convert_zip(zip_path: str, number_of_files: int = -1, max_workers: int = 4,
 
     return converters 
 
+@dataclass
+class MEIResult:
+    """Compact result of the conversion of one MEI file, as returned by the worker processes."""
+    file: str
+    abc: str = ""
+    notes_labels: List[str] = field(default_factory=list)
+    pause_labels: List[str] = field(default_factory=list)
+    score_def: Optional[ScoreDefinition] = None
+    error: Optional[str] = None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+# Per-process state, set up once by _init_worker
+_archive: Optional[ZipFile] = None
+_converter_class = None
+
+def _init_worker(zip_path: str, converter_class) -> None:
+    """Open the dataset zip once per worker process."""
+    global _archive, _converter_class
+    _archive = ZipFile(zip_path, "r")
+    _converter_class = converter_class
+
+def _convert_members(names: List[str]) -> List[MEIResult]:
+    """Convert a chunk of zip members in a worker; failures are returned, not raised."""
+    results = []
+    for name in names:
+        try:
+            with _archive.open(name) as f:
+                converter = _converter_class(content=f.read().decode("utf-8"))
+            abc = converter.mei_to_abc()
+            results.append(MEIResult(file=name, abc=abc, notes_labels=converter.notes_labels,
+                                     pause_labels=converter.pause_labels, score_def=converter.score_def))
+        except Exception as e:
+            results.append(MEIResult(file=name, error=f"{type(e).__name__}: {str(e)}"))
+    return results
+
+def iter_convert_zip(zip_path: str, number_of_files: int = -1, max_workers: Optional[int] = None,
+                     converter_class=XMLMEIConverter, chunk_size: int = 32) -> Iterator[MEIResult]:
+    """
+    Convert the MEI files of a ZIP archive on a process pool and yield results as they finish.
+
+    Workers open the archive themselves and receive member names in chunks of
+    `chunk_size`; only compact MEIResult objects travel back. At most two chunks per
+    worker are in flight, so memory stays bounded whatever the size of the dataset.
+    Results come in completion order.
+
+    Args:
+        zip_path: Path to the ZIP archive
+        number_of_files: Number of files to process (-1 for all)
+        max_workers: Number of worker processes (defaults to the number of cores)
+        converter_class: The converter class to use (XMLMEIConverter by default)
+        chunk_size: Number of files per task
+
+    Yields:
+        MEIResult: One result per file, with `error` set if the conversion failed
+    """
+    with ZipFile(zip_path, "r") as archive:
+        names = _mei_members(archive, number_of_files)
+    chunks = (names[i:i + chunk_size] for i in range(0, len(names), max(chunk_size, 1)))
+
+    max_workers = max_workers or os.cpu_count()
+    executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                   initargs=(zip_path, converter_class))
+    try:
+        pending = set()
+        for chunk in chunks:
+            pending.add(executor.submit(_convert_members, chunk))
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+def _converter_subclasses(base=BaseMEIConverter) -> List[type]:
+    """Every concrete converter class deriving from `base`, in definition order."""
+    classes = []
+    for subclass in base.__subclasses__():
+        classes.append(subclass)
+        classes.extend(_converter_subclasses(subclass))
+    return classes
+
+def read_mei_sources(path: str, number_of_files: int = -1) -> List[Tuple[str, str]]:
+    """
+    Read the MEI documents of a dataset zip (labels/*.mei) or of a folder (*.mei, recursively).
+
+    Args:
+        path: Path to the ZIP archive or to the folder
+        number_of_files: Number of files to read (-1 for all)
+
+    Returns:
+        List of (name, content) pairs, sorted by name
+    """
+    if os.path.isdir(path):
+        names = sorted(os.path.relpath(os.path.join(root, file), path)
+                       for root, _, files in os.walk(path) for file in files if file.endswith(".mei"))
+        names = names if number_of_files < 0 else names[:number_of_files]
+        return [(name, BaseMEIConverter._read_file(os.path.join(path, name))) for name in names]
+    with ZipFile(path, "r") as archive:
+        return [(name, archive.read(name).decode("utf-8")) for name in _mei_members(archive, number_of_files)]
+
 def process_file_with_converter(file_path: str, converter_class) -> Tuple[float, bool]:
     """
     Process a single file with a given converter class and return processing time and success status.
@@ -363,69 +572,198 @@ def process_file_with_converter(file_path: str, converter_class) -> Tuple[float,
         Tuple of (processing_time, success_status)
     """
     try:
-        start_time = time.time()
+        start_time = time.perf_counter()
         converter = converter_class(file_name=file_path)
         converter.mei_to_abc()
-        end_time = time.time()
-        return end_time - start_time, True
+        return time.perf_counter() - start_time, True
     except Exception as e:
         print(f"Error processing {file_path} with {converter_class.__name__}: {str(e)}")
         return 0.0, False
 
-def compare_converters(folder_path: str, converter_classes: List[BaseMEIConverter]) -> pd.DataFrame:
+def _convert_content(converter_class, content: str) -> bool:
+    """Convert one document; failures count, they do not raise."""
+    try:
+        converter_class(content=content).mei_to_abc()
+        return True
+    except Exception:
+        return False
+
+# Converter class of a throughput benchmark worker process, set by _init_benchmark_worker
+_benchmark_converter_class = None
+
+def _init_benchmark_worker(converter_class) -> None:
+    global _benchmark_converter_class
+    _benchmark_converter_class = converter_class
+
+def _convert_content_in_worker(content: str) -> bool:
+    return _convert_content(_benchmark_converter_class, content)
+
+def measure_file(converter_class, content: str, repeat: int = 5, warmup: int = 1) -> dict:
     """
-    Compare the performance of different MEI converters on a folder of files.
-    
+    Time the conversion of one document and measure its peak memory.
+
+    The document is converted `warmup` times untimed, then `repeat` times with
+    perf_counter. The peak is measured with tracemalloc on a separate run, so that
+    tracing does not slow the timed ones; it covers Python allocations only, not the
+    memory of the lxml trees.
+
+    Returns:
+        Dict with the median, min and max times in seconds, the peak in bytes and the
+        error message if the conversion failed (times are then None)
+    """
+    import statistics
+    import tracemalloc
+
+    try:
+        for _ in range(warmup):
+            converter_class(content=content).mei_to_abc()
+        times = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            converter_class(content=content).mei_to_abc()
+            times.append(time.perf_counter() - start)
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        converter_class(content=content).mei_to_abc()
+        _, peak = tracemalloc.get_traced_memory()
+        if not tracing:
+            tracemalloc.stop()
+    except Exception as e:
+        return {'median_s': None, 'min_s': None, 'max_s': None, 'peak_bytes': None,
+                'error': f"{type(e).__name__}: {str(e)}"}
+    return {'median_s': statistics.median(times), 'min_s': min(times), 'max_s': max(times),
+            'peak_bytes': peak - baseline, 'error': None}
+
+def converter_throughput(converter_class, contents: List[str], mode: str = "serial",
+                         max_workers: Optional[int] = None, rounds: int = 3) -> float:
+    """
+    Measure how many documents per second a converter handles in a given execution mode.
+
     Args:
-        folder_path: Path to the folder containing MEI files
-        num_files: Number of files to process for each converter
-        
+        converter_class: The converter class to use
+        contents: MEI documents to convert
+        mode: "serial", "thread" (ThreadPoolExecutor) or "process" (ProcessPoolExecutor)
+        max_workers: Number of threads or processes (defaults to the number of cores)
+        rounds: Number of timed passes over `contents` (best is kept)
+
     Returns:
-        DataFrame with performance metrics
+        Files per second of the best pass, pool start-up excluded
     """
-    results = []
-    
-    mei_files = os.listdir(folder_path)
-    
-    if not mei_files:
-        raise ValueError(f"No MEI files found in {folder_path}")
+    if mode not in ("serial", "thread", "process"):
+        raise ValueError(f"Unknown mode {mode!r}, expected serial, thread or process")
+    if not contents:
+        return 0.0
+    max_workers = max_workers or os.cpu_count()
+    chunk_size = max(1, len(contents) // (4 * max_workers))
+
+    executor, convert = None, partial(_convert_content, converter_class)
+    if mode == "thread":
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    elif mode == "process":
+        executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_benchmark_worker,
+                                       initargs=(converter_class,))
+        convert = _convert_content_in_worker
+    try:
+        if executor is not None:
+            # Untimed pass, so that the workers are started and their caches filled
+            list(executor.map(convert, contents, chunksize=chunk_size))
+        best = float("inf")
+        for _ in range(max(rounds, 1)):
+            start = time.perf_counter()
+            if executor is None:
+                list(map(convert, contents))
+            else:
+                list(executor.map(convert, contents, chunksize=chunk_size))
+            best = min(best, time.perf_counter() - start)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True)
+    return len(contents) / best if best > 0 else float("inf")
+
+def benchmark_converters(path: str, converter_classes: Optional[List[type]] = None, number_of_files: int = -1,
+                         repeat: int = 5, warmup: int = 1, modes: Tuple[str, ...] = ("serial", "thread", "process"),
+                         max_workers: Optional[int] = None, rounds: int = 3) -> dict:
+    """
+    Benchmark MEI converters on a dataset zip or a folder of MEI files.
 
-    print(f"Found {len(mei_files)} MEI files to process")
-    
+    Every file is timed and its peak memory measured with measure_file, then each
+    converter converts the whole set once per execution mode to get its throughput.
+
+    Args:
+        path: Path to the ZIP archive or to the folder
+        converter_classes: Converters to compare (every BaseMEIConverter subclass by default)
+        number_of_files: Number of files to process (-1 for all)
+        repeat: Number of timed conversions per file
+        warmup: Number of untimed conversions per file before timing
+        modes: Execution modes to measure the throughput of
+        max_workers: Number of threads or processes of the parallel modes
+        rounds: Number of timed passes per throughput measurement (best is kept)
+
+    Returns:
+        JSON-serialisable dict with the settings, one summary per converter and the
+        per-file measurements
+    """
+    import platform
+    import statistics
+
+    converter_classes = converter_classes or _converter_subclasses()
+    sources = read_mei_sources(path, number_of_files)
+    if not sources:
+        raise ValueError(f"No MEI files found in {path}")
+    contents = [content for _, content in sources]
+
+    summaries, files = [], []
     for converter_class in converter_classes:
-        print(f"\nTesting {converter_class.__name__}...")
-        converter_results = []
-        
-        for file in tqdm(mei_files):
-            file_path = os.path.join(folder_path, file)
-            processing_time, success = process_file_with_converter(file_path, converter_class)
-            converter_results.append({
-                'file': file,
-                'processing_time': processing_time,
-                'success': success
-            })
-        
-        # Statistics
-        successful_runs = [r for r in converter_results if r['success']]
-        if successful_runs:
-            avg_time = sum(r['processing_time'] for r in successful_runs) / len(successful_runs)
-            min_time = min(r['processing_time'] for r in successful_runs)
-            max_time = max(r['processing_time'] for r in successful_runs)
-            median_time = pd.Series([r['processing_time'] for r in successful_runs]).median()
-            success_rate = len(successful_runs) / len(converter_results) * 100
-        else:
-            avg_time = min_time = max_time = 0
-            success_rate = 0
-            
-        results.append({
+        measures = []
+        for name, content in tqdm(sources, desc=converter_class.__name__):
+            measure = measure_file(converter_class, content, repeat=repeat, warmup=warmup)
+            measures.append(measure)
+            files.append({'converter': converter_class.__name__, 'file': name, **measure})
+
+        successful = [m for m in measures if m['error'] is None]
+        times = sorted(m['median_s'] for m in successful)
+        peaks = [m['peak_bytes'] for m in successful]
+        summaries.append({
             'converter': converter_class.__name__,
-            'avg_time': avg_time,
-            'median_time': median_time,
-            'min_time': min_time,
-            'max_time': max_time,
-            'success_rate': success_rate,
-            'total_files': len(converter_results),
-            'successful_files': len(successful_runs)
+            'total_files': len(measures),
+            'successful_files': len(successful),
+            'success_rate': len(successful) / len(measures) * 100,
+            'mean_ms': statistics.fmean(times) * 1e3 if times else None,
+            'median_ms': statistics.median(times) * 1e3 if times else None,
+            'p95_ms': times[min(len(times) - 1, int(0.95 * len(times)))] * 1e3 if times else None,
+            'min_ms': times[0] * 1e3 if times else None,
+            'max_ms': times[-1] * 1e3 if times else None,
+            'median_peak_kb': statistics.median(peaks) / 1024 if peaks else None,
+            'max_peak_kb': max(peaks) / 1024 if peaks else None,
+            **{f'{mode}_files_per_s': converter_throughput(converter_class, contents, mode, max_workers, rounds)
+               for mode in modes},
         })
+
+    return {
+        'settings': {'path': path, 'files': len(sources), 'repeat': repeat, 'warmup': warmup, 'rounds': rounds,
+                     'modes': list(modes), 'max_workers': max_workers or os.cpu_count()},
+        'environment': {'python': platform.python_version(), 'platform': platform.platform(),
+                        'cpu_count': os.cpu_count(), 'lxml': ".".join(map(str, ET.LXML_VERSION))},
+        'converters': summaries,
+        'files': files,
+    }
+
+def compare_converters(path: str, converter_classes: Optional[List[type]] = None, **kwargs) -> 'pd.DataFrame':
+    """
+    Compare the performance of different MEI converters on a dataset zip or a folder of files.
     
-    return pd.DataFrame(results)
\ No newline at end of file
+    Args:
+        path: Path to the ZIP archive or to the folder containing MEI files
+        converter_classes: Converters to compare (every BaseMEIConverter subclass by default)
+        **kwargs: Options of benchmark_converters (number_of_files, repeat, warmup, modes, ...)
+        
+    Returns:
+        DataFrame with one row of performance metrics per converter
+    """
+    import pandas as pd
+
+    return pd.DataFrame(benchmark_converters(path, converter_classes, **kwargs)['converters'])
@@ -5,7 +5,6 @@ from music21.instrument import Piano, Violin, Viola, Violoncello, Contrabass, Gu
     Timpani, Percussion, \
     Choir, Organ, Harpsichord, Celesta, Glockenspiel, Xylophone, Marimba, Vibraphone
 import music21.stream
-from sonatabene.model import predict
 import sonatabene.converter.converter_yolo as converter_yolo
 from typing import Union, Dict, Optional
 from io import BytesIO
@@ -305,6 +304,7 @@ def abc_to_musescore(abc_file: Union[str, Path], output_file: Optional[Union[str
 
 if __name__ == "__main__":
     import cv2
+    from sonatabene.model import predict
     from sonatabene.parser import PParser
 
     image_path = "resources/samples/mary.jpg"
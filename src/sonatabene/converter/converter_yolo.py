@@ -1,6 +1,7 @@
 import re
 from typing import Dict, List, Optional
-from sonatabene.converter.mapping import CLEF_TO_TREBLE, CLEF_ABC_MAPPING, GAMMES
+from sonatabene.converter.mapping import CLEF_ABC_MAPPING, GAMMES
+from sonatabene.converter.transposition import FROM_TREBLE, from_treble
 
 def inverse_transpose(clef: str, note_str: str) -> str:
     """
@@ -14,20 +15,7 @@ def inverse_transpose(clef: str, note_str: str) -> str:
     Returns:
         str: The note string converted back to the original clef.
     """
-    mapping = CLEF_TO_TREBLE.get(clef)
-    if mapping is None:
-        return note_str
-
-    # Build the inverse mapping: treble note -> original clef note
-    inverse_mapping = {treble: orig for orig, treble in mapping.items()}
-    
-    # Sort keys in descending order of length to match longer patterns first
-    sorted_keys = sorted(inverse_mapping.keys(), key=len, reverse=True)
-    pattern = '|'.join(re.escape(key) for key in sorted_keys)
-    
-    # Replace each occurrence of a treble note with its original clef note
-    converted = re.sub(pattern, lambda m: inverse_mapping[m.group(0)], note_str)
-    return converted
+    return from_treble(clef, note_str)
 
 def group_and_sort_detections(
     detections,
@@ -163,7 +151,7 @@ def yolo_to_abc(results):
             if current_measure:
                 measure.append(' '.join(current_measure))
             
-            if i == 0 and sorted_notes[0] in CLEF_TO_TREBLE:
+            if i == 0 and sorted_notes[0] in FROM_TREBLE:
                 measure = [inverse_transpose(sorted_notes[0], m) for m in measure]
             
             abc_content.extend(measure)
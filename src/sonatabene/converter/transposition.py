@@ -0,0 +1,80 @@
+import re
+from itertools import product
+from typing import Dict
+from sonatabene.converter.mapping import CLEF_TO_TREBLE
+
+# A pitch token of an ABC label: a note letter followed by its octave marks
+PITCH_PATTERN = re.compile(r"[a-g][,']*")
+
+# Longest run of octave marks with a precomputed entry, longer ones are resolved on the fly
+MAX_OCTAVE_MARKS = 4
+
+# Number of transposed single-note labels remembered per table (see transpose_label)
+MAX_CACHED_LABELS = 4096
+
+
+class TranspositionTable:
+    """
+    Pitch token lookup table of a clef transposition, built once from a note mapping.
+
+    Each token (e.g. "c,", "a''") maps to the replacement of the longest mapping key it
+    starts with, followed by its remaining octave marks. This is what substituting the
+    mapping keys longest first in the label gives, with one dict lookup per pitch.
+    """
+
+    def __init__(self, mapping: Dict[str, str]):
+        self.mapping = dict(mapping)
+        self.labels: Dict[str, str] = {}
+        self.tokens: Dict[str, str] = {}
+        for letter in "abcdefg":
+            for length in range(MAX_OCTAVE_MARKS + 1):
+                for marks in product(",'", repeat=length):
+                    token = letter + "".join(marks)
+                    self.tokens[token] = self._resolve(token)
+
+    def _resolve(self, token: str) -> str:
+        for end in range(len(token), 0, -1):
+            replacement = self.mapping.get(token[:end])
+            if replacement is not None:
+                return replacement + token[end:]
+        return token
+
+    def _replace(self, match: "re.Match") -> str:
+        token = match.group(0)
+        replacement = self.tokens.get(token)
+        return replacement if replacement is not None else self._resolve(token)
+
+    def transpose(self, text: str) -> str:
+        """Transpose every pitch of a label or of a space-separated measure."""
+        return PITCH_PATTERN.sub(self._replace, text)
+
+    def transpose_label(self, label: str) -> str:
+        """Transpose a single note label, remembering the result (labels take few distinct values)."""
+        transposed = self.labels.get(label)
+        if transposed is None:
+            if len(self.labels) >= MAX_CACHED_LABELS:
+                self.labels.clear()
+            transposed = self.labels[label] = self.transpose(label)
+        return transposed
+
+
+# Forward (clef -> treble) and inverse (treble -> clef) tables of every clef
+TO_TREBLE: Dict[str, TranspositionTable] = {
+    clef: TranspositionTable(mapping) for clef, mapping in CLEF_TO_TREBLE.items()
+}
+FROM_TREBLE: Dict[str, TranspositionTable] = {
+    clef: TranspositionTable({treble: original for original, treble in mapping.items()})
+    for clef, mapping in CLEF_TO_TREBLE.items()
+}
+
+
+def to_treble(clef: str, text: str) -> str:
+    """Transpose notes written in `clef` to the treble clef (unknown clefs are left as is)."""
+    table = TO_TREBLE.get(clef)
+    return table.transpose(text) if table is not None else text
+
+
+def from_treble(clef: str, text: str) -> str:
+    """Transpose notes written in the treble clef back to `clef` (unknown clefs are left as is)."""
+    table = FROM_TREBLE.get(clef)
+    return table.transpose(text) if table is not None else text
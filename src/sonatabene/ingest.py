@@ -0,0 +1,138 @@
+import io
+import os
+from typing import Iterator, List, Optional, Tuple, Union
+import cv2
+import numpy as np
+from PIL import Image, ImageSequence
+from sonatabene.cache import ParseCache
+from sonatabene.parser import PParser
+from sonatabene.scoretyping import StaffLine
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.webp')
+TIFF_EXTENSIONS = ('.tif', '.tiff')
+PDF_EXTENSIONS = ('.pdf',)
+
+def _page_name(path: str, page_index: int) -> str:
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}_page{page_index:04d}.png"
+
+def _iter_pdf(path: str, dpi: int, data: Optional[bytes] = None,
+              page_errors: bool = False) -> Iterator[Tuple[str, Union[np.ndarray, Exception]]]:
+    try:
+        import fitz
+    except ImportError:
+        raise ImportError("PDF ingestion requires PyMuPDF, install it with `pip install pymupdf`")
+
+    with (fitz.open(stream=data, filetype="pdf") if data is not None else fitz.open(path)) as document:
+        for page_index in range(len(document)):
+            try:
+                pixmap = document[page_index].get_pixmap(dpi=dpi)
+                rgb = np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.width, pixmap.n)
+                page = cv2.cvtColor(rgb[:, :, :3], cv2.COLOR_RGB2BGR)
+                del pixmap, rgb
+            except Exception as e:
+                if not page_errors:
+                    raise
+                page = e
+            yield _page_name(path, page_index), page
+            del page
+
+def _iter_tiff(path: str, data: Optional[bytes] = None,
+               page_errors: bool = False) -> Iterator[Tuple[str, Union[np.ndarray, Exception]]]:
+    with Image.open(io.BytesIO(data) if data is not None else path) as tiff:
+        for page_index, frame in enumerate(ImageSequence.Iterator(tiff)):
+            try:
+                page = cv2.cvtColor(np.asarray(frame.convert('RGB')), cv2.COLOR_RGB2BGR)
+            except Exception as e:
+                if not page_errors:
+                    raise
+                page = e
+            yield _page_name(path, page_index), page
+            del page
+
+def iter_pages(source: str, dpi: int = 200) -> Iterator[Tuple[str, np.ndarray]]:
+    """
+    Yield the pages of a score one at a time as BGR images.
+
+    Only the current page is decoded, so memory does not grow with the page count.
+
+    Args:
+        source: Path to an image, a multi-page PDF or TIFF, or a directory of those
+        dpi: Rendering resolution for PDF pages
+
+    Yields:
+        Tuple[str, np.ndarray]: The page name and the decoded page
+    """
+    if os.path.isdir(source):
+        for entry in sorted(os.listdir(source)):
+            path = os.path.join(source, entry)
+            if os.path.isfile(path) and entry.lower().endswith(IMAGE_EXTENSIONS + TIFF_EXTENSIONS + PDF_EXTENSIONS):
+                yield from iter_pages(path, dpi=dpi)
+        return
+
+    extension = os.path.splitext(source)[1].lower()
+    if extension in PDF_EXTENSIONS:
+        yield from _iter_pdf(source, dpi)
+    elif extension in TIFF_EXTENSIONS:
+        yield from _iter_tiff(source)
+    else:
+        image = cv2.imread(source)
+        if image is None:
+            raise FileNotFoundError(f"Could not load image from path: {source}")
+        yield os.path.basename(source), image
+
+def iter_upload_pages(data: bytes, filename: str, dpi: int = 200,
+                      page_errors: bool = False) -> Iterator[Tuple[str, Union[np.ndarray, bytes, Exception]]]:
+    """
+    Yield the pages of an uploaded file from its content, like iter_pages.
+
+    PDF and TIFF pages are decoded one at a time. Single images are yielded as their
+    encoded bytes, left for the consumer to decode.
+
+    Args:
+        data: Content of the uploaded file
+        filename: Name of the uploaded file, its extension selects the decoder
+        dpi: Rendering resolution for PDF pages
+        page_errors: Yield a page that cannot be decoded as its exception, and go on
+                     with the next pages, instead of raising
+
+    Yields:
+        Tuple[str, Union[np.ndarray, bytes, Exception]]: The page name and the page
+    """
+    extension = os.path.splitext(filename or "")[1].lower()
+    if extension in PDF_EXTENSIONS or data[:5] == b"%PDF-":
+        yield from _iter_pdf(filename, dpi, data=data, page_errors=page_errors)
+    elif extension in TIFF_EXTENSIONS or data[:4] in (b"II*\x00", b"MM\x00*"):
+        yield from _iter_tiff(filename, data=data, page_errors=page_errors)
+    else:
+        yield os.path.basename(filename or "image.png"), data
+
+def parse_pages(source: str, params: Optional[dict] = None, parser: Optional[PParser] = None,
+                keep_images: bool = True, dpi: int = 200,
+                cache: Optional[ParseCache] = None) -> Iterator[Tuple[str, List[StaffLine]]]:
+    """
+    Run staff and note detection on every page of a score, one page at a time.
+
+    The parser's page buffers are released as soon as the results of a page have been
+    consumed. Staff and note images are views into the shared page buffer, so pass
+    `keep_images=False` to drop it when only the geometry is needed and keep peak memory flat.
+
+    Args:
+        source: Path to an image, a multi-page PDF or TIFF, or a directory of those
+        params: Detection parameters, see DEFAULT_PARSE_PARAMS
+        parser: Parser instance to reuse (a new one is created if None)
+        keep_images: Whether staff lines and notes keep their image crops
+        dpi: Rendering resolution for PDF pages
+        cache: Optional ParseCache used to skip detection on pages seen before
+
+    Yields:
+        Tuple[str, List[StaffLine]]: The page name and its staff lines with notes
+    """
+    parser = parser or PParser()
+    for name, page in iter_pages(source, dpi=dpi):
+        staff_lines = parser.parse(page, params=params, filename=name, keep_pixels=keep_images, cache=cache)
+        del page
+        try:
+            yield name, staff_lines
+        finally:
+            parser.release()
@@ -1,6 +1,6 @@
 from zipfile import ZipFile
-from ultralytics import YOLO
 from sonatabene.converter import XMLMEIConverter
+from sonatabene.model import get_model
 import numpy as np
 import os
 import yaml
@@ -133,6 +133,6 @@ if __name__ == "__main__":
             corresponding_mei_file = mei_files.get(image_name)
 
             if corresponding_mei_file:
-                compare_mei_to_parser(image_name, myzip, output_dir=OUTPUT_PATH, yaml_path=YAML_PATH, model=YOLO(MODEL_PATH))
+                compare_mei_to_parser(image_name, myzip, output_dir=OUTPUT_PATH, yaml_path=YAML_PATH, model=get_model(MODEL_PATH))
             else:
                 print(f"No corresponding MEI file found for {image_file}")
\ No newline at end of file
@@ -2,9 +2,24 @@ from ultralytics import YOLO
 from numpy import ndarray
 from torch import Tensor
 from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+import threading
+import time
+from zipfile import ZipFile
+import os
+import random
+import shutil
+import tempfile
+import loguru
+import yaml
 import cv2
-import requests
-import pickle
+from sonatabene.cache import PredictionCache
+from sonatabene.client import get_client
+from sonatabene.scoretyping import Detections
+from sonatabene.utils import current_rss
 
 def train(data_path: str, model_path: str = "yolo11n.pt", **kwargs):
     """
@@ -28,26 +43,432 @@ def train(data_path: str, model_path: str = "yolo11n.pt", **kwargs):
     Returns:
         YOLO: Trained YOLO model instance
     """
-    model = YOLO(model_path) 
+    model = YOLO(model_path)
     model.train(data=data_path, **kwargs)
     return model
 
 
-def predict(image: str | Path | int | list | tuple | ndarray | Tensor = None, model_path: str = "models/yolo11n.pt", **kwargs):
-    model = YOLO(model_path)
+def calibration_set(zip_path: str, output_dir: str, size: int = 300, seed: int = 0) -> List[str]:
+    """
+    Extract a random sample of the staff images of the dataset zip (images/*.png).
+
+    Args:
+        zip_path: Path to the dataset zip (e.g. 'data/dataset.zip')
+        output_dir: Directory the images are written to
+        size: Number of images to sample (all of them if the zip holds fewer)
+        seed: Seed of the sampling, so that calibrations are reproducible
+
+    Returns:
+        List[str]: Paths of the extracted images
+    """
+    with ZipFile(zip_path, "r") as archive:
+        names = sorted(name for name in archive.namelist() if name.endswith(".png") and "images/" in name)
+        if not names:
+            raise ValueError(f"No images/*.png in {zip_path}")
+        sample = random.Random(seed).sample(names, min(size, len(names)))
+
+        os.makedirs(output_dir, exist_ok=True)
+        paths = []
+        for name in sample:
+            path = os.path.join(output_dir, os.path.basename(name))
+            with archive.open(name) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            paths.append(path)
+    return paths
+
+
+def quantize(model_path: str, zip_path: str = "data/dataset.zip", calibration_size: int = 300,
+             imgsz: int = 640, seed: int = 0) -> str:
+    """
+    Produce an INT8 variant of trained weights for CPU inference.
+
+    The weights are exported to OpenVINO and quantized post-training by NNCF, with
+    activation ranges calibrated on `calibration_size` staff images of the dataset zip.
+    The result is the 'int8' backend: predict(..., backend='int8') runs it.
+
+    Args:
+        model_path: Path to the trained .pt weights
+        zip_path: Dataset zip the calibration images are drawn from
+        calibration_size: Number of calibration images
+        imgsz: Input image size
+        seed: Seed of the calibration sampling
+
+    Returns:
+        str: Path to the INT8 OpenVINO model
+    """
+    target = exported_path(model_path, "int8")
+    with tempfile.TemporaryDirectory() as calibration_dir:
+        calibration_set(zip_path, os.path.join(calibration_dir, "images"), size=calibration_size, seed=seed)
+        data_path = os.path.join(calibration_dir, "calibration.yaml")
+        with open(data_path, "w") as f:
+            # Labels are not needed to calibrate, only the images of the val split are read
+            yaml.safe_dump({"path": calibration_dir, "train": "images", "val": "images",
+                            "names": YOLO(model_path).names}, f)
+        with _export_lock:
+            _export(model_path, target, format="openvino", int8=True, data=data_path, imgsz=imgsz,
+                    fraction=1.0, dynamic=True)
+    return target
+
+
+def evaluate(model_path: str, data_path: str, backends: Tuple[str, ...] = ("torch", "int8"), imgsz: int = 640,
+             **kwargs) -> List[dict]:
+    """
+    Validate several backends of a model on a dataset, side by side.
+
+    Each backend runs ultralytics validation one image at a time, which reports the
+    accuracy and the per-image latency of the same pass.
+
+    Args:
+        model_path: Path to the .pt weights
+        data_path: Dataset configuration file (e.g. 'data/dataset.yaml')
+        backends: Backends to compare, see BACKENDS
+        imgsz: Input image size
+        **kwargs: Additional validation arguments (split, conf, iou, device, ...)
+
+    Returns:
+        List[dict]: One row per backend with mAP50, mAP50-95, latency in milliseconds
+                    per image (preprocess, inference, postprocess) and model size in MB
+    """
+    rows = []
+    for backend in backends:
+        path = export_model(model_path, backend, imgsz=imgsz)
+        metrics = YOLO(path, task="detect").val(data=data_path, imgsz=imgsz, batch=1, plots=False,
+                                                verbose=False, **kwargs)
+        size = sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) \
+            if os.path.isdir(path) else os.path.getsize(path)
+        rows.append({
+            "backend": backend,
+            "map50": float(metrics.box.map50),
+            "map50_95": float(metrics.box.map),
+            "preprocess_ms": metrics.speed["preprocess"],
+            "inference_ms": metrics.speed["inference"],
+            "postprocess_ms": metrics.speed["postprocess"],
+            "size_mb": size / 1024 ** 2,
+        })
+    return rows
+
+
+@dataclass
+class ModelStats:
+    """Load statistics of a model held by the registry."""
+    model_path: str
+    device: str
+    half: bool
+    load_time: float
+    memory_bytes: int
+    rss_delta_bytes: int
+    hits: int = 0
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded YOLO models.
+
+    Models are keyed by (weights path, device, precision) and loaded at most once.
+    At most `max_models` are kept warm; the least recently used one is evicted
+    when a new model has to be loaded. Loading happens outside the registry lock, so
+    warm models stay available while another one loads; threads asking for weights
+    that are being loaded wait for that load instead of starting their own.
+    """
+
+    def __init__(self, max_models: int = 2):
+        self.max_models = max_models
+        self._models: "OrderedDict[Tuple[str, str, bool], YOLO]" = OrderedDict()
+        self._stats: Dict[Tuple[str, str, bool], ModelStats] = {}
+        self._loading: Dict[Tuple[str, str, bool], Future] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(model_path: str, device: Optional[str] = None, half: bool = False) -> Tuple[str, str, bool]:
+        return (os.path.abspath(str(model_path)), str(device or ""), bool(half))
+
+    def get(self, model_path: str, device: Optional[str] = None, half: bool = False) -> YOLO:
+        """
+        Return the model for the given weights, loading it on first use.
+
+        Args:
+            model_path: Path to the model weights
+            device: Device the model runs on ('' or None for auto-detect)
+            half: Whether the model runs in half precision (FP16)
+
+        Returns:
+            YOLO: The loaded model instance
+        """
+        key = self._key(model_path, device, half)
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                self._stats[key].hits += 1
+                return self._models[key]
+            loading = self._loading.get(key)
+            owner = loading is None
+            if owner:
+                loading = self._loading[key] = Future()
+                self._evict(reserved=len(self._loading))
+        if not owner:
+            # Another thread is loading these weights
+            return loading.result()
+
+        try:
+            rss_before = current_rss()
+            start = time.perf_counter()
+            model = YOLO(model_path, task="detect")
+            if device and str(model_path).endswith(".pt"):
+                # Exported models pick their device when the first prediction builds the backend
+                model.to(device)
+            load_time = time.perf_counter() - start
+        except BaseException as e:
+            with self._lock:
+                del self._loading[key]
+            loading.set_exception(e)
+            raise
+
+        with self._lock:
+            del self._loading[key]
+            self._evict(reserved=1)
+            self._models[key] = model
+            self._stats[key] = ModelStats(
+                model_path=key[0],
+                device=key[1],
+                half=key[2],
+                load_time=load_time,
+                memory_bytes=self._model_bytes(model),
+                rss_delta_bytes=max(current_rss() - rss_before, 0),
+            )
+        loading.set_result(model)
+        return model
+
+    def _evict(self, reserved: int) -> None:
+        """Drop least recently used models until `reserved` more fit (called with the lock held)."""
+        while self._models and len(self._models) + reserved > self.max_models:
+            evicted, _ = self._models.popitem(last=False)
+            self._stats.pop(evicted, None)
+
+    @staticmethod
+    def _model_bytes(model: YOLO) -> int:
+        """Size in bytes of the parameters and buffers of a PyTorch-backed model."""
+        module = getattr(model, "model", None)
+        if module is None or not hasattr(module, "parameters"):
+            return 0
+        tensors = list(module.parameters()) + list(module.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+    def stats(self) -> Dict[Tuple[str, str, bool], ModelStats]:
+        """Return the load statistics of the models currently held."""
+        with self._lock:
+            return dict(self._stats)
+
+    def clear(self) -> None:
+        """Drop every loaded model."""
+        with self._lock:
+            self._models.clear()
+            self._stats.clear()
+
+    def __contains__(self, key: Tuple[str, Optional[str], bool]) -> bool:
+        return self._key(*key) in self._models
+
+    def __len__(self) -> int:
+        return len(self._models)
+
+
+registry = ModelRegistry(max_models=int(os.environ.get("SNB_MAX_MODELS", 2)))
+
+
+# Inference backends: PyTorch weights, or weights exported once and run by ONNX Runtime,
+# OpenVINO or OpenCV DNN (through ultralytics' AutoBackend, behind the same predict interface).
+# 'int8' is the OpenVINO model quantized by quantize().
+BACKENDS = ('torch', 'onnx', 'openvino', 'opencv', 'int8')
+
+_export_lock = threading.Lock()
+
+
+def exported_path(model_path: str, backend: str = "onnx", imgsz: int = 640, half: bool = False) -> str:
+    """
+    Return where export_model writes the model of a backend, next to the weights.
+
+    FP16 exports get their own path (`_fp16` suffix on the stem), so that they never
+    replace or stand in for the FP32 export of the same weights.
+    """
+    base = os.path.splitext(str(model_path))[0]
+    stem = f"{base}_fp16" if half else base
+    if backend == "torch":
+        return str(model_path)
+    if backend == "onnx":
+        return f"{stem}.onnx"
+    if backend == "openvino":
+        return f"{stem}_openvino_model"
+    if backend == "int8":
+        return f"{base}_int8_openvino_model"
+    if backend == "opencv":
+        # OpenCV DNN needs static shapes, so the export is specific to one input size
+        return f"{stem}.{imgsz}.onnx"
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+
+def export_model(model_path: str, backend: str = "onnx", imgsz: int = 640, half: bool = False,
+                 force: bool = False) -> str:
+    """
+    Export PyTorch weights for an inference backend, once.
+
+    The export is reused until the weights are modified. FP16 and FP32 exports are kept
+    side by side (see exported_path). ONNX and OpenVINO models have
+    dynamic batch and input sizes; the OpenCV DNN model is a static ONNX export at `imgsz`.
+
+    Args:
+        model_path: Path to the .pt weights
+        backend: One of BACKENDS ('torch' returns model_path as is)
+        imgsz: Input size of the static OpenCV DNN export
+        half: Export FP16 weights
+        force: Export even if an up-to-date export exists
+
+    Returns:
+        str: Path to the exported model
+    """
+    target = exported_path(model_path, backend, imgsz, half=half)
+    if backend == "torch":
+        return target
+
+    with _export_lock:
+        if not force and _is_up_to_date(target, model_path):
+            return target
+        if backend == "int8":
+            raise FileNotFoundError(f"No up-to-date INT8 model for {model_path}, run quantize() "
+                                    f"(snb model quantize) first")
+        _export(model_path, target, format="openvino" if backend == "openvino" else "onnx", imgsz=imgsz,
+                half=half, dynamic=backend != "opencv", simplify=backend != "openvino")
+    return target
+
+
+def _is_up_to_date(target: str, model_path: str) -> bool:
+    return os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(model_path)
+
+
+def _export(model_path: str, target: str, **export_kwargs) -> str:
+    """Export weights with ultralytics and move the result to target."""
+    start = time.perf_counter()
+    # Export from a copy so that exports of different backends never overwrite each other
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        weights = shutil.copy(model_path, tmp_dir)
+        exported = YOLO(weights).export(**export_kwargs)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(str(exported), target)
+    loguru.logger.info(f"Exported {model_path} to {target} in {time.perf_counter() - start:.1f}s")
+    return target
+
+
+def get_model(model_path: str = "models/yolo11n.pt", device: Optional[str] = None, half: bool = False,
+              backend: str = "torch", imgsz: int = 640) -> YOLO:
+    """
+    Return a model from the process-wide registry, loading it only on first use.
+
+    With a backend other than 'torch', the weights are exported first (see export_model).
+    """
+    return registry.get(export_model(model_path, backend, imgsz=imgsz, half=half), device=device, half=half)
+
+
+def _backend_model(model_path: str, backend: str, kwargs: dict) -> Tuple[YOLO, dict]:
+    """Return the registry model of a backend and the prediction arguments it runs with."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+    imgsz = kwargs.get("imgsz") or 640
+    model = get_model(model_path, device=kwargs.get("device"), half=kwargs.get("half", False),
+                      backend=backend, imgsz=imgsz)
+    if backend == "opencv":
+        kwargs = {**kwargs, "dnn": True}
+    return model, kwargs
+
+
+def predict(image: str | Path | int | list | tuple | ndarray | Tensor = None, model_path: str = "models/yolo11n.pt",
+            batch_size: Optional[int] = None, cache: Optional[PredictionCache] = None, backend: str = "torch",
+            **kwargs):
+    """
+    Run YOLO predictions with the registry model, on one of BACKENDS.
+
+    With a `cache`, image must be an image path, an array or a list of those; the result
+    is then one Detections per image and only the images missing from the cache are
+    sent to the model.
+    """
+    if cache is not None:
+        images = list(image) if isinstance(image, (list, tuple)) else [image]
+        images = [cv2.imread(str(i)) if isinstance(i, (str, Path)) else i for i in images]
+        return _predict_cached(images, model_path, cache, batch_size or len(images), backend, **kwargs)
+    if batch_size and isinstance(image, (list, tuple)):
+        return predict_batch(image, model_path=model_path, batch_size=batch_size, backend=backend, **kwargs)
+    model, kwargs = _backend_model(model_path, backend, kwargs)
     return model.predict(image, **kwargs)
 
-def predict_with_api(image_path: str, api_url: str = "http://localhost:8000/predict/"):
-    image = cv2.imread(image_path)
-    _, buffer = cv2.imencode(".png", image)
-    files = {
-        'file': ('image.png', buffer.tobytes(), 'image/png')
-    }
-    # Request
-    try:
-        response = requests.post(api_url, files=files)
-        results = pickle.loads(response.content)
-        return results
-
-    except requests.exceptions.RequestException as e:
-        raise Exception(f"API request failed: {str(e)}")
\ No newline at end of file
+def predict_batch(images: List[ndarray], model_path: str = "models/yolo11n.pt", batch_size: int = 8,
+                  cache: Optional[PredictionCache] = None, backend: str = "torch", **kwargs) -> list:
+    """
+    Run YOLO predictions on a list of images with one forward pass per batch.
+
+    Images of different shapes (e.g. staff crops) are letterboxed to `imgsz` by
+    ultralytics and stacked, and boxes are scaled back to each source image.
+
+    Args:
+        images: List of BGR images
+        model_path: Path to the model weights
+        batch_size: Maximum number of images per forward pass
+        cache: Optional PredictionCache, cached images are not sent to the model
+        backend: One of BACKENDS (the static OpenCV DNN model runs one image per pass)
+        **kwargs: Additional prediction arguments (conf, iou, imgsz, ...)
+
+    Returns:
+        list: One result per input image, in input order (Detections when a cache is used)
+    """
+    kwargs.setdefault("verbose", False)
+    batch_size = 1 if backend == "opencv" else max(batch_size, 1)
+    if cache is not None:
+        return _predict_cached(images, model_path, cache, batch_size, backend, **kwargs)
+
+    model, kwargs = _backend_model(model_path, backend, kwargs)
+    results = []
+    for start in range(0, len(images), batch_size):
+        results.extend(model.predict(list(images[start:start + batch_size]), **kwargs))
+    return results
+
+def _predict_cached(images: List[ndarray], model_path: str, cache: PredictionCache,
+                    batch_size: int, backend: str = "torch", **kwargs) -> List[Detections]:
+    """Look every image up in the cache and predict the misses in batches."""
+    # Exported models give slightly different boxes, so they get their own entries
+    key_kwargs = kwargs if backend == "torch" else {**kwargs, "backend": backend}
+    keys = [cache.key(image, model_path, **key_kwargs) for image in images]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        if backend == "opencv":
+            batch_size = 1
+        model, kwargs = _backend_model(model_path, backend, kwargs)
+        for start in range(0, len(missing), max(batch_size, 1)):
+            chunk = missing[start:start + batch_size]
+            for i, result in zip(chunk, model.predict([images[i] for i in chunk], **kwargs)):
+                results[i] = Detections.from_result(result)
+                cache.put(keys[i], results[i])
+    return results
+
+def predict_with_api(image_path: str, api_url: str = "http://localhost:8000/predict/") -> List[Detections]:
+    """
+    Send an image to the prediction API (fast_app.py) and decode its detections.
+
+    The file is uploaded as it is, over the pooled connections of the shared
+    PredictionClient of the API (see sonatabene.client).
+
+    Returns:
+        List[Detections]: Boxes, confidences, classes and class names, one entry per image
+    """
+    return get_client(api_url.rsplit('/predict', 1)[0]).predict(image_path)
+
+def predict_batch_with_api(paths: List[str], api_url: str = "http://localhost:8000/predict/batch",
+                           dpi: int = 200) -> Iterator[Tuple[int, str, Detections]]:
+    """
+    Send images or multi-page documents to the batch prediction API in one request and
+    yield the detections of each page as soon as the server streams them.
+
+    Pages arrive in completion order; use the returned index (position of the page among
+    all uploaded pages) to restore the input order.
+
+    Yields:
+        Tuple[int, str, Detections]: Page index, page name and its detections
+    """
+    yield from get_client(api_url.rsplit('/predict', 1)[0]).predict_batch(paths, dpi=dpi)
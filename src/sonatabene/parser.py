@@ -1,11 +1,27 @@
 import cv2
 import numpy as np
 import imutils
-from imutils import contours, perspective
+from imutils import contours
 from PIL import Image
 import os
 from typing import List, Tuple, Optional, Union, Any
-from sonatabene.scoretyping import StaffLine, Note, Key
+from sonatabene.scoretyping import StaffLine, Note, Key, NoteTable, NOTE_DTYPE
+from sonatabene.utils import StageTimer
+from sonatabene.cache import ParseCache
+
+DEFAULT_PARSE_PARAMS = {
+    'staff_dilate_iterations': 3,
+    'staff_min_contour_area': 10000,
+    'staff_pad_size': 0,
+    'note_dilate_iterations': 3,
+    'note_min_contour_area': 75,
+    'note_pad_size': 0,
+    'max_horizontal_distance': 10,
+    'overlap_threshold': 0.2,
+    'note_engine': 'contours'
+}
+
+NOTE_ENGINES = ('contours', 'components')
 
 class PParser:
     
@@ -14,6 +30,7 @@ class PParser:
         self.original_image = None
         self.image = None
         self.processed_image = None
+        self.cleaned_image = None
         self.notes_contours = None
         self.original_shape = None
         self.resized_shape = None
@@ -48,6 +65,77 @@ class PParser:
         self.processed_image = cv2.bitwise_not(self.image)
         return self.image
     
+    def parse(self, input_source: Union[str, np.ndarray], params: Optional[dict] = None,
+              filename: Optional[str] = "image.png", timer: Optional[StageTimer] = None,
+              keep_pixels: bool = True, cache: Optional[ParseCache] = None) -> List[StaffLine]:
+        """
+        Load an image and run staff line and note detection on it.
+        
+        Args:
+            input_source: Either a file path (str) or an image array (np.ndarray)
+            params: Detection parameters, see DEFAULT_PARSE_PARAMS for the expected keys
+            filename: Optional filename when input_source is an array
+            timer: Optional StageTimer recording the 'load', 'staff' and 'notes' stages
+            keep_pixels: Whether staff lines and notes keep a reference to the page buffer.
+                         Set to False when only the geometry is needed downstream.
+            cache: Optional ParseCache; pages already parsed with the same parameters are
+                   restored from it (recorded as the 'cache' stage) instead of re-detected
+            
+        Returns:
+            List[StaffLine]: List of staff lines with their associated notes.
+        """
+        params = {**DEFAULT_PARSE_PARAMS, **(params or {})}
+        timer = timer or StageTimer()
+        
+        with timer.stage('load'):
+            self.load_image(input_source, filename=filename)
+        
+        staff_lines = None
+        if cache is not None:
+            with timer.stage('cache'):
+                key = cache.key(self.image, params)
+                staff_lines = cache.get(key, filename=self.filename, page=self.image)
+        if staff_lines is not None:
+            self.notes_contours = [[note.contour for note in staff.notes] for staff in staff_lines]
+        else:
+            staff_lines = self._detect(params, timer)
+            if cache is not None:
+                with timer.stage('cache'):
+                    cache.put(key, staff_lines)
+        
+        if not keep_pixels:
+            for staff_line in staff_lines:
+                staff_line.drop_pixels()
+        return staff_lines
+    
+    def _detect(self, params: dict, timer: StageTimer) -> List[StaffLine]:
+        """Run staff line then note detection on the loaded image."""
+        with timer.stage('staff'):
+            staff_lines = self.find_staff_lines(
+                dilate_iterations=params['staff_dilate_iterations'],
+                min_contour_area=params['staff_min_contour_area'],
+                pad_size=params['staff_pad_size']
+            )
+        with timer.stage('notes'):
+            staff_lines = self.find_notes(
+                staff_lines,
+                dilate_iterations=params['note_dilate_iterations'],
+                min_contour_area=params['note_min_contour_area'],
+                pad_size=params['note_pad_size'],
+                max_horizontal_distance=params['max_horizontal_distance'],
+                overlap_threshold=params['overlap_threshold'],
+                engine=params['note_engine']
+            )
+        return staff_lines
+    
+    def release(self) -> None:
+        """Drop every page buffer held by the parser so it can be garbage collected."""
+        self.original_image = None
+        self.image = None
+        self.processed_image = None
+        self.cleaned_image = None
+        self.notes_contours = None
+    
     def imwrite(self, path: str, image: np.ndarray, overwrite: bool = False) -> bool:
         """
         Save an image to a file path.
@@ -177,7 +265,7 @@ class PParser:
             staff_lines.append(StaffLine(
                 index=index,
                 filename=self.filename,
-                image=self.extract_element(bounds) ,
+                page=self.image,
                 contour=contour,
                 bounds=bounds,
                 notes=[]
@@ -187,7 +275,8 @@ class PParser:
     
     def find_notes(self, staff_lines: List[StaffLine], dilate_iterations: int = 2, 
                    min_contour_area: int = 50, pad_size: int = 0,
-                   max_horizontal_distance: int = 2, overlap_threshold: float = 0.2) -> List[StaffLine]:
+                   max_horizontal_distance: int = 2, overlap_threshold: float = 0.2,
+                   engine: str = 'contours') -> List[StaffLine]:
         """
         Find notes for each staff line and return structured data.
         
@@ -198,38 +287,20 @@ class PParser:
             pad_size: Padding around the image
             max_horizontal_distance: Maximum distance for grouping note components
             overlap_threshold: Threshold for considering components as overlapping
+            engine: Note extraction engine, 'contours' (per staff findContours) or
+                    'components' (one connectedComponentsWithStats pass over the page)
         
         Returns:
             List[StaffLine]: List of staff lines with their associated notes.
         """
-        self.cleaned_image = self.remove_staff_lines(self.processed_image)
         global_index = 0
         
-        for line_index, staff_line in enumerate(staff_lines):
-
-            mask = np.zeros(self.cleaned_image.shape[:2], dtype=np.uint8)
-            cv2.drawContours(mask, [staff_line.contour], -1, (255), -1)
+        for line_index, staff_line, (x, y), note_contours, note_rects in self._detect_line_notes(
+                staff_lines, dilate_iterations, min_contour_area, pad_size,
+                max_horizontal_distance, overlap_threshold, engine):
             
-            x, y, w, h = cv2.boundingRect(staff_line.contour)
-            
-            line_image = cv2.bitwise_and(self.cleaned_image[y:y+h, x:x+w], 
-                                       self.cleaned_image[y:y+h, x:x+w], 
-                                       mask=mask[y:y+h, x:x+w])
-            
-            note_contours = self.find_contours(line_image, 
-                                             dilate_iterations=dilate_iterations,
-                                             min_contour_area=min_contour_area, 
-                                             pad_size=pad_size)
-            
-            note_contours = self.group_note_components(note_contours,
-                                                     max_horizontal_distance=max_horizontal_distance,
-                                                     overlap_threshold=overlap_threshold)
-            
-            note_contours = sorted(note_contours, 
-                                 key=lambda c: cv2.boundingRect(c)[0])
-            
-            for relative_index, note_contour in enumerate(note_contours):
-                note_bounds = cv2.boundingRect(note_contour)
+            for relative_index, (note_contour, note_rect) in enumerate(zip(note_contours, note_rects)):
+                note_bounds = tuple(int(v) for v in note_rect)
                 relative_pos = (note_bounds[0], note_bounds[1])
                 absolute_pos = (x + note_bounds[0], y + note_bounds[1])
 
@@ -239,18 +310,17 @@ class PParser:
                 
                 bounds = (note_bounds[0] + x, note_bounds[1] + y, note_bounds[2], note_bounds[3])
                 full_height_bounds = (bounds[0], y, bounds[2], staff_line.bounds[3])
-                full_height_image = self.extract_element(full_height_bounds)
                 
                 note = Note(
                     index=global_index,          
                     relative_index=relative_index,  
                     line_index=line_index,  
-                    image=full_height_image,        
                     contour=adjusted_contour,
                     bounds=bounds,
                     full_height_bounds=full_height_bounds,
                     relative_position=relative_pos,
-                    absolute_position=absolute_pos
+                    absolute_position=absolute_pos,
+                    page=self.image
                 )
                 staff_line.notes.append(note)
                 global_index += 1
@@ -259,6 +329,161 @@ class PParser:
         
         return staff_lines
     
+    def find_note_table(self, staff_lines: List[StaffLine], dilate_iterations: int = 2, 
+                        min_contour_area: int = 50, pad_size: int = 0,
+                        max_horizontal_distance: int = 2, overlap_threshold: float = 0.2,
+                        engine: str = 'contours') -> NoteTable:
+        """
+        Find notes for each staff line and return them as a columnar NoteTable.
+        
+        Same detection as find_notes, but no Note objects are created and the staff
+        lines are left untouched. Use NoteTable.to_notes() when objects are needed.
+        
+        Args:
+            staff_lines: List of staff lines to process
+            dilate_iterations: Number of dilation iterations for contour detection
+            min_contour_area: Minimum area for a contour to be considered
+            pad_size: Padding around the image
+            max_horizontal_distance: Maximum distance for grouping note components
+            overlap_threshold: Threshold for considering components as overlapping
+            engine: Note extraction engine, see find_notes
+        
+        Returns:
+            NoteTable: One row per note, ordered by staff line then from left to right.
+        """
+        tables = []
+        
+        for line_index, staff_line, (x, y), _, rects in self._detect_line_notes(
+                staff_lines, dilate_iterations, min_contour_area, pad_size,
+                max_horizontal_distance, overlap_threshold, engine):
+            
+            table = np.zeros(len(rects), dtype=NOTE_DTYPE)
+            table['relative_index'] = np.arange(len(rects))
+            table['line_index'] = line_index
+            table['relative_position'] = rects[:, :2]
+            table['absolute_position'] = rects[:, :2] + (x, y)
+            table['bounds'] = rects + (x, y, 0, 0)
+            table['full_height_bounds'] = rects * (1, 0, 1, 0) + (x, y, 0, staff_line.bounds[3])
+            table['label_id'] = -1
+            tables.append(table)
+        
+        data = np.concatenate(tables) if tables else np.zeros(0, dtype=NOTE_DTYPE)
+        data['index'] = np.arange(len(data))
+        return NoteTable(data=data, page=self.image)
+    
+    def _detect_line_notes(self, staff_lines: List[StaffLine], dilate_iterations: int, 
+                           min_contour_area: int, pad_size: int,
+                           max_horizontal_distance: int, overlap_threshold: float,
+                           engine: str = 'contours'):
+        """
+        Detect and group the note contours of each staff line.
+        
+        Yields:
+            Tuple of (line_index, staff_line, (x, y) offset of the staff line, note contours 
+            relative to the staff line, (N, 4) array of their bounding rects), with notes 
+            sorted from left to right.
+        """
+        if engine == 'contours':
+            line_components = self._contour_line_components
+        elif engine == 'components':
+            line_components = self._connected_line_components
+        else:
+            raise ValueError(f"Unknown note engine '{engine}', expected one of {NOTE_ENGINES}")
+        
+        self.cleaned_image = self.remove_staff_lines(self.processed_image)
+        
+        for line_index, staff_line, (x, y), note_contours in line_components(
+                staff_lines, dilate_iterations, min_contour_area, pad_size):
+            
+            note_contours, rects = self._group_components(note_contours,
+                                                          max_horizontal_distance=max_horizontal_distance,
+                                                          overlap_threshold=overlap_threshold)
+            
+            order = np.argsort(rects[:, 0], kind='stable')
+            
+            yield line_index, staff_line, (x, y), [note_contours[i] for i in order], rects[order]
+    
+    def _contour_line_components(self, staff_lines: List[StaffLine], dilate_iterations: int,
+                                 min_contour_area: int, pad_size: int):
+        """
+        Yield the note contours of each staff line found with findContours on the staff
+        crop, masked by the staff contour. The mask only covers the staff bounding box.
+        """
+        for line_index, staff_line in enumerate(staff_lines):
+            x, y, w, h = cv2.boundingRect(staff_line.contour)
+            
+            mask = np.zeros((h, w), dtype=np.uint8)
+            cv2.drawContours(mask, [staff_line.contour], -1, (255), -1, offset=(-x, -y))
+            
+            line_image = cv2.bitwise_and(self.cleaned_image[y:y+h, x:x+w], 
+                                       self.cleaned_image[y:y+h, x:x+w], 
+                                       mask=mask)
+            
+            note_contours = self.find_contours(line_image, 
+                                             dilate_iterations=dilate_iterations,
+                                             min_contour_area=min_contour_area, 
+                                             pad_size=pad_size)
+            
+            yield line_index, staff_line, (x, y), note_contours
+    
+    def _connected_line_components(self, staff_lines: List[StaffLine], dilate_iterations: int,
+                                   min_contour_area: int, pad_size: int = 0):
+        """
+        Yield the note components of each staff line from a single connectedComponentsWithStats
+        pass over the dilated cleaned page.
+        
+        Each component is assigned to the first staff line whose bounding box contains its
+        center (staff lines are ordered by their y-range), and its rect is clipped to the
+        staff bounding box. Components are returned as rect contours. Differences with the
+        contour engine: the area filter uses the pixel count instead of the contour area,
+        dilation is not cut at the staff boundary, and pad_size has no effect.
+        """
+        if not staff_lines:
+            return
+        
+        _, binary = cv2.threshold(self.cleaned_image, 127, 255, cv2.THRESH_BINARY)
+        kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (3, 3))
+        dilated = cv2.dilate(binary, kernel, iterations=dilate_iterations)
+        _, _, stats, _ = cv2.connectedComponentsWithStatsWithAlgorithm(dilated, 8, cv2.CV_32S, cv2.CCL_GRANA)
+        
+        stats = stats[1:]
+        stats = stats[stats[:, cv2.CC_STAT_AREA] > min_contour_area]
+        
+        staff_rects = np.array([cv2.boundingRect(staff_line.contour) for staff_line in staff_lines],
+                               dtype=np.int64).reshape(-1, 4)
+        center_x = (stats[:, 0] + stats[:, 2] // 2)[:, None]
+        center_y = (stats[:, 1] + stats[:, 3] // 2)[:, None]
+        inside = ((center_y >= staff_rects[:, 1]) & (center_y < staff_rects[:, 1] + staff_rects[:, 3]) &
+                  (center_x >= staff_rects[:, 0]) & (center_x < staff_rects[:, 0] + staff_rects[:, 2]))
+        owner = np.where(inside.any(axis=1), inside.argmax(axis=1), -1)
+        
+        for line_index, staff_line in enumerate(staff_lines):
+            x, y, w, h = (int(v) for v in staff_rects[line_index])
+            line_stats = stats[owner == line_index]
+            
+            x0 = np.maximum(line_stats[:, 0], x)
+            y0 = np.maximum(line_stats[:, 1], y)
+            x1 = np.minimum(line_stats[:, 0] + line_stats[:, 2], x + w)
+            y1 = np.minimum(line_stats[:, 1] + line_stats[:, 3], y + h)
+            rects = np.stack([x0 - x, y0 - y, x1 - x0, y1 - y0], axis=1)
+            rects = rects[(rects[:, 2] > 0) & (rects[:, 3] > 0)]
+            
+            yield line_index, staff_line, (x, y), list(self._rect_contours(rects))
+    
+    @staticmethod
+    def _rect_contours(rects: np.ndarray) -> np.ndarray:
+        """Return (N, 4, 1, 2) int32 contours whose cv2.boundingRect are the given (N, 4) rects."""
+        rects = np.asarray(rects, dtype=np.int32).reshape(-1, 4)
+        x_min, y_min = rects[:, 0], rects[:, 1]
+        x_max, y_max = x_min + rects[:, 2] - 1, y_min + rects[:, 3] - 1
+        corners = np.stack([
+            np.stack([x_min, y_min], axis=1),
+            np.stack([x_max, y_min], axis=1),
+            np.stack([x_max, y_max], axis=1),
+            np.stack([x_min, y_max], axis=1),
+        ], axis=1)
+        return corners[:, :, None, :]
+    
     def group_note_components(self, contours: List[np.ndarray], 
                              max_horizontal_distance: int = 10,
                              overlap_threshold: float = 0.8) -> List[np.ndarray]:
@@ -276,67 +501,116 @@ class PParser:
         Returns:
             list: List of merged contours where each group is represented as a single contour.
         """
-        if not contours:
-            return []
+        groups, _ = self._group_components(contours, max_horizontal_distance, overlap_threshold)
+        return groups
 
-        sorted_contours = sorted(contours, key=lambda c: cv2.boundingRect(c)[0])
+    def _group_components(self, contours: List[np.ndarray], max_horizontal_distance: int = 10,
+                          overlap_threshold: float = 0.8) -> Tuple[List[np.ndarray], np.ndarray]:
+        """
+        Group contours like group_note_components and also return the (N, 4) bounding
+        rects of the groups, so callers do not have to recompute them.
+        """
+        rect_list = [cv2.boundingRect(c) for c in contours]
+        rects = np.array(rect_list, dtype=np.int32).reshape(-1, 4)
         groups = []
-        current_group = []
+        group_rects = []
         
-        for contour in sorted_contours:
-            rect = cv2.boundingRect(contour)
-            x, y, w, h = rect
-            
-            if not current_group:
-                current_group = [(contour, rect)]
-                continue
-            
-            last_x = current_group[-1][1][0] + current_group[-1][1][2]  
-
-            horizontal_dist = x - last_x
-            
-            if horizontal_dist > max_horizontal_distance:
-                if current_group:
-                    groups.append(self.__merge_group(current_group))
-                current_group = [(contour, rect)]
-                continue
-            
-            should_merge = False
-            for group_contour, group_rect in current_group:
-                gx, gy, gw, gh = group_rect
-                
-                vertical_overlap = (y <= gy + gh) and (gy <= y + h)
-                
-                if vertical_overlap:
-                    x_left = max(x, gx)
-                    y_top = max(y, gy)
-                    x_right = min(x + w, gx + gw)
-                    y_bottom = min(y + h, gy + gh)
-                    
-                    if x_right >= x_left and y_bottom >= y_top:
-                        intersection_area = (x_right - x_left) * (y_bottom - y_top)
-                        area1 = w * h
-                        area2 = gw * gh
-                        
-                        ratio1 = intersection_area / area1 if area1 > 0 else 0
-                        ratio2 = intersection_area / area2 if area2 > 0 else 0
-                        max_ratio = max(ratio1, ratio2)
-                        
-                        if max_ratio > overlap_threshold or horizontal_dist <= max_horizontal_distance:
-                            should_merge = True
-                            break
-            
-            if should_merge:
-                current_group.append((contour, rect))
+        for members in self._group_rects(rects, max_horizontal_distance, overlap_threshold):
+            if len(members) == 1:
+                groups.append(contours[members[0]])
+                group_rects.append(rect_list[members[0]])
             else:
-                if current_group:
-                    groups.append(self.__merge_group(current_group))
-                current_group = [(contour, rect)]
+                merged = self._merge_rects(rects[members])
+                groups.append(merged)
+                # Same as cv2.boundingRect(merged): corner points are inclusive
+                (x_min, y_min), (x_max, y_max) = merged[0, 0], merged[2, 0]
+                group_rects.append((x_min, y_min, x_max - x_min + 1, y_max - y_min + 1))
         
-        if current_group:
-            groups.append(self.__merge_group(current_group))
+        return groups, np.array(group_rects, dtype=np.int32).reshape(-1, 4)
+
+    @staticmethod
+    def _group_rects(rects: np.ndarray, max_horizontal_distance: int = 10,
+                     overlap_threshold: float = 0.8, window: int = 4) -> List[List[int]]:
+        """
+        Group (N, 4) bounding rects from left to right.
         
-        return groups
+        A rect joins the current group when its gap to the previous rect is at most
+        max_horizontal_distance and it touches (closed intervals) a member of the group.
+        Within that distance the overlap ratio test always passes, so overlap_threshold
+        does not change the result; it is kept for API compatibility.
+        
+        Contacts with the `window` previous rects are computed with array ops, which gives
+        for each rect the latest earlier rect it touches. A sweep over these indices then
+        opens a new group whenever that rect is not part of the current group. Rects
+        that touch nothing in the window are checked against the older group members
+        only when the running maximum of the right edges says such a contact is possible.
+        
+        Args:
+            rects: Array of (x, y, w, h) rects
+            max_horizontal_distance: Maximum gap between consecutive rects of a group
+            overlap_threshold: Unused, see above
+            window: Number of previous rects checked with array ops
+            
+        Returns:
+            list: Lists of indices into rects, one per group, ordered from left to right.
+        """
+        n = len(rects)
+        if n == 0:
+            return []
+
+        order = np.argsort(rects[:, 0], kind='stable')
+        x, y, w, h = (rects[order, k].astype(np.int64) for k in range(4))
+        right, bottom = x + w, y + h
+
+        # latest[i]: index of the latest rect in the window that touches rect i, -1 if none
+        latest = np.full(n, -1, dtype=np.int64)
+        for k in range(1, min(window, n - 1) + 1):
+            i = np.arange(k, n)
+            j = i - k
+            touches = (latest[i] < 0) & (right[j] >= x[i]) & (y[i] <= bottom[j]) & (y[j] <= bottom[i])
+            latest[i[touches]] = j[touches]
+
+        # Rects with no contact in the window may still touch an older, wider rect
+        running_right = np.maximum.accumulate(right)
+        beyond = np.zeros(n, dtype=bool)
+        if n > window + 1:
+            i = np.arange(window + 1, n)
+            beyond[i] = (latest[i] < 0) & (running_right[i - window - 1] >= x[i])
+
+        gap_split = np.concatenate(([True], x[1:] - right[:-1] > max_horizontal_distance))
+
+        order = order.tolist()
+        latest_list, gap_list, beyond_list = latest.tolist(), gap_split.tolist(), beyond.tolist()
+        starts = [0]
+        group_start = 0
+        for i in range(1, n):
+            if gap_list[i]:
+                split = True
+            elif latest_list[i] >= group_start:
+                split = False
+            elif beyond_list[i] and i - window > group_start:
+                older = slice(group_start, i - window)
+                split = not np.any((right[older] >= x[i]) & (y[i] <= bottom[older]) & (y[older] <= bottom[i]))
+            else:
+                split = True
+            if split:
+                starts.append(i)
+                group_start = i
+
+        ends = starts[1:] + [n]
+        return [order[start:end] for start, end in zip(starts, ends)]
+
+    @staticmethod
+    def _merge_rects(rects: np.ndarray) -> np.ndarray:
+        """Return the bounding box of (N, 4) rects as a 4-point contour."""
+        x_min, y_min = rects[:, :2].min(axis=0)
+        x_max, y_max = (rects[:, :2] + rects[:, 2:]).max(axis=0)
+        return np.array([
+            [[x_min, y_min]],
+            [[x_max, y_min]],
+            [[x_max, y_max]],
+            [[x_min, y_max]]
+        ], dtype=np.int32)
 
     def __merge_group(self, group: List[Tuple[np.ndarray, Tuple[int, int, int, int]]]) -> np.ndarray:
         """
@@ -351,17 +625,7 @@ class PParser:
         if len(group) == 1:
             return group[0][0]
         
-        x_min = min(rect[0] for _, rect in group)
-        y_min = min(rect[1] for _, rect in group)
-        x_max = max(rect[0] + rect[2] for _, rect in group)
-        y_max = max(rect[1] + rect[3] for _, rect in group)
-        
-        return np.array([
-            [[x_min, y_min]],
-            [[x_max, y_min]],
-            [[x_max, y_max]],
-            [[x_min, y_max]]
-        ], dtype=np.int32)
+        return self._merge_rects(np.array([rect for _, rect in group]))
     
     def _add_padding(self, image: np.ndarray, pad_size: int = 0) -> np.ndarray:
         """
@@ -402,6 +666,9 @@ class PParser:
         Returns:
             numpy.ndarray: Image with drawn contours and annotations.
         """
+        # imutils.perspective imports scipy.spatial, only load it when drawing
+        from imutils import perspective
+
         orig = image.copy()
         for c in cnts:
             box = cv2.minAreaRect(c)
@@ -0,0 +1,92 @@
+import json
+import struct
+from typing import List
+import numpy as np
+from sonatabene.scoretyping import Detections
+
+# Wire format of a list of Detections:
+#   b"SNBD" | uint32 header length | JSON header | float32 (N, 6) boxes of every image, concatenated
+# The header holds the format version, the class-name table and, per image, its box count and shape.
+MAGIC = b"SNBD"
+VERSION = 1
+MEDIA_TYPE = "application/x-snb-detections"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+_HEADER_LENGTH = struct.Struct("<I")
+
+def encode_detections(detections: List[Detections]) -> bytes:
+    """
+    Serialize detections to the compact binary protocol.
+
+    Only boxes, confidences, classes, the class-name table and the image shapes are sent.
+    The class-name table of the first result is shared by the whole message.
+    """
+    header = {
+        'version': VERSION,
+        'names': {str(k): v for k, v in (detections[0].names if detections else {}).items()},
+        'images': [{'count': len(d), 'shape': list(d.orig_shape)} for d in detections]
+    }
+    header_bytes = json.dumps(header, separators=(',', ':')).encode()
+    boxes = [np.ascontiguousarray(d.data, dtype='<f4').reshape(-1, 6) for d in detections]
+    payload = np.concatenate(boxes).tobytes() if boxes else b""
+    return b"".join((MAGIC, _HEADER_LENGTH.pack(len(header_bytes)), header_bytes, payload))
+
+def decode_detections(buffer: bytes) -> List[Detections]:
+    """
+    Deserialize a message produced by encode_detections.
+
+    The box arrays of the returned detections are read-only views into `buffer`.
+
+    Raises:
+        ValueError: If the buffer is not a detection message or is truncated
+    """
+    if buffer[:len(MAGIC)] != MAGIC:
+        raise ValueError("Not a detection message (bad magic bytes)")
+
+    offset = len(MAGIC)
+    try:
+        (header_length,) = _HEADER_LENGTH.unpack_from(buffer, offset)
+        offset += _HEADER_LENGTH.size
+        header = json.loads(bytes(buffer[offset:offset + header_length]))
+    except (struct.error, ValueError) as e:
+        raise ValueError(f"Corrupted detection message header: {str(e)}")
+    offset += header_length
+    if not isinstance(header, dict):
+        raise ValueError("Corrupted detection message header: not a JSON object")
+
+    if header.get('version') != VERSION:
+        raise ValueError(f"Unsupported detection message version {header.get('version')}")
+
+    missing = [key for key in ('images', 'names') if key not in header]
+    if missing:
+        raise ValueError(f"Corrupted detection message header: missing {', '.join(missing)}")
+    try:
+        counts = [int(image['count']) for image in header['images']]
+        names = {int(k): v for k, v in header['names'].items()}
+        shapes = [tuple(image['shape']) for image in header['images']]
+    except (KeyError, TypeError, ValueError, AttributeError) as e:
+        raise ValueError(f"Corrupted detection message header: {type(e).__name__}: {str(e)}")
+    expected = sum(counts) * 6 * 4
+    if len(buffer) - offset != expected:
+        raise ValueError(f"Truncated detection message: expected {expected} bytes of boxes, got {len(buffer) - offset}")
+
+    boxes = np.frombuffer(buffer, dtype='<f4', count=sum(counts) * 6, offset=offset).reshape(-1, 6)
+    detections = []
+    start = 0
+    for shape, count in zip(shapes, counts):
+        detections.append(Detections(data=boxes[start:start + count], names=names, orig_shape=shape))
+        start += count
+    return detections
+
+def detections_to_json(detections: Detections) -> dict:
+    """Return detections as a JSON-serializable dict (used for NDJSON streaming)."""
+    return {
+        'names': {str(k): v for k, v in detections.names.items()},
+        'shape': list(detections.orig_shape),
+        'boxes': np.round(detections.data.astype(np.float64), 3).tolist()
+    }
+
+def detections_from_json(payload: dict) -> Detections:
+    """Inverse of detections_to_json."""
+    return Detections(data=np.asarray(payload['boxes'], dtype=np.float32).reshape(-1, 6),
+                      names={int(k): v for k, v in payload['names'].items()},
+                      orig_shape=tuple(payload['shape']))
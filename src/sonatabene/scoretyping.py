@@ -1,25 +1,50 @@
 from dataclasses import dataclass, field
 import numpy as np
-from typing import List, Tuple, Optional
-import matplotlib.pyplot as plt
+import cv2
+from typing import Dict, List, Tuple, Optional
 @dataclass
 class StaffLine:
     """Represents a staff line and its associated notes in a music score."""
     index: int
     filename: str
-    image: np.ndarray
     contour: np.ndarray 
     bounds: Tuple[int, int, int, int]
     notes: List['Note'] = field(default_factory=list)
+    page: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """View of the staff line in the shared page buffer (None once pixels are dropped)."""
+        if self.page is None:
+            return None
+        x, y, w, h = self.bounds
+        return self.page[y:y+h, x:x+w]
+
+    def drop_pixels(self) -> None:
+        """Release the page reference of the staff line and its notes, keeping only geometry."""
+        self.page = None
+        for note in self.notes:
+            note.drop_pixels()
     
     def show(self) -> str:
         """Return a string representation of the staff line."""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(10, 4))
         plt.imshow(self.image, cmap='gray')
         plt.axis('off')
         plt.show()
         return f"StaffLine(index={self.index}, filename={self.filename}, notes={len(self.notes)})"
 
+    def to_dict(self) -> dict:
+        """Return the geometry of the staff line and its notes as plain Python types."""
+        return {
+            'index': self.index,
+            'filename': self.filename,
+            'bounds': [int(v) for v in self.bounds],
+            'notes': [note.to_dict() for note in self.notes]
+        }
+
     def get_notes_with_label(self, label: str) -> List['Note']:
         """Get all notes with a specific label.
         
@@ -37,25 +62,203 @@ class Note:
     index: int
     relative_index: int
     line_index: int
-    image: np.ndarray  
     contour: np.ndarray 
     bounds: Tuple[int, int, int, int] 
     full_height_bounds: Tuple[int, int, int, int]
     relative_position: Tuple[int, int] 
     absolute_position: Tuple[int, int] 
     label: Optional[str] = None
+    page: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    @property
+    def image(self) -> Optional[np.ndarray]:
+        """Full staff height view of the note in the shared page buffer (None once pixels are dropped)."""
+        if self.page is None:
+            return None
+        x, y, w, h = self.full_height_bounds
+        return self.page[y:y+h, x:x+w]
+
+    def drop_pixels(self) -> None:
+        """Release the page reference of the note, keeping only geometry."""
+        self.page = None
 
     def show(self) -> str:
         """Return a string representation of the note."""
+        import matplotlib.pyplot as plt
+
         plt.figure(figsize=(2, 2))
         plt.imshow(self.image, cmap='gray')
         plt.axis('off')
         plt.show()
         return f"Note(index={self.index}, shape={self.image.shape}, label={self.label})"
 
+    def to_dict(self) -> dict:
+        """Return the geometry and label of the note as plain Python types."""
+        return {
+            'index': self.index,
+            'relative_index': self.relative_index,
+            'line_index': self.line_index,
+            'bounds': [int(v) for v in self.bounds],
+            'full_height_bounds': [int(v) for v in self.full_height_bounds],
+            'absolute_position': [int(v) for v in self.absolute_position],
+            'label': self.label
+        }
+
     def set_label(self, label: str) -> None:
         """Set the label for this note."""
         self.label = label
+
+NOTE_DTYPE = np.dtype([
+    ('index', np.int32),
+    ('relative_index', np.int32),
+    ('line_index', np.int32),
+    ('bounds', np.int32, (4,)),
+    ('full_height_bounds', np.int32, (4,)),
+    ('relative_position', np.int32, (2,)),
+    ('absolute_position', np.int32, (2,)),
+    ('label_id', np.int32),
+])
+
+@dataclass
+class NoteTable:
+    """Columnar storage of the notes of a page, one structured array row per note."""
+    data: np.ndarray
+    labels: List[str] = field(default_factory=list)
+    page: Optional[np.ndarray] = field(default=None, repr=False, compare=False)
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        """Return a column of the table (e.g. table['line_index'])."""
+        return self.data[column]
+
+    def _subset(self, data: np.ndarray) -> 'NoteTable':
+        return NoteTable(data=data, labels=self.labels, page=self.page)
+
+    def filter(self, mask: np.ndarray) -> 'NoteTable':
+        """Return the rows selected by a boolean mask or an index array."""
+        return self._subset(self.data[mask])
+
+    def sort(self, *columns: str) -> 'NoteTable':
+        """
+        Return the table sorted by one or more columns (first column is the primary key).
+
+        Vector columns are sorted on their first component, so 'bounds' sorts by x.
+        """
+        keys = []
+        for column in reversed(columns):
+            values = self.data[column]
+            keys.append(values[:, 0] if values.ndim > 1 else values)
+        return self._subset(self.data[np.lexsort(keys)] if keys else self.data)
+
+    def for_line(self, line_index: int) -> 'NoteTable':
+        """Return the notes of a single staff line."""
+        return self.filter(self.data['line_index'] == line_index)
+
+    def set_labels(self, labels: List[Optional[str]]) -> None:
+        """Set one label per row (None for unlabelled notes)."""
+        vocabulary = {label: i for i, label in enumerate(self.labels)}
+        ids = np.empty(len(labels), dtype=np.int32)
+        for row, label in enumerate(labels):
+            if label is None:
+                ids[row] = -1
+            else:
+                ids[row] = vocabulary.setdefault(label, len(vocabulary))
+        self.labels = list(vocabulary)
+        self.data['label_id'] = ids
+
+    def label_of(self, row: int) -> Optional[str]:
+        """Return the label of a row, or None if it is unlabelled."""
+        label_id = int(self.data['label_id'][row])
+        return self.labels[label_id] if label_id >= 0 else None
+
+    def to_notes(self) -> List['Note']:
+        """
+        Convert the rows to Note objects.
+
+        The table does not store contours, so each note gets its bounding rectangle as contour,
+        with inclusive corners so that cv2.boundingRect gives back the bounds.
+        """
+        notes = []
+        for row, record in enumerate(self.data):
+            x, y, w, h = (int(v) for v in record['bounds'])
+            notes.append(Note(
+                index=int(record['index']),
+                relative_index=int(record['relative_index']),
+                line_index=int(record['line_index']),
+                contour=np.array([[[x, y]], [[x + w - 1, y]], [[x + w - 1, y + h - 1]], [[x, y + h - 1]]],
+                                 dtype=np.int32),
+                bounds=(x, y, w, h),
+                full_height_bounds=tuple(int(v) for v in record['full_height_bounds']),
+                relative_position=tuple(int(v) for v in record['relative_position']),
+                absolute_position=tuple(int(v) for v in record['absolute_position']),
+                label=self.label_of(row),
+                page=self.page
+            ))
+        return notes
+
+    @classmethod
+    def from_notes(cls, notes: List['Note'], page: Optional[np.ndarray] = None) -> 'NoteTable':
+        """Build a table from Note objects."""
+        data = np.zeros(len(notes), dtype=NOTE_DTYPE)
+        for row, note in enumerate(notes):
+            data[row] = (note.index, note.relative_index, note.line_index, note.bounds,
+                         note.full_height_bounds, note.relative_position, note.absolute_position, -1)
+        table = cls(data=data, page=page if page is not None else (notes[0].page if notes else None))
+        table.set_labels([note.label for note in notes])
+        return table
+
+@dataclass
+class Detections:
+    """
+    Compact YOLO detections of one image, without tensors or the source image.
+
+    `data` holds one (x1, y1, x2, y2, conf, cls) row per box, like ultralytics' Boxes.data.
+    `boxes` returns the object itself so code written for ultralytics Results
+    (result.boxes.cls, result.boxes.data, result.names) works unchanged.
+    """
+    data: np.ndarray
+    names: Dict[int, str]
+    orig_shape: Tuple[int, int]
+
+    @classmethod
+    def from_result(cls, result) -> 'Detections':
+        """Build detections from an ultralytics Results object."""
+        data = result.boxes.data
+        data = data.cpu().numpy() if hasattr(data, 'cpu') else np.asarray(data)
+        return cls(data=np.ascontiguousarray(data[:, :6], dtype=np.float32).reshape(-1, 6),
+                   names={int(k): str(v) for k, v in result.names.items()},
+                   orig_shape=tuple(int(v) for v in result.orig_shape))
+
+    @property
+    def boxes(self) -> 'Detections':
+        return self
+
+    @property
+    def xyxy(self) -> np.ndarray:
+        return self.data[:, :4]
+
+    @property
+    def conf(self) -> np.ndarray:
+        return self.data[:, 4]
+
+    @property
+    def cls(self) -> np.ndarray:
+        return self.data[:, 5]
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def plot(self, image: np.ndarray) -> np.ndarray:
+        """Return a copy of the image with the boxes and their class names drawn on it."""
+        annotated = image.copy()
+        for x1, y1, x2, y2, conf, cls in self.data:
+            cv2.rectangle(annotated, (int(x1), int(y1)), (int(x2), int(y2)), (0, 0, 255), 2)
+            cv2.putText(annotated, f"{self.names.get(int(cls), int(cls))} {conf:.2f}", (int(x1), max(int(y1) - 4, 0)),
+                        cv2.FONT_HERSHEY_SIMPLEX, 0.4, (0, 0, 255), 1)
+        return annotated
+
 @dataclass
 class Key:
     """Represents a key signature in a music score."""
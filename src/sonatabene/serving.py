@@ -0,0 +1,381 @@
+import asyncio
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import AsyncIterable, AsyncIterator, Deque, Dict, Iterable, List, Optional, Tuple, Union
+import cv2
+import numpy as np
+from sonatabene.scoretyping import Detections
+
+class ServiceOverloaded(Exception):
+    """Raised when the inference queue is full; the caller should retry later."""
+
+@dataclass
+class _Request:
+    image: Union[np.ndarray, bytes]
+    kwargs: dict
+    future: Future
+    enqueued: float = field(default_factory=time.perf_counter)
+
+class BatchMetrics:
+    """
+    Running statistics of the micro-batches: batch sizes, fill rate, time requests spent
+    waiting for their batch and forward pass durations (the last `window` of each).
+    """
+
+    def __init__(self, max_batch_size: int, window: int = 1024):
+        self.max_batch_size = max_batch_size
+        self.batches = 0
+        self.requests = 0
+        self.sizes: Counter = Counter()
+        self.queue_waits: Deque[float] = deque(maxlen=window)
+        self.inference_times: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, waits: List[float], inference_time: float) -> None:
+        with self._lock:
+            self.batches += 1
+            self.requests += len(waits)
+            self.sizes[len(waits)] += 1
+            self.queue_waits.extend(waits)
+            self.inference_times.append(inference_time)
+
+    @staticmethod
+    def _percentiles(samples: Deque[float]) -> Dict[str, float]:
+        if not samples:
+            return {'mean_ms': 0.0, 'p50_ms': 0.0, 'p99_ms': 0.0}
+        values = np.fromiter(samples, dtype=np.float64) * 1000
+        return {'mean_ms': float(values.mean()), 'p50_ms': float(np.percentile(values, 50)),
+                'p99_ms': float(np.percentile(values, 99))}
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                'batches': self.batches,
+                'requests': self.requests,
+                'mean_batch_size': self.requests / self.batches if self.batches else 0.0,
+                'fill_rate': self.requests / (self.batches * self.max_batch_size) if self.batches else 0.0,
+                'batch_sizes': dict(sorted(self.sizes.items())),
+                'queue_wait': self._percentiles(self.queue_waits),
+                'inference': self._percentiles(self.inference_times),
+            }
+
+class InferenceService:
+    """
+    Run YOLO inference off the event loop on a fixed set of worker threads, with
+    dynamic micro-batching.
+
+    Requests are queued and each worker takes up to `max_batch_size` of them per forward
+    pass. After taking the first request, a worker waits at most `batch_window_ms` for more
+    to arrive before running the batch. When every worker has a full batch and `max_queue`
+    more requests are waiting, new ones are rejected right away with ServiceOverloaded
+    instead of piling up, which keeps the latency of accepted requests bounded.
+
+    With a single worker the model comes from the process-wide registry. With more, each
+    worker thread loads its own copy, as ultralytics models must not be shared by threads
+    that predict concurrently. `backend` selects PyTorch or an exported model (see
+    sonatabene.model.BACKENDS); the static OpenCV DNN model runs one image per batch.
+    """
+
+    def __init__(self, model_path: str, workers: int = 1, max_queue: int = 8,
+                 max_batch_size: int = 1, batch_window_ms: float = 0.0,
+                 device: Optional[str] = None, half: bool = False, backend: str = "torch", **predict_kwargs):
+        self.model_path = model_path
+        self.backend = backend
+        self.workers = max(workers, 1)
+        self.max_queue = max_queue
+        self.max_batch_size = 1 if backend == "opencv" else max(max_batch_size, 1)
+        self.batch_window = batch_window_ms / 1000
+        self.device = device
+        self.half = half
+        self.predict_kwargs = {'verbose': False, **predict_kwargs, **({'dnn': True} if backend == "opencv" else {})}
+        self.metrics = BatchMetrics(self.max_batch_size)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._queue: Deque[_Request] = deque()
+        self._threads: List[threading.Thread] = []
+        self._loaded = 0
+        self._load_error: Optional[BaseException] = None
+        self._closed = False
+        self._running = 0
+        self._in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _model(self):
+        """Return the model used by the current worker thread."""
+        from sonatabene.model import export_model, get_model, ModelRegistry
+
+        imgsz = self.predict_kwargs.get('imgsz') or 640
+        if self.workers == 1:
+            return get_model(self.model_path, device=self.device, half=self.half, backend=self.backend, imgsz=imgsz)
+        if not hasattr(self._local, 'registry'):
+            self._local.registry = ModelRegistry(max_models=1)
+        model_path = export_model(self.model_path, self.backend, imgsz=imgsz, half=self.half)
+        return self._local.registry.get(model_path, device=self.device, half=self.half)
+
+    def _infer(self, images: List[np.ndarray], **kwargs) -> List[Detections]:
+        """Run one forward pass on a list of images (called on a worker thread)."""
+        results = self._model().predict(images, **{**self.predict_kwargs, **kwargs})
+        return [Detections.from_result(result) for result in results]
+
+    def start(self) -> None:
+        """Start the worker threads (done on first use if not called explicitly)."""
+        with self._lock:
+            if self._threads or self._closed:
+                return
+            self._threads = [threading.Thread(target=self._worker, name=f"snb-inference-{i}", daemon=True)
+                             for i in range(self.workers)]
+        for thread in self._threads:
+            thread.start()
+
+    def _load_failure(self) -> RuntimeError:
+        error = RuntimeError(f"Could not load {self.model_path}")
+        error.__cause__ = self._load_error
+        return error
+
+    def _worker(self) -> None:
+        try:
+            self._model()
+        except BaseException as e:
+            with self._wakeup:
+                self._load_error = e
+                queued, self._queue = self._queue, deque()
+                self._wakeup.notify_all()
+            # Nothing will serve the queued requests any more
+            for request in queued:
+                if request.future.set_running_or_notify_cancel():
+                    request.future.set_exception(self._load_failure())
+            raise
+        with self._wakeup:
+            self._loaded += 1
+            self._wakeup.notify_all()
+
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run_batch(batch)
+
+    def _next_batch(self) -> Optional[List[_Request]]:
+        """Wait for requests and take the next batch off the queue (None once closed)."""
+        with self._wakeup:
+            while True:
+                while not self._queue and not self._closed:
+                    self._wakeup.wait()
+                if not self._queue:
+                    return None
+
+                deadline = self._queue[0].enqueued + self.batch_window
+                while self._queue and len(self._queue) < self.max_batch_size and not self._closed:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._wakeup.wait(remaining)
+                if not self._queue:
+                    # Another worker took the requests while this one was waiting
+                    continue
+
+                # Requests with other prediction arguments stay queued for a later batch
+                kwargs = self._queue[0].kwargs
+                batch, waiting = [], deque()
+                for request in self._queue:
+                    if len(batch) < self.max_batch_size and request.kwargs == kwargs:
+                        batch.append(request)
+                    else:
+                        waiting.append(request)
+                self._queue = waiting
+                self._running += len(batch)
+                return batch
+
+    def _run_batch(self, batch: List[_Request]) -> None:
+        start = time.perf_counter()
+        waits = [start - request.enqueued for request in batch]
+        try:
+            ready, images = [], []
+            for request in batch:
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    image = request.image
+                    images.append(decode_image(image) if isinstance(image, (bytes, bytearray, memoryview)) else image)
+                    ready.append(request)
+                except ValueError as e:
+                    request.future.set_exception(e)
+
+            if ready:
+                try:
+                    results = self._infer(images, **ready[0].kwargs)
+                except Exception as e:
+                    for request in ready:
+                        request.future.set_exception(e)
+                else:
+                    for request, result in zip(ready, results):
+                        request.future.set_result([result])
+        finally:
+            self.metrics.record(waits, time.perf_counter() - start)
+            with self._lock:
+                self._running -= len(batch)
+
+    @property
+    def capacity(self) -> int:
+        """Number of requests accepted at once: full batches on every worker plus the queue."""
+        return self.workers * self.max_batch_size + self.max_queue
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    async def predict(self, image: Union[np.ndarray, bytes], **kwargs) -> List[Detections]:
+        """
+        Predict on an image (a decoded array or encoded image bytes) without blocking the loop.
+
+        Raises:
+            ServiceOverloaded: If `capacity` requests are already in flight
+            ValueError: If the image bytes cannot be decoded
+            RuntimeError: If the service is shut down or the model could not be loaded
+        """
+        self.start()
+        request = _Request(image=image, kwargs=kwargs, future=Future())
+        with self._wakeup:
+            if self._closed:
+                raise RuntimeError("Inference service is shut down")
+            if self._load_error is not None:
+                raise self._load_failure()
+            if self._in_flight >= self.capacity:
+                self.rejected += 1
+                raise ServiceOverloaded(f"Inference queue is full ({self._in_flight} requests in flight)")
+            self._in_flight += 1
+            self._queue.append(request)
+            self._wakeup.notify_all()
+        request.future.add_done_callback(self._release)
+        return await asyncio.wrap_future(request.future)
+
+    async def _predict_retrying(self, image: Union[np.ndarray, bytes, Exception], retry_timeout: float,
+                                **kwargs) -> Union[List[Detections], Exception]:
+        """Predict on an image, retrying on backpressure; failures are returned, not raised."""
+        if isinstance(image, Exception):
+            return image
+        deadline = time.perf_counter() + retry_timeout
+        while True:
+            try:
+                return await self.predict(image, **kwargs)
+            except ServiceOverloaded as e:
+                if time.perf_counter() >= deadline:
+                    return e
+                await asyncio.sleep(0.01)
+            except Exception as e:
+                return e
+
+    async def predict_many(self, images: Union[Iterable, AsyncIterable], retry_timeout: float = 30.0,
+                           **kwargs) -> AsyncIterator[Tuple[int, Union[List[Detections], Exception]]]:
+        """
+        Predict on many images and yield (index, result) pairs as soon as each is done.
+
+        At most one full batch per worker is submitted at a time, so a large upload fills
+        batches without taking the whole queue. `images` may be an async iterable: it is
+        only advanced when a slot frees up, so pages produced lazily (e.g. rendered from a
+        PDF) are not all held in memory. Submissions rejected by backpressure are retried
+        for up to `retry_timeout` seconds. Failures are yielded as the exception of the
+        item instead of being raised, and items that already are exceptions are yielded
+        back as is.
+        """
+        limit = asyncio.Semaphore(self.workers * self.max_batch_size)
+        results: asyncio.Queue = asyncio.Queue()
+        pending = set()
+
+        async def run(index: int, image: Union[np.ndarray, bytes, Exception]):
+            try:
+                results.put_nowait((index, await self._predict_retrying(image, retry_timeout, **kwargs)))
+            finally:
+                limit.release()
+
+        async def produce():
+            try:
+                index = 0
+                async for image in _aiter(images):
+                    await limit.acquire()
+                    task = asyncio.ensure_future(run(index, image))
+                    pending.add(task)
+                    task.add_done_callback(pending.discard)
+                    index += 1
+                    del image
+                await asyncio.gather(*pending)
+                results.put_nowait(None)
+            except Exception as e:
+                results.put_nowait(e)
+
+        producer = asyncio.ensure_future(produce())
+        try:
+            while True:
+                item = await results.get()
+                if item is None:
+                    return
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            producer.cancel()
+            for task in list(pending):
+                task.cancel()
+
+    def warmup(self) -> None:
+        """Start the workers and wait until each of them has loaded its model."""
+        self.start()
+        with self._wakeup:
+            while self._loaded < self.workers and self._load_error is None:
+                self._wakeup.wait()
+            if self._load_error is not None:
+                raise self._load_failure()
+
+    def health(self) -> Dict[str, Union[int, bool, str]]:
+        """Readiness and queue depth of the service."""
+        with self._lock:
+            queue_depth = len(self._queue)
+            return {
+                'status': 'overloaded' if self._in_flight >= self.capacity else 'ok',
+                'ready': self._loaded == self.workers,
+                'workers': self.workers,
+                'running': self._running,
+                'queue_depth': queue_depth,
+                'max_queue': self.max_queue,
+                'completed': self.completed,
+                'failed': self.failed,
+                'cancelled': self.cancelled,
+                'rejected': self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        """Stop the workers once the queued requests are served."""
+        with self._wakeup:
+            self._closed = True
+            self._wakeup.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+async def _aiter(items: Union[Iterable, AsyncIterable]) -> AsyncIterator:
+    """Iterate over a sync or an async iterable."""
+    if hasattr(items, '__aiter__'):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+def decode_image(buffer: Union[bytes, bytearray, memoryview]) -> np.ndarray:
+    """Decode encoded image bytes to a BGR array."""
+    image = cv2.imdecode(np.frombuffer(buffer, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise ValueError("Could not decode the image.")
+    return image
@@ -0,0 +1,120 @@
+from typing import List, Optional, Tuple, Union
+import cv2
+import numpy as np
+from sonatabene.cache import ParseCache
+from sonatabene.parser import PParser, DEFAULT_PARSE_PARAMS
+from sonatabene.utils import StageTimer
+
+# Stages reported by a transcription, in pipeline order
+STAGES = ('parse', 'inference', 'abc', 'music21', 'render')
+
+OUTPUT_FORMATS = {
+    'abc': 'text/vnd.abc; charset=utf-8',
+    'midi': 'audio/midi',
+    'musicxml': 'application/vnd.recordare.musicxml+xml',
+}
+
+def staff_crops(image: Union[str, np.ndarray], params: Optional[dict] = None,
+                cache: Optional[ParseCache] = None) -> List[np.ndarray]:
+    """
+    Detect the staff lines of a page and return their BGR crops, top to bottom.
+
+    Args:
+        image: Path to the page or decoded page
+        params: Detection parameters, see DEFAULT_PARSE_PARAMS
+        cache: Optional ParseCache to skip detection on pages seen before
+
+    Returns:
+        List[np.ndarray]: One crop per staff line, ready for YOLO
+    """
+    params = {**DEFAULT_PARSE_PARAMS, **(params or {})}
+    parser = PParser()
+    parser.load_image(image)
+    key = cache.key(parser.image, {'staff_only': True, **params}) if cache is not None else None
+    staff_lines = cache.get(key, filename=parser.filename, page=parser.image) if cache is not None else None
+    if staff_lines is None:
+        staff_lines = parser.find_staff_lines(
+            dilate_iterations=params['staff_dilate_iterations'],
+            min_contour_area=params['staff_min_contour_area'],
+            pad_size=params['staff_pad_size']
+        )
+        if cache is not None:
+            cache.put(key, staff_lines)
+    return [cv2.cvtColor(staff_line.image, cv2.COLOR_GRAY2BGR) for staff_line in staff_lines]
+
+def render_score(abc: str, output_format: str = 'midi', instrument: str = 'piano', tempo_bpm: int = 120,
+                 timer: Optional[StageTimer] = None) -> Tuple[bytes, str]:
+    """
+    Build the music21 score of an ABC string and render it.
+
+    The 'music21' stage covers parsing the ABC and applying the instrument and tempo,
+    the 'render' stage the serialization to the output format.
+
+    Args:
+        abc: ABC notation, as returned by yolo_to_abc
+        output_format: One of OUTPUT_FORMATS
+        instrument: Instrument name, see INSTRUMENT_MAP
+        tempo_bpm: Tempo in beats per minute
+        timer: Optional StageTimer recording the stages
+
+    Returns:
+        Tuple[bytes, str]: The rendered score and its media type
+    """
+    from music21 import midi
+    from music21.musicxml.m21ToXml import GeneralObjectExporter
+    from sonatabene.converter.converter_abc import abc_conversion
+
+    if output_format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{output_format}', expected one of {list(OUTPUT_FORMATS)}")
+    timer = timer or StageTimer()
+
+    if output_format == 'abc':
+        with timer.stage('render'):
+            return abc.encode('utf-8'), OUTPUT_FORMATS['abc']
+
+    with timer.stage('music21'):
+        score = abc_conversion(abc, instrument, tempo_bpm)
+    with timer.stage('render'):
+        if output_format == 'midi':
+            content = midi.translate.streamToMidiFile(score).writestr()
+        else:
+            content = GeneralObjectExporter(score).parse()
+    return content, OUTPUT_FORMATS[output_format]
+
+def transcribe(image: Union[str, np.ndarray], model_path: str = "models/chopin.pt", output_format: str = 'midi',
+               instrument: str = 'piano', tempo_bpm: int = 120, params: Optional[dict] = None,
+               timer: Optional[StageTimer] = None, **predict_kwargs) -> Tuple[bytes, str]:
+    """
+    Run the whole image to music pipeline: staff detection, YOLO, ABC and rendering.
+
+    Args:
+        image: Path to the page or decoded page
+        model_path: Path to the YOLO weights
+        output_format: One of OUTPUT_FORMATS
+        instrument: Instrument name, see INSTRUMENT_MAP
+        tempo_bpm: Tempo in beats per minute
+        params: Detection parameters, see DEFAULT_PARSE_PARAMS
+        timer: Optional StageTimer recording the STAGES
+        **predict_kwargs: Additional prediction arguments (conf, iou, batch_size, ...)
+
+    Returns:
+        Tuple[bytes, str]: The rendered score and its media type
+    """
+    from sonatabene.model import predict_batch
+    from sonatabene.converter.converter_yolo import yolo_to_abc
+
+    timer = timer or StageTimer()
+    with timer.stage('parse'):
+        crops = staff_crops(image, params=params)
+    if not crops:
+        raise ValueError("No staff lines detected in the image.")
+    with timer.stage('inference'):
+        predictions = predict_batch(crops, model_path=model_path, **predict_kwargs)
+    with timer.stage('abc'):
+        abc = yolo_to_abc(predictions)
+    return render_score(abc, output_format, instrument=instrument, tempo_bpm=tempo_bpm, timer=timer)
+
+def server_timing(timer: StageTimer) -> str:
+    """Format stage durations as a Server-Timing header value (durations in milliseconds)."""
+    durations = timer.as_dict()
+    return ", ".join(f"{stage};dur={durations[stage] * 1000:.1f}" for stage in STAGES if stage in durations)
@@ -1,5 +1,4 @@
 import numpy as np
-import pandas as pd
 import cv2
 import csv
 from pathlib import Path
@@ -11,6 +10,35 @@ from tqdm import tqdm
 import loguru
 import shutil
 import platform
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Dict
+
+def current_rss() -> int:
+    """Return the resident set size of the current process in bytes (0 if unavailable)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return 0
+
+class StageTimer:
+    """Accumulate wall-clock durations (in seconds) of named processing stages."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = defaultdict(float)
+
+    @contextmanager
+    def stage(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] += time.perf_counter() - start
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(self.durations)
 
 def imreshape(image: np.ndarray, shape: int = 128):
     return cv2.resize(image, (shape, shape))
@@ -37,8 +65,8 @@ def generate_detection_csv(staff_lines_list: List[List[StaffLine]],
             for staff in staff_lines:
                 if include_staff:
                     x, y, w, h = staff.bounds
-                    width = staff.image.shape[1]
-                    height = staff.image.shape[0]
+                    width = w
+                    height = h
                     label = "staff"
                     
                     writer.writerow([
@@ -53,8 +81,8 @@ def generate_detection_csv(staff_lines_list: List[List[StaffLine]],
                     ])                
                 for note in staff.notes:
                     x, y, w, h = note.full_height_bounds
-                    width = note.image.shape[1]
-                    height = note.image.shape[0]
+                    width = w
+                    height = h
                     label = note.label if note.label else "note"
                     
                     writer.writerow([
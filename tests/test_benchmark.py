@@ -0,0 +1,50 @@
+import contextlib
+import os
+import pytest
+import sonatabene.benchmark as benchmark
+from sonatabene.benchmark import PIPELINE_STAGES, compare_to_baseline, pipeline_report
+
+def test_pipeline_report():
+    samples = [{stage: 0.001 * (i + 1) for stage in PIPELINE_STAGES} for i in range(10)]
+    report = pipeline_report(samples, elapsed=2.0, peak_rss=512 * 1024 ** 2)
+    assert report['load_image_p50_ms'] == pytest.approx(5.5)
+    assert report['end_to_end_p95_ms'] == pytest.approx(9.55 * len(PIPELINE_STAGES))
+    assert report['pages_per_s'] == 5.0 and report['peak_rss_mb'] == 512
+
+    empty = pipeline_report([], elapsed=1.0, peak_rss=0)
+    assert empty['predict_p50_ms'] is None and empty['pages_per_s'] == 0
+
+def test_compare_to_baseline():
+    baseline = {'find_notes_p50_ms': 100.0, 'predict_p95_ms': 50.0, 'pages_per_s': 10.0, 'peak_rss_mb': 300.0,
+                'abc_to_midi_p50_ms': None}
+    current = {'find_notes_p50_ms': 105.0, 'predict_p95_ms': 60.0, 'pages_per_s': 8.0, 'peak_rss_mb': 250.0}
+    rows = {row['metric']: row for row in compare_to_baseline(current, baseline, threshold=0.1)}
+    assert set(rows) == {'find_notes_p50_ms', 'predict_p95_ms', 'pages_per_s', 'peak_rss_mb'}
+    assert [name for name, row in rows.items() if row['regression']] == ['predict_p95_ms', 'pages_per_s']
+    assert rows['pages_per_s']['change'] == pytest.approx(-0.2)
+    # A looser threshold tolerates the slowdown
+    assert not any(row['regression'] for row in compare_to_baseline(current, baseline, threshold=0.25))
+
+def test_bench_pipeline_drops_pages_that_fail(monkeypatch):
+    calls = {}
+
+    def run_pipeline(path, *args, timer=None, **kwargs):
+        calls[path] = calls.get(path, 0) + 1
+        if path == "flaky.png" and calls[path] == 3:
+            raise ValueError("No staff lines detected")
+        for stage in PIPELINE_STAGES:
+            with timer.stage(stage) if timer is not None else contextlib.nullcontext():
+                pass
+
+    monkeypatch.setattr(benchmark, "run_pipeline", run_pipeline)
+    report = benchmark.bench_pipeline(["good.png", "flaky.png"], repeat=3, warmup=1)
+    # The timed runs of flaky.png that succeeded before its failure are not counted
+    assert report['settings']['runs'] == 3
+    assert report['failures'] == {"flaky.png": "ValueError: No staff lines detected"}
+    assert report['metrics']['pages_per_s'] > 0
+
+def test_default_images_do_not_depend_on_cwd(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    images = benchmark.default_images()
+    assert images and all(os.path.isfile(path) for path in images)
+    assert set(benchmark.default_images(samples=False)) < set(images)
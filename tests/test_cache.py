@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sonatabene.cache import PredictionCache
+from sonatabene.scoretyping import Detections
+
+@pytest.fixture
+def detections():
+    data = np.array([[1, 2, 10, 20, 0.9, 3], [5, 6, 15, 30, 0.5, 1]], dtype=np.float32)
+    return Detections(data=data, names={1: 'note', 3: 'clef'}, orig_shape=(40, 100))
+
+def test_prediction_cache_key(tmp_path):
+    weights = tmp_path / "model.pt"
+    weights.write_bytes(b"weights")
+    crop = np.zeros((40, 100, 3), dtype=np.uint8)
+
+    key = PredictionCache.key(crop, str(weights), conf=0.5, iou=0.7, imgsz=640, verbose=False)
+    assert key == PredictionCache.key(crop, str(weights), conf=0.5, iou=0.7, imgsz=640)
+    assert key != PredictionCache.key(crop, str(weights), conf=0.4, iou=0.7, imgsz=640)
+    assert key != PredictionCache.key(crop + 1, str(weights), conf=0.5, iou=0.7, imgsz=640)
+    assert key == PredictionCache.key(crop, str(weights), conf=0.5, iou=0.7, imgsz=640, half=False)
+    assert key != PredictionCache.key(crop, str(weights), conf=0.5, iou=0.7, imgsz=640, half=True)
+
+    weights.write_bytes(b"other weights")
+    assert key != PredictionCache.key(crop, str(weights), conf=0.5, iou=0.7, imgsz=640)
+
+def test_prediction_cache_tiers(tmp_path, detections):
+    cache = PredictionCache(str(tmp_path), max_entries=1)
+    assert cache.get("a") is None
+    cache.put("a", detections)
+    cache.put("b", detections)
+
+    # "a" was evicted from memory but is still on disk
+    restored = cache.get("a")
+    assert np.array_equal(restored.boxes.data, detections.data)
+    assert restored.names == detections.names and restored.orig_shape == (40, 100)
+    assert restored.boxes.cls.tolist() == [3.0, 1.0]
+    assert cache.get("a") is restored
+
+    assert cache.stats()['memory_hits'] == 1
+    assert cache.stats()['disk_hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+def test_prediction_cache_memory_only(detections):
+    cache = PredictionCache(cache_dir=None, max_entries=2)
+    cache.put("a", detections)
+    assert cache.get("a") is detections
+    assert cache.get("b") is None
+    assert cache.stats()['misses'] == 1 and cache.stats()['disk_bytes'] == 0
@@ -0,0 +1,134 @@
+import asyncio
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pytest
+from sonatabene.client import AsyncPredictionClient, PredictionClient, parse_server_timing
+from sonatabene.protocol import encode_detections, MEDIA_TYPE
+from sonatabene.scoretyping import Detections
+
+class FakeAPI(BaseHTTPRequestHandler):
+    """/predict/ endpoint answering one empty detection, after `server.failures` 503s."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        server = self.server
+        body = self.rfile.read(int(self.headers['Content-Length']))
+        with server.lock:
+            server.bodies.append(body)
+            server.ports.add(self.client_address[1])
+            server.running += 1
+            server.max_running = max(server.max_running, server.running)
+            fail = server.failures > 0
+            server.failures -= fail
+        time.sleep(server.delay)
+        with server.lock:
+            server.running -= 1
+
+        if fail:
+            self.send_response(503)
+            self.send_header('Retry-After', '0')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        payload = encode_detections([Detections(data=np.zeros((0, 6), dtype=np.float32), names={0: 'note'},
+                                                orig_shape=(len(body), 1))])
+        self.send_response(200)
+        self.send_header('Content-Type', MEDIA_TYPE)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+@pytest.fixture
+def api():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeAPI)
+    server.lock = threading.Lock()
+    server.bodies, server.ports = [], set()
+    server.running = server.max_running = server.failures = 0
+    server.delay = 0.0
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_reuses_connections_and_uploads_raw_bytes(api, tmp_path):
+    path = tmp_path / "page.png"
+    path.write_bytes(b"not decoded by the client")
+
+    with PredictionClient(f"http://127.0.0.1:{api.server_port}") as client:
+        for _ in range(4):
+            detections = client.predict(path)
+        client.predict(b"raw bytes")
+
+    assert len(api.bodies) == 5 and len(api.ports) == 1
+    assert b"not decoded by the client" in api.bodies[0]
+    assert b"raw bytes" in api.bodies[-1]
+    assert detections[0].names == {0: 'note'}
+
+def test_retries_overloaded_requests(api):
+    api.failures = 2
+    with PredictionClient(f"http://127.0.0.1:{api.server_port}", backoff=0.0) as client:
+        assert len(client.predict(b"image")) == 1
+    assert len(api.bodies) == 3
+
+    api.failures = 5
+    with PredictionClient(f"http://127.0.0.1:{api.server_port}", retries=1, backoff=0.0) as client:
+        with pytest.raises(Exception, match="503"):
+            client.predict(b"image")
+
+def test_limits_requests_in_flight(api):
+    api.delay = 0.05
+    url = f"http://127.0.0.1:{api.server_port}"
+    images = [b"x" * (i + 1) for i in range(6)]
+
+    with PredictionClient(url, max_in_flight=2) as client:
+        # The fake API echoes the upload size, which grows with the input index
+        sizes = [detections[0].orig_shape[0] for detections in client.predict_many(images)]
+        assert sizes == sorted(sizes) and len(set(sizes)) == 6
+        assert api.max_running == 2
+
+    async def main():
+        async with AsyncPredictionClient(url, max_in_flight=3) as client:
+            return [index async for index, _ in client.predict_many(images)]
+
+    api.max_running = 0
+    assert sorted(asyncio.run(main())) == list(range(6))
+    assert api.max_running == 3
+
+def test_async_client_retries(api):
+    api.failures = 1
+
+    async def main():
+        async with AsyncPredictionClient(f"http://127.0.0.1:{api.server_port}", backoff=0.0) as client:
+            return await client.predict(np.zeros((4, 4, 3), dtype=np.uint8))
+
+    assert len(asyncio.run(main())) == 1
+    assert len(api.bodies) == 2
+
+def test_read_timeouts_are_wrapped_and_not_retried(api):
+    api.delay = 0.3
+    url = f"http://127.0.0.1:{api.server_port}"
+    image = np.zeros((4, 4, 3), dtype=np.uint8)
+    with PredictionClient(url, timeout=(1.0, 0.05), backoff=0.0) as client:
+        with pytest.raises(Exception, match="API request failed"):
+            client.predict(image)
+
+    async def main():
+        async with AsyncPredictionClient(url, timeout=(1.0, 0.05), backoff=0.0) as client:
+            await client.predict(image)
+
+    with pytest.raises(Exception, match="ReadTimeout"):
+        asyncio.run(main())
+    time.sleep(0.3)
+    assert len(api.bodies) == 2
+
+def test_parse_server_timing():
+    assert parse_server_timing("parse;dur=12.5, inference;dur=40.0, abc;desc=x;dur=1") == \
+        {'parse': 12.5, 'inference': 40.0, 'abc': 1.0}
+    assert parse_server_timing("") == {}
@@ -0,0 +1,141 @@
+import gc
+import weakref
+import pytest
+from sonatabene.benchmark import synthetic_mei, synthetic_mei_zip
+from zipfile import ZipFile
+from sonatabene.converter.convert_xml import (
+    BaseMEIConverter, XMLMEIConverter, RegexMEIConverter, IterparseMEIConverter, convert_zip, iter_convert_zip, note_label,
+    benchmark_converters, compare_converters
+)
+
+MEI = """<mei><music><body><mdiv><score>
+<scoreDef key.sig="1f" meter.count="3" meter.unit="4">
+<staffGrp><staffDef n="1" lines="5" clef.shape="G" clef.line="2"/></staffGrp>
+<keySig sig="1f"/><meterSig count="3" unit="4"/>
+</scoreDef>
+<section><staff n="1"><layer n="1">
+<measure n="1"><note pname="c" oct="4" dur="4"/><beam><note pname="d" oct="5" dur="8" accid="s"/><note pname="e" oct="5" dur="8" dots="1"/></beam><rest dur="4"/></measure>
+<measure n="2"><note pname="f" oct="4" dur="32" dots="1"/><rest dur="2"/></measure>
+</layer></staff></section>
+</score></mdiv></body></music></mei>"""
+
+@pytest.mark.parametrize('converter_class', [XMLMEIConverter, RegexMEIConverter, IterparseMEIConverter])
+def test_mei_to_abc(converter_class):
+    converter = converter_class(content=MEI)
+    abc = converter.mei_to_abc()
+
+    assert converter.score_def.meter_count == 3 and converter.score_def.clef == "G2"
+    assert sorted(converter.notes_labels) == sorted(["c,4", "^d2", "e3", "f,3/4"])
+    assert converter.pause_labels == ["z4", "z8"]
+    if converter_class is RegexMEIConverter:
+        assert abc.splitlines()[-3:] == ["c,4 ^d2e3 z4 |", "f,3/4 z8 |", "]"]
+    # Labels are extracted once per document
+    assert converter.mei_to_abc() == abc and len(converter.notes_labels) == 4
+
+def test_converters_must_define_note_keys():
+    class Incomplete(BaseMEIConverter):
+        pass
+    with pytest.raises(TypeError):
+        Incomplete(content=MEI)
+
+def test_converters_agree_on_synthetic_documents():
+    for seed in range(5):
+        content = synthetic_mei(measures=10, seed=seed)
+        xml, regex = XMLMEIConverter(content=content), RegexMEIConverter(content=content)
+        xml.mei_to_abc(), regex.mei_to_abc()
+        # XMLMEIConverter groups the elements of a measure by tag, so only compare the labels
+        assert sorted(xml.notes_labels) == sorted(regex.notes_labels)
+        assert sorted(xml.pause_labels) == sorted(regex.pause_labels)
+
+def test_note_labels_are_shared_across_documents():
+    note_label.cache_clear()
+    for seed in range(20):
+        XMLMEIConverter(content=synthetic_mei(measures=10, seed=seed)).mei_to_abc()
+    info = note_label.cache_info()
+    assert info.hits > info.misses
+    # Parsing notes does not keep the converters alive
+    converter = XMLMEIConverter(content=MEI)
+    converter.mei_to_abc()
+    reference = weakref.ref(converter)
+    del converter
+    gc.collect()
+    assert reference() is None
+
+def test_convert_zip(tmp_path):
+    zip_path = synthetic_mei_zip(str(tmp_path / "dataset.zip"), files=6, measures=4)
+    converters = convert_zip(zip_path, number_of_files=3, max_workers=2)
+    assert len(converters) == 3
+    assert len(convert_zip(zip_path)) == 6
+    assert all(converter.mei_to_abc().startswith("X:1") for converter in converters)
+
+def test_iter_convert_zip(tmp_path):
+    zip_path = synthetic_mei_zip(str(tmp_path / "dataset.zip"), files=10, measures=4)
+    with ZipFile(zip_path, "a") as archive:
+        archive.writestr("labels/broken.mei", "<mei><measure>")
+
+    results = {result.file: result for result in iter_convert_zip(zip_path, max_workers=2, chunk_size=3)}
+    assert len(results) == 11
+    assert results["labels/broken.mei"].error.startswith("ValueError")
+
+    expected = XMLMEIConverter(content=synthetic_mei(measures=4, seed=7))
+    result = results["labels/000007.mei"]
+    assert result.error is None
+    assert result.abc == expected.mei_to_abc()
+    assert result.notes_labels == expected.notes_labels and result.score_def == expected.score_def
+    assert result.to_dict()["score_def"]["clef"] == "F4"
+
+def test_iterparse_matches_xml_converter(tmp_path):
+    for seed in range(10):
+        content = synthetic_mei(measures=15, seed=seed)
+        path = tmp_path / f"{seed}.mei"
+        path.write_text(content)
+        expected = XMLMEIConverter(content=content)
+        for converter in (IterparseMEIConverter(content=content), IterparseMEIConverter(file_name=str(path))):
+            # Only a converter reading from a file keeps nothing of the document
+            assert converter.content is None and (converter._content is None) == (converter.file_name is not None)
+            assert converter.score_def == expected.score_def
+            assert converter.mei_to_abc() == expected.mei_to_abc()
+            assert converter.treble_clef_transposition() == expected.treble_clef_transposition()
+
+def test_iterparse_streams_measures():
+    converter = IterparseMEIConverter(content=MEI)
+    measures = converter.iter_measures()
+    assert sorted(next(measures)) == sorted(["c,4", "^d2e3", "z4"])
+    assert len(converter.notes_labels) == 3
+    assert next(measures) == ["f,3/4", "z8"]
+    with pytest.raises(ValueError):
+        IterparseMEIConverter(content="<mei><scoreDef>")
+
+def test_benchmark_converters(tmp_path):
+    (tmp_path / "scores").mkdir()
+    for seed in range(3):
+        (tmp_path / "scores" / f"{seed}.mei").write_text(synthetic_mei(measures=4, seed=seed))
+    (tmp_path / "scores" / "broken.mei").write_text("<mei><measure>")
+    (tmp_path / "scores" / "notes.txt").write_text("not a score")
+
+    report = benchmark_converters(str(tmp_path / "scores"), [XMLMEIConverter, RegexMEIConverter], repeat=2,
+                                  modes=("serial", "thread"), max_workers=2, rounds=1)
+    xml, regex = report['converters']
+    assert xml['total_files'] == 4 and xml['successful_files'] == 3
+    assert xml['median_ms'] > 0 and xml['max_peak_kb'] > 0 and xml['thread_files_per_s'] > 0
+    assert [f['file'] for f in report['files'] if f['error']] == ["broken.mei"]
+    # Every converter is benchmarked by default
+    summary = compare_converters(str(tmp_path / "scores"), repeat=1, modes=(), rounds=1)
+    assert sorted(summary['converter']) == ["IterparseMEIConverter", "RegexMEIConverter", "XMLMEIConverter"]
+
+def test_benchmark_without_successful_runs(tmp_path):
+    zip_path = str(tmp_path / "dataset.zip")
+    with ZipFile(zip_path, "w") as archive:
+        archive.writestr("labels/broken.mei", "<mei><measure>")
+    summary = compare_converters(zip_path, [XMLMEIConverter], modes=("process",), max_workers=1, rounds=1)
+    assert summary.loc[0, 'successful_files'] == 0 and summary.loc[0, 'median_ms'] is None
+    with pytest.raises(ValueError):
+        benchmark_converters(str(tmp_path))
+
+def test_throughput_leaves_no_module_state():
+    import sonatabene.converter.convert_xml as convert_xml
+
+    contents = [synthetic_mei(measures=4, seed=seed) for seed in range(4)]
+    for mode in ("serial", "thread", "process"):
+        assert convert_xml.converter_throughput(RegexMEIConverter, contents, mode, max_workers=2, rounds=1) > 0
+    assert convert_xml._converter_class is None and convert_xml._benchmark_converter_class is None
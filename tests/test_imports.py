@@ -0,0 +1,41 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+# Modules the lightweight entry points must not import
+HEAVY_MODULES = ('torch', 'ultralytics', 'music21', 'matplotlib')
+
+# Import budgets in milliseconds, measured in a fresh interpreter. They are loose on
+# purpose: importing torch or music21 alone costs several times more.
+ENTRY_POINTS = {
+    'from sonatabene.converter import XMLMEIConverter': 400,
+    'from sonatabene.cli import snb': 400,
+    'from sonatabene.parser import PParser': 1000,
+}
+
+SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+{statement}
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({{'ms': elapsed, 'heavy': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+def import_stats(statement: str) -> dict:
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, ['src', os.environ.get('PYTHONPATH')]))}
+    output = subprocess.run([sys.executable, '-c', SCRIPT.format(statement=statement, heavy=HEAVY_MODULES)],
+                            capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.splitlines()[-1])
+
+@pytest.mark.parametrize('statement, budget_ms', ENTRY_POINTS.items())
+def test_entry_point_import_time(statement, budget_ms):
+    # Best of a few runs, to keep a cold disk cache from failing the test
+    runs = [import_stats(statement) for _ in range(3)]
+    assert runs[0]['heavy'] == []
+    assert min(run['ms'] for run in runs) < budget_ms
+
+def test_converter_attributes_are_lazy():
+    stats = import_stats("import sonatabene.converter as c; assert 'yolo_to_abc' in dir(c); c.yolo_to_abc")
+    assert stats['heavy'] == []
@@ -0,0 +1,169 @@
+import threading
+import time
+from pathlib import Path
+from zipfile import ZipFile
+import numpy as np
+import pytest
+import yaml
+import sonatabene.model as model_module
+from sonatabene.cache import PredictionCache
+from sonatabene.model import ModelRegistry, predict_batch
+
+class FakeYOLO:
+    """Stand-in for ultralytics.YOLO that records how many times weights are loaded."""
+    loads = 0
+    names = {0: 'note'}
+
+    def __init__(self, model_path, task=None):
+        FakeYOLO.loads += 1
+        self.model_path = model_path
+
+    def export(self, format, dynamic, **kwargs):
+        FakeYOLO.exports.append((format, dynamic))
+        FakeYOLO.export_kwargs = kwargs
+        path = self.model_path.replace(".pt", ".onnx")
+        with open(path, "w") as f:
+            f.write(format)
+        return path
+
+    def to(self, device):
+        self.device = device
+        return self
+
+    def predict(self, images, **kwargs):
+        FakeYOLO.predicted += len(images)
+        return [FakeResult(image) for image in images]
+
+class FakeBoxes:
+    def __init__(self, data):
+        self.data = data
+
+class FakeResult:
+    names = {0: 'note'}
+
+    def __init__(self, image):
+        self.orig_shape = image.shape[:2]
+        self.boxes = FakeBoxes(np.array([[0, 0, 4, 4, 0.9, 0]], dtype=np.float32))
+
+@pytest.fixture
+def fake_yolo(monkeypatch):
+    FakeYOLO.loads = 0
+    FakeYOLO.predicted = 0
+    FakeYOLO.exports = []
+    monkeypatch.setattr(model_module, "YOLO", FakeYOLO)
+    return FakeYOLO
+
+def test_registry_loads_once(fake_yolo):
+    registry = ModelRegistry(max_models=2)
+    first = registry.get("models/chopin.pt")
+    second = registry.get("models/chopin.pt")
+    assert first is second
+    assert fake_yolo.loads == 1
+
+    stats = list(registry.stats().values())[0]
+    assert stats.hits == 1
+    assert stats.load_time >= 0
+
+def test_registry_keys_on_device_and_precision(fake_yolo):
+    registry = ModelRegistry(max_models=4)
+    registry.get("models/chopin.pt")
+    registry.get("models/chopin.pt", device="cpu")
+    registry.get("models/chopin.pt", half=True)
+    assert fake_yolo.loads == 3
+    assert len(registry) == 3
+
+def test_registry_loads_outside_the_lock(fake_yolo, monkeypatch):
+    registry = ModelRegistry(max_models=2)
+    warm = registry.get("models/warm.pt")
+    loaded = threading.Event()
+
+    class SlowYOLO(FakeYOLO):
+        def __init__(self, model_path, task=None):
+            time.sleep(0.3)
+            super().__init__(model_path, task)
+            loaded.set()
+
+    monkeypatch.setattr(model_module, "YOLO", SlowYOLO)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(registry.get("models/cold.pt"))) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    # A warm model is served while the cold one loads
+    assert registry.get("models/warm.pt") is warm and not loaded.is_set()
+    for thread in threads:
+        thread.join()
+    # Both threads got the same model, loaded once
+    assert results[0] is results[1] and fake_yolo.loads == 2
+
+def test_registry_lru_eviction(fake_yolo):
+    registry = ModelRegistry(max_models=2)
+    registry.get("models/a.pt")
+    registry.get("models/b.pt")
+    registry.get("models/a.pt")
+    registry.get("models/c.pt")
+    assert ("models/a.pt", None, False) in registry
+    assert ("models/b.pt", None, False) not in registry
+    assert ("models/c.pt", None, False) in registry
+
+def test_predict_batch_cache(fake_yolo, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_module, "registry", ModelRegistry(max_models=1))
+    cache = PredictionCache(str(tmp_path))
+    crops = [np.full((8, 8, 3), i, dtype=np.uint8) for i in range(3)]
+    first = predict_batch(crops, model_path="models/chopin.pt", batch_size=2, cache=cache, conf=0.5)
+    second = predict_batch(crops[:2] + [np.zeros((4, 4, 3), dtype=np.uint8)],
+                           model_path="models/chopin.pt", batch_size=2, cache=cache, conf=0.5)
+
+    assert fake_yolo.predicted == 4
+    assert [len(d) for d in first] == [1, 1, 1]
+    assert second[0] is first[0] and second[2].orig_shape == (4, 4)
+    assert cache.stats()['memory_hits'] == 2
+
+def test_export_model_once_per_backend(fake_yolo, tmp_path):
+    weights = tmp_path / "chopin.pt"
+    weights.write_bytes(b"weights")
+
+    onnx_path = model_module.export_model(str(weights), "onnx")
+    assert onnx_path == str(tmp_path / "chopin.onnx")
+    assert model_module.export_model(str(weights), "onnx") == onnx_path
+    # The static OpenCV DNN export does not overwrite the dynamic ONNX one
+    assert model_module.export_model(str(weights), "opencv", imgsz=320) == str(tmp_path / "chopin.320.onnx")
+    assert fake_yolo.exports == [("onnx", True), ("onnx", False)]
+    assert (tmp_path / "chopin.onnx").exists()
+    # FP16 exports live next to the FP32 ones instead of being mistaken for them
+    assert model_module.export_model(str(weights), "onnx", half=True) == str(tmp_path / "chopin_fp16.onnx")
+    assert len(fake_yolo.exports) == 3 and (tmp_path / "chopin.onnx").exists()
+
+    assert model_module.export_model(str(weights), "torch") == str(weights)
+    with pytest.raises(ValueError):
+        model_module.export_model(str(weights), "tensorrt")
+
+def test_quantize_calibrates_on_dataset_images(fake_yolo, tmp_path, monkeypatch):
+    weights = tmp_path / "chopin.pt"
+    weights.write_bytes(b"weights")
+    zip_path = tmp_path / "dataset.zip"
+    with ZipFile(zip_path, "w") as archive:
+        for i in range(10):
+            archive.writestr(f"images/staff_{i}.png", b"png")
+            archive.writestr(f"labels/staff_{i}.mei", b"mei")
+
+    first = model_module.calibration_set(str(zip_path), str(tmp_path / "first"), size=4)
+    second = model_module.calibration_set(str(zip_path), str(tmp_path / "second"), size=4)
+    assert len(first) == 4 and [p.name for p in map(Path, first)] == [p.name for p in map(Path, second)]
+
+    with pytest.raises(FileNotFoundError):
+        model_module.export_model(str(weights), "int8")
+
+    calibrations = []
+    original = FakeYOLO.export
+    def export(self, format, dynamic, **kwargs):
+        with open(kwargs["data"]) as f:
+            data = yaml.safe_load(f)
+        calibrations.append((kwargs["int8"], data["names"], len(list(Path(data["path"], data["val"]).iterdir()))))
+        return original(self, format, dynamic, **kwargs)
+    monkeypatch.setattr(FakeYOLO, "export", export)
+
+    target = model_module.quantize(str(weights), zip_path=str(zip_path), calibration_size=3)
+    assert calibrations == [(True, {0: 'note'}, 3)]
+    assert target == str(tmp_path / "chopin_int8_openvino_model")
+    assert model_module.export_model(str(weights), "int8") == target
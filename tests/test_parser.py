@@ -233,4 +233,166 @@ def test_image_utils(parser, sample_image):
     
     # Test invalid axis
     with pytest.raises(ValueError):
-        parser.extract_contours(sample_image, contours, axis=2) 
\ No newline at end of file
+        parser.extract_contours(sample_image, contours, axis=2) 
+
+# Ingestion Tests
+def test_parse_pages_multipage_tiff(tmp_path, sample_image):
+    from PIL import Image
+    from sonatabene.ingest import iter_pages, parse_pages
+
+    rgb = Image.fromarray(cv2.cvtColor(sample_image, cv2.COLOR_BGR2RGB))
+    tiff_path = str(tmp_path / "book.tiff")
+    rgb.save(tiff_path, save_all=True, append_images=[rgb])
+
+    pages = list(iter_pages(tiff_path))
+    assert [name for name, _ in pages] == ["book_page0000.png", "book_page0001.png"]
+    assert pages[0][1].shape == sample_image.shape
+
+    parser = PParser()
+    results = list(parse_pages(tiff_path, parser=parser, keep_images=False))
+    assert len(results) == 2
+    assert all(len(staff_lines) > 0 for _, staff_lines in results)
+    assert all(line.image is None for _, staff_lines in results for line in staff_lines)
+    assert parser.image is None and parser.original_image is None
+
+def test_parse_directory(tmp_path, sample_image):
+    import json
+    from sonatabene.batch import parse_directory
+
+    input_dir = tmp_path / "scores"
+    input_dir.mkdir()
+    for name in ("a.png", "b.png"):
+        cv2.imwrite(str(input_dir / name), sample_image)
+
+    output_path = str(tmp_path / "parsed.jsonl")
+    summary = parse_directory(str(input_dir), output_path, max_workers=2)
+    assert summary['pages'] == 2
+    assert summary['pages_per_second'] > 0
+
+    with open(output_path) as f:
+        records = [json.loads(line) for line in f]
+    assert sorted(record['page'] for record in records) == ["a.png", "b.png"]
+    assert all(len(record['staff_lines']) > 0 for record in records)
+
+def test_results_share_page_buffer(parser, sample_image):
+    staff_lines = parser.parse(sample_image)
+    pages = {id(line.page) for line in staff_lines} | {id(note.page) for line in staff_lines for note in line.notes}
+    assert pages == {id(parser.image)}
+
+    note = staff_lines[0].notes[0]
+    x, y, w, h = note.full_height_bounds
+    assert note.image.shape == (h, w)
+    assert np.shares_memory(note.image, parser.image)
+
+    staff_lines[0].drop_pixels()
+    assert staff_lines[0].image is None
+    assert all(note.image is None for note in staff_lines[0].notes)
+    assert staff_lines[0].notes[0].bounds == note.bounds
+
+    geometry_only = parser.parse(sample_image, keep_pixels=False)
+    assert all(line.page is None for line in geometry_only)
+
+def test_find_note_table(parser, sample_image):
+    from sonatabene.scoretyping import NoteTable
+
+    parser.load_image(sample_image)
+    staff_lines = parser.find_staff_lines()
+    table = parser.find_note_table(staff_lines)
+    notes = [note for line in parser.find_notes(staff_lines) for note in line.notes]
+
+    assert isinstance(table, NoteTable)
+    assert len(table) == len(notes)
+    for converted, note in zip(table.to_notes(), notes):
+        assert converted.index == note.index
+        assert converted.line_index == note.line_index
+        assert converted.bounds == note.bounds
+        assert converted.full_height_bounds == note.full_height_bounds
+        assert converted.absolute_position == note.absolute_position
+        assert cv2.boundingRect(converted.contour) == note.bounds
+
+    first_line = table.for_line(0)
+    assert np.all(first_line['line_index'] == 0)
+    assert np.all(np.diff(first_line['bounds'][:, 0]) >= 0)
+
+    wide = table.filter(table['bounds'][:, 2] > 5).sort('bounds', 'index')
+    assert np.all(wide['bounds'][:, 2] > 5)
+    assert np.all(np.diff(wide['bounds'][:, 0]) >= 0)
+
+    table.set_labels(['note'] * (len(table) - 1) + [None])
+    assert table.label_of(0) == 'note' and table.label_of(len(table) - 1) is None
+    assert NoteTable.from_notes(table.to_notes()).labels == ['note']
+
+@pytest.mark.parametrize("max_horizontal_distance", [0, 10, 40])
+def test_group_note_components_matches_pairwise(parser, max_horizontal_distance):
+    from sonatabene.benchmark import pairwise_group_note_components, page_components, chained_components
+    for components in (page_components("resources/samples/fire.jpg"), chained_components(runs=5, run_length=30)):
+        expected = pairwise_group_note_components(components, max_horizontal_distance)
+        grouped = parser.group_note_components(components, max_horizontal_distance)
+        assert len(grouped) == len(expected)
+        assert all(np.array_equal(a, b) for a, b in zip(grouped, expected))
+
+def test_components_engine(parser, sample_image):
+    from sonatabene.benchmark import note_agreement
+
+    parser.load_image(sample_image)
+    staff_lines = parser.find_staff_lines()
+    reference = parser.find_note_table(staff_lines, engine='contours')
+    table = parser.find_note_table(staff_lines, engine='components')
+    assert len(table) > 0
+    assert note_agreement(reference, table) >= 0.95
+
+    notes = [note for line in parser.find_notes(staff_lines, engine='components') for note in line.notes]
+    assert len(notes) == len(table)
+    for note, staff_line in ((note, staff_lines[note.line_index]) for note in notes):
+        x, y, w, h = note.bounds
+        sx, sy, sw, sh = staff_line.bounds
+        assert sx <= x and x + w <= sx + sw and sy <= y and y + h <= sy + sh
+
+    with pytest.raises(ValueError):
+        parser.find_notes(staff_lines, engine='hough')
+
+def test_parse_cache(tmp_path, sample_image, monkeypatch):
+    from sonatabene.cache import ParseCache
+
+    cache = ParseCache(str(tmp_path / "parse"))
+    parsed = PParser().parse(sample_image, cache=cache)
+    assert cache.misses == 1 and cache.hits == 0
+
+    parser = PParser()
+    cached = parser.parse(sample_image, cache=cache)
+    assert cache.hits == 1
+    assert [s.bounds for s in cached] == [s.bounds for s in parsed]
+    for cached_line, line in zip(cached, parsed):
+        assert np.array_equal(cached_line.contour, line.contour)
+        assert cached_line.image.shape == line.image.shape
+        for cached_note, note in zip(cached_line.notes, line.notes):
+            assert cached_note.to_dict() == note.to_dict()
+            assert np.array_equal(cached_note.contour, note.contour)
+
+    # Other parameters are a different entry
+    parser.parse(sample_image, params={'note_dilate_iterations': 2}, cache=cache)
+    assert cache.misses == 2
+
+    # A new cache version does not hit the older entries
+    monkeypatch.setattr(ParseCache, 'VERSION', ParseCache.VERSION + 1)
+    PParser().parse(sample_image, cache=cache)
+    assert cache.misses == 3
+
+    cache.max_bytes = 1
+    cache.evict()
+    assert cache.size() == 0
+
+def test_iter_upload_pages(tmp_path, sample_image):
+    from PIL import Image
+    from sonatabene.ingest import iter_upload_pages
+
+    rgb = cv2.cvtColor(sample_image, cv2.COLOR_BGR2RGB)
+    path = tmp_path / "score.tiff"
+    Image.fromarray(rgb).save(path, save_all=True, append_images=[Image.fromarray(rgb)])
+
+    pages = list(iter_upload_pages(path.read_bytes(), "score.tiff"))
+    assert [name for name, _ in pages] == ["score_page0000.png", "score_page0001.png"]
+    assert pages[0][1].shape == sample_image.shape
+
+    _, encoded = cv2.imencode(".png", sample_image)
+    assert list(iter_upload_pages(encoded.tobytes(), "drum.png")) == [("drum.png", encoded.tobytes())]
@@ -0,0 +1,33 @@
+import json
+import numpy as np
+import pytest
+from sonatabene.protocol import MAGIC, _HEADER_LENGTH, encode_detections, decode_detections
+from sonatabene.scoretyping import Detections
+
+def test_roundtrip():
+    names = {0: 'clef', 1: 'note'}
+    detections = [
+        Detections(data=np.array([[1, 2, 3, 4, 0.9, 1], [5, 6, 7, 8, 0.4, 0]], dtype=np.float32),
+                   names=names, orig_shape=(120, 800)),
+        Detections(data=np.zeros((0, 6), dtype=np.float32), names=names, orig_shape=(100, 640)),
+    ]
+    decoded = decode_detections(encode_detections(detections))
+
+    assert len(decoded) == 2
+    assert np.array_equal(decoded[0].boxes.data, detections[0].data)
+    assert decoded[0].boxes.cls.tolist() == [1.0, 0.0]
+    assert decoded[0].names == names
+    assert decoded[1].orig_shape == (100, 640) and len(decoded[1]) == 0
+    assert decode_detections(encode_detections([])) == []
+
+def test_rejects_invalid_messages():
+    detections = [Detections(data=np.ones((3, 6), dtype=np.float32), names={1: 'note'}, orig_shape=(10, 10))]
+    encoded = encode_detections(detections)
+    with pytest.raises(ValueError):
+        decode_detections(b"\x80\x04pickle")
+    with pytest.raises(ValueError):
+        decode_detections(encoded[:-4])
+    for header in ({'version': 1, 'images': []}, {'version': 1, 'names': {}}, [1]):
+        raw = json.dumps(header).encode()
+        with pytest.raises(ValueError):
+            decode_detections(MAGIC + _HEADER_LENGTH.pack(len(raw)) + raw)
@@ -0,0 +1,231 @@
+import asyncio
+import io
+import json
+import threading
+import time
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+from sonatabene.scoretyping import Detections
+from sonatabene.serving import InferenceService, ServiceOverloaded
+
+class SlowService(InferenceService):
+    """InferenceService with a fake model that takes `delay` seconds per forward pass."""
+
+    def __init__(self, delay=0.05, **kwargs):
+        super().__init__("models/fake.pt", **kwargs)
+        self.delay = delay
+        self.threads = set()
+
+    def _model(self):
+        return None
+
+    def _infer(self, images, **kwargs):
+        self.threads.add(threading.get_ident())
+        time.sleep(self.delay)
+        return [Detections(data=np.zeros((0, 6), dtype=np.float32), names={}, orig_shape=image.shape[:2])
+                for image in images]
+
+@pytest.fixture
+def sample_tiff():
+    page = Image.fromarray(np.full((16, 16, 3), 255, dtype=np.uint8))
+    buffer = io.BytesIO()
+    page.save(buffer, format="TIFF", save_all=True, append_images=[page])
+    return buffer.getvalue()
+
+def test_predict_runs_off_the_event_loop():
+    service = SlowService(delay=0.1, workers=1, max_queue=4)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    async def main():
+        ticks = 0
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+        task = asyncio.create_task(ticker())
+        results = await service.predict(image)
+        task.cancel()
+        return results, ticks
+
+    results, ticks = asyncio.run(main())
+    assert results[0].orig_shape == (8, 8)
+    assert ticks >= 5
+    assert threading.get_ident() not in service.threads
+    service.shutdown()
+
+def test_backpressure_and_health():
+    service = SlowService(delay=0.1, workers=2, max_queue=1)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    async def main():
+        tasks = [asyncio.create_task(service.predict(image)) for _ in range(3)]
+        await asyncio.sleep(0.02)
+        health = service.health()
+        with pytest.raises(ServiceOverloaded):
+            await service.predict(image)
+        await asyncio.gather(*tasks)
+        return health
+
+    health = asyncio.run(main())
+    assert health['running'] == 2 and health['queue_depth'] == 1
+    assert health['status'] == 'overloaded'
+    assert service.health()['rejected'] == 1 and service.health()['completed'] == 3
+    assert service.health()['queue_depth'] == 0
+    service.shutdown()
+
+def test_invalid_image_bytes():
+    service = SlowService(delay=0)
+    with pytest.raises(ValueError):
+        asyncio.run(service.predict(b"not an image"))
+    assert service.health()['failed'] == 1 and service.health()['completed'] == 0
+    service.shutdown()
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_model_load_failure_fails_requests():
+    class BrokenService(SlowService):
+        def _model(self):
+            time.sleep(0.05)
+            raise OSError("missing weights")
+
+    service = BrokenService(workers=2, max_queue=4)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+
+    async def main():
+        return await asyncio.wait_for(asyncio.gather(*[service.predict(image) for _ in range(3)],
+                                                     return_exceptions=True), timeout=5)
+
+    # Requests queued before the failure are failed, later ones are refused right away
+    assert all(isinstance(result, RuntimeError) for result in asyncio.run(main()))
+    with pytest.raises(RuntimeError, match="Could not load"):
+        asyncio.run(service.predict(image))
+    with pytest.raises(RuntimeError):
+        service.warmup()
+    health = service.health()
+    assert health['failed'] == 3 and health['completed'] == 0 and health['queue_depth'] == 0
+    service.shutdown()
+
+def test_micro_batching():
+    service = SlowService(delay=0.02, workers=1, max_queue=16, max_batch_size=4, batch_window_ms=50)
+    service.batch_shapes = []
+    infer = service._infer
+
+    def recording_infer(images, **kwargs):
+        service.batch_shapes.append([image.shape[0] for image in images])
+        return infer(images, **kwargs)
+    service._infer = recording_infer
+
+    async def main():
+        images = [np.zeros((8 + i, 8, 3), dtype=np.uint8) for i in range(6)]
+        tasks = [service.predict(image) for image in images[:4]]
+        tasks += [service.predict(image, conf=0.9) for image in images[4:]]
+        return await asyncio.gather(*tasks)
+
+    results = asyncio.run(main())
+    # Results are scattered back to the request that sent each image
+    assert [r[0].orig_shape[0] for r in results] == [8, 9, 10, 11, 12, 13]
+    # Requests with other prediction arguments go in their own batch
+    assert service.batch_shapes == [[8, 9, 10, 11], [12, 13]]
+
+    metrics = service.metrics.as_dict()
+    assert metrics['batches'] == 2 and metrics['requests'] == 6
+    assert metrics['batch_sizes'] == {2: 1, 4: 1}
+    assert metrics['fill_rate'] == pytest.approx(6 / 8)
+    assert metrics['queue_wait']['p99_ms'] >= 0
+    service.shutdown()
+
+def test_predict_many_streams_in_completion_order():
+    service = SlowService(delay=0.01, workers=1, max_queue=0, max_batch_size=2)
+    images = [np.zeros((8 + i, 8, 3), dtype=np.uint8) for i in range(7)] + [b"not an image"]
+
+    async def main():
+        return [item async for item in service.predict_many(images)]
+
+    items = asyncio.run(main())
+    assert sorted(index for index, _ in items) == list(range(8))
+    results = dict(items)
+    assert all(results[i][0].orig_shape[0] == 8 + i for i in range(7))
+    assert isinstance(results[7], ValueError)
+    assert service.health()['rejected'] == 0
+    service.shutdown()
+
+def test_predict_many_consumes_async_iterables_lazily():
+    service = SlowService(delay=0.01, workers=1, max_queue=0, max_batch_size=2)
+    produced = []
+
+    async def pages():
+        for i in range(6):
+            produced.append(i)
+            yield ValueError("bad page") if i == 3 else np.zeros((8 + i, 8, 3), dtype=np.uint8)
+
+    async def main():
+        items = []
+        async for item in service.predict_many(pages()):
+            # Pages are only produced as inference slots free up
+            assert len(produced) - len(items) <= 2 + 1
+            items.append(item)
+        return dict(items)
+
+    results = asyncio.run(main())
+    assert sorted(results) == list(range(6))
+    assert str(results[3]) == "bad page"
+    assert results[5][0].orig_shape == (13, 8)
+    service.shutdown()
+
+def test_predict_batch_endpoint_streams_pages(monkeypatch, tmp_path, sample_tiff):
+    from fastapi.testclient import TestClient
+    import fast_app
+
+    service = SlowService(delay=0, workers=1, max_batch_size=2)
+    monkeypatch.setattr(fast_app, "service", service)
+    png = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+    files = [('files', ("score.tiff", sample_tiff, "image/tiff")), ('files', ("page.png", png, "image/png")),
+             ('files', ("broken.tiff", b"II*\x00garbage", "image/tiff"))]
+
+    response = TestClient(fast_app.app).post("/predict/batch", files=files)
+    lines = sorted((json.loads(line) for line in response.text.splitlines()), key=lambda line: line['index'])
+    assert [(line['file'], line['page'], line['status']) for line in lines] == [
+        ("score.tiff", "score_page0000.png", "ok"), ("score.tiff", "score_page0001.png", "ok"),
+        ("page.png", "page.png", "ok"), ("broken.tiff", None, "error")]
+    service.shutdown()
+
+def test_transcribe_endpoint(monkeypatch):
+    from fastapi.testclient import TestClient
+    import fast_app
+    from sonatabene.converter import converter_yolo
+
+    class ShuffledService(SlowService):
+        # Taller crops finish first, so results come back out of order
+        def _infer(self, images, **kwargs):
+            time.sleep(0.05 * (12 - images[0].shape[0]))
+            return super()._infer(images, **kwargs)
+
+    service = ShuffledService(delay=0, workers=3, max_batch_size=1)
+    crops = [np.zeros((8 + i, 8, 3), dtype=np.uint8) for i in range(3)]
+    monkeypatch.setattr(fast_app, "service", service)
+    monkeypatch.setattr(fast_app, "staff_crops", lambda image, cache=None: crops)
+    monkeypatch.setattr(converter_yolo, "yolo_to_abc",
+                        lambda predictions: " ".join(str(p.orig_shape[0]) for p in predictions))
+    png = cv2.imencode(".png", np.zeros((8, 8, 3), dtype=np.uint8))[1].tobytes()
+    client = TestClient(fast_app.app)
+
+    def transcribe(**params):
+        return client.post("/transcribe", files={'file': ("page.png", png, "image/png")}, params=params)
+
+    response = transcribe(format="abc")
+    assert response.status_code == 200
+    assert response.text == "8 9 10"
+    assert response.headers['X-Staff-Lines'] == "3"
+    stages = [entry.split(';')[0] for entry in response.headers['Server-Timing'].split(", ")]
+    assert stages == ['parse', 'inference', 'abc', 'render']
+
+    response = transcribe(format="wav")
+    assert response.status_code == 400 and "Unknown format 'wav'" in response.json()['error']
+
+    monkeypatch.setattr(fast_app, "staff_crops", lambda image, cache=None: [])
+    response = transcribe(format="abc")
+    assert response.status_code == 422
+    assert response.headers['Server-Timing'].startswith("parse;dur=")
+    service.shutdown()
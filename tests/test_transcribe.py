@@ -0,0 +1,21 @@
+import cv2
+from sonatabene.cache import ParseCache
+from sonatabene.transcribe import staff_crops, server_timing
+from sonatabene.utils import StageTimer
+
+def test_staff_crops(tmp_path):
+    image = cv2.imread("resources/samples/mary.jpg")
+    cache = ParseCache(str(tmp_path))
+    crops = staff_crops(image, cache=cache)
+    cached = staff_crops(image, cache=cache)
+
+    assert len(crops) == 3
+    assert all(crop.ndim == 3 and crop.shape[2] == 3 for crop in crops)
+    assert [crop.shape for crop in cached] == [crop.shape for crop in crops]
+    assert cache.hits == 1
+
+def test_server_timing():
+    timer = StageTimer()
+    timer.durations['render'] = 0.0021
+    timer.durations['parse'] = 0.0125
+    assert server_timing(timer) == "parse;dur=12.5, render;dur=2.1"
@@ -0,0 +1,33 @@
+import pytest
+from sonatabene.benchmark import random_note_labels, regex_transpose
+from sonatabene.converter.convert_xml import RegexMEIConverter
+from sonatabene.converter.converter_yolo import inverse_transpose
+from sonatabene.converter.mapping import CLEF_TO_TREBLE
+from sonatabene.converter.transposition import FROM_TREBLE, TO_TREBLE, from_treble, to_treble
+
+LABELS = random_note_labels(2000, seed=1)
+MEASURES = [" ".join(LABELS[i:i + 5]) for i in range(0, len(LABELS), 5)]
+
+@pytest.mark.parametrize('clef', sorted(CLEF_TO_TREBLE))
+def test_tables_match_regex_substitution(clef):
+    mapping = CLEF_TO_TREBLE[clef]
+    inverse = {treble: original for original, treble in mapping.items()}
+    for text in LABELS + MEASURES + ["c''''''4", "z4", ""]:
+        assert to_treble(clef, text) == regex_transpose(mapping, text)
+        assert from_treble(clef, text) == regex_transpose(inverse, text)
+    for label in LABELS:
+        assert TO_TREBLE[clef].transpose_label(label) == regex_transpose(mapping, label)
+        assert FROM_TREBLE[clef].transpose_label(label) == regex_transpose(inverse, label)
+
+def test_unknown_clef_is_left_as_is():
+    assert to_treble("G2", "c,4 ^d2") == "c,4 ^d2"
+    assert inverse_transpose("G2", "c,4 ^d2") == "c,4 ^d2"
+
+def test_converter_transposition():
+    content = """<mei><scoreDef><staffDef clef.shape="F" clef.line="4"/></scoreDef>
+<measure n="1"><note pname="c" oct="3" dur="4"/><note pname="a" oct="4" dur="8"/></measure></mei>"""
+    converter = RegexMEIConverter(content=content)
+    converter.mei_to_abc()
+    expected = [regex_transpose(CLEF_TO_TREBLE["F4"], label) for label in converter.notes_labels]
+    assert converter.treble_clef_transposition() == expected
+    assert [inverse_transpose("F4", label) for label in expected] == converter.notes_labels